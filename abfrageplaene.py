@@ -0,0 +1,412 @@
+﻿import os
+import sys
+import sqlite3
+import logging
+import argparse
+import itertools
+import tempfile
+from db_connection import get_connection, get_manager
+from migrations import migrate
+from benchmark import SKALEN, DATEN_VERZEICHNIS, START_JAHR, datenbank_erzeugen
+from repository import (PannenRepository, ErsatzteileRepository, MotorenRepository, BenutzerRepository,
+                        WartungenRepository)
+
+# Verzeichnis der häufigen Abfragen der Anwendung und Prüfung ihrer
+# Ausführungspläne. Jeder Eintrag ruft den echten Einstiegspunkt (Repository)
+# auf; die dabei ausgeführten SELECTs werden per Trace mitgeschnitten und mit
+# EXPLAIN QUERY PLAN auf einer Testdatenbank (benchmark.datenbank_erzeugen)
+# geprüft. Ein SCAN einer Tabelle (auch über einen nicht abdeckenden Index)
+# gilt als Fehler, außer die Tabelle ist für den Eintrag ausdrücklich erlaubt;
+# SEARCH und SCAN über einen abdeckenden Index sind in Ordnung. Bei den Seiten
+# einer Sortierung gilt zusätzlich eine Sortierung im temporären B-Baum als
+# Fehler: jede Seite soll den Index in Sortierreihenfolge lesen und nach LIMIT
+# Zeilen aufhören, statt alle Treffer zu sortieren.
+#
+# Geprüft wird auf einer Kopie ohne ANALYZE-Statistik (ohne_statistik), damit
+# das Ergebnis nicht von Größe und Verteilung der Testdatenbank abhängt.
+#
+#   python abfrageplaene.py [--skala 100k] [--db datei.db] [--plaene] [--mit-statistik]
+#
+# Namen in den Plänen sind die Aliase der Abfragen bzw. der Sicht 'pannen':
+# p = pannen_daten, ab = abteilungen, an = anlagen, t = anlagenteile.
+
+
+class Abfrage:
+    """
+    aufruf(repos, werte) führt den Einstiegspunkt aus; erlaubte_scans nennt
+    Tabellen (Namen wie im Plan), die vollständig gelesen werden dürfen, grund
+    begründet das. felder sind die Beispielwerte, ohne die der Aufruf nichts
+    prüft (z.B. ein Herstellerfilter in einer Datenbank ohne Ersatzteile).
+    indexsortiert: die Abfrage muss ohne temporären B-Baum für ORDER BY auskommen.
+    """
+
+    def __init__(self, name, aufruf, erlaubte_scans=(), grund="", felder=(), indexsortiert=False):
+        self.name = name
+        self.aufruf = aufruf
+        self.erlaubte_scans = set(erlaubte_scans)
+        self.grund = grund
+        self.felder = tuple(felder)
+        self.indexsortiert = indexsortiert
+
+
+def _kombinationen(felder):
+    """Alle Teilmengen der Filterfelder, z.B. ('abteilung', 'anlage') -> (), (abteilung,), ..."""
+    return [kombination for anzahl in range(len(felder) + 1) for kombination in itertools.combinations(felder, anzahl)]
+
+
+def _filter(werte, kombination):
+    filter = {feld: werte[feld] for feld in kombination if feld != "zeitraum"}
+    if "zeitraum" in kombination:
+        filter["start_date"], filter["end_date"] = werte["zeitraum"]
+    return filter
+
+
+def _beschreibung(kombination):
+    return "+".join(kombination) or "ohne Filter"
+
+
+# Zeilen-ids, die das Änderungsprotokoll liefern könnte (aenderungsfeed.py)
+GEAENDERTE_IDS = [1, 2, 3]
+
+# Ohne Filter liest die erste Seite die neuesten Zeilen über die rowid (LIMIT)
+SEITE_OHNE_FILTER = ({"p"}, "Seite in id-Reihenfolge, durch LIMIT begrenzt")
+# Erste Seite einer Sortierung: Index der Spalte von vorn gelesen; die folgenden
+# Seiten (ab einer Cursor-Zeile) müssen ohne Scan auskommen
+SORTIERT = "Seite in Sortierreihenfolge über den Index der Spalte, durch LIMIT begrenzt"
+VOLLE_LISTE = "liefert alle Zeilen der Tabelle"
+
+
+def _sortierte_seiten(name, tabelle, erlaubt, cursor_feld, seite):
+    """
+    Erste und folgende Seite je Sortierspalte in beide Richtungen, ohne Sortierung
+    im temporären B-Baum. seite(repos, sort_column, descending, **page) lädt eine
+    Seite; tabelle ist die Repository-Klasse mit SORT_COLUMNS.
+    """
+    abfragen = []
+    for sort_column in tabelle.SORT_COLUMNS[1:]:
+        def sortiert(repos, werte, sort_column=sort_column):
+            for descending in (False, True):
+                seite(repos, sort_column, descending)
+
+        def sortiert_weiter(repos, werte, sort_column=sort_column):
+            for descending in (False, True):
+                seite(repos, sort_column, descending, after_id=werte[cursor_feld])
+
+        abfragen.append(Abfrage(f"{name}[{sort_column}]", sortiert, erlaubt, SORTIERT, indexsortiert=True))
+        abfragen.append(Abfrage(f"{name}_naechste_seite[{sort_column}]", sortiert_weiter, felder=(cursor_feld,),
+                                indexsortiert=True))
+    return abfragen
+
+
+def _pannen_abfragen():
+    abfragen = []
+    # PannenFenster.filter_pannen / load_data: erste und folgende Seite je Filterkombination
+    for kombination in _kombinationen(("abteilung", "anlage", "anlagenteil", "zeitraum")):
+        erlaubt, grund = SEITE_OHNE_FILTER if not kombination else ((), "")
+
+        def erste_seite(repos, werte, kombination=kombination):
+            return repos["pannen"].get_pannen_page(**_filter(werte, kombination))
+
+        def naechste_seite(repos, werte, kombination=kombination):
+            seite = repos["pannen"].get_pannen_page(**_filter(werte, kombination))
+            if seite:
+                repos["pannen"].get_pannen_page(**_filter(werte, kombination), after_id=seite[-1][0])
+
+        abfragen.append(Abfrage(f"pannen_seite[{_beschreibung(kombination)}]", erste_seite, erlaubt, grund,
+                                kombination))
+        abfragen.append(Abfrage(f"pannen_naechste_seite[{_beschreibung(kombination)}]", naechste_seite, erlaubt,
+                                grund, kombination))
+    # BerichteFenster.apply_filters und export_data
+    for kombination in _kombinationen(("abteilung", "anlage", "zeitraum")):
+        erlaubt, grund = SEITE_OHNE_FILTER if not kombination else ((), "")
+
+        def bericht(repos, werte, kombination=kombination):
+            return repos["pannen"].get_pannen_page(**_filter(werte, kombination),
+                                                   columns=["id", "abteilung", "anlage", "datum", "beschreibung"])
+
+        def export(repos, werte, kombination=kombination):
+            for _ in repos["pannen"].iter_filtered_pannen(**_filter(werte, kombination)):
+                pass
+
+        def gefiltert(repos, werte, kombination=kombination):
+            return repos["pannen"].get_filtered_pannen(**_filter(werte, kombination))
+
+        abfragen.append(Abfrage(f"bericht_seite[{_beschreibung(kombination)}]", bericht, erlaubt, grund,
+                                kombination))
+        if kombination:
+            abfragen.append(Abfrage(f"bericht_export[{_beschreibung(kombination)}]", export, felder=kombination))
+            abfragen.append(Abfrage(f"get_filtered_pannen[{_beschreibung(kombination)}]", gefiltert,
+                                    felder=kombination))
+        else:
+            abfragen.append(Abfrage("bericht_export[ohne Filter]", export, {"p"}, VOLLE_LISTE))
+            abfragen.append(Abfrage("get_filtered_pannen[ohne Filter]", gefiltert, {"p"}, VOLLE_LISTE))
+    # Sortierung per Klick auf die Spaltenüberschrift: erste und folgende Seite in beide Richtungen
+    abfragen += _sortierte_seiten(
+        "pannen_sortiert", PannenRepository, {"p"}, "pannen_id",
+        lambda repos, sort_column, descending, **page: repos["pannen"].get_pannen_page(
+            sort_column=sort_column, descending=descending, **page))
+    # Nachlesen geänderter Zeilen in PannenFenster und BerichteFenster (Änderungsfeed)
+    for kombination in ((), ("abteilung", "anlage", "zeitraum")):
+        def nachlesen(repos, werte, kombination=kombination):
+            return repos["pannen"].get_pannen_by_ids(GEAENDERTE_IDS, **_filter(werte, kombination))
+
+        abfragen.append(Abfrage(f"get_pannen_by_ids[{_beschreibung(kombination)}]", nachlesen, felder=kombination))
+    abfragen += [
+        Abfrage("search_pannen", lambda repos, werte: repos["pannen"].search_pannen(werte["suche"])),
+        Abfrage("search_pannen[sortiert]",
+                lambda repos, werte: repos["pannen"].search_pannen(werte["suche"], sort_column="ausfallzeit")),
+        Abfrage("get_pannen_counts_by_abteilung", lambda repos, werte: repos["pannen"].get_pannen_counts_by_abteilung()),
+        Abfrage("get_ausfallzeit_by_abteilung",
+                lambda repos, werte: repos["pannen"].get_ausfallzeit_by_abteilung(*werte["zeitraum"])),
+        Abfrage("get_ausfallzeit_summe", lambda repos, werte: repos["pannen"].get_ausfallzeit_summe(*werte["zeitraum"])),
+    ]
+    return abfragen
+
+
+def _ersatzteile_abfragen():
+    abfragen = []
+    # ErsatzteileFenster: Facettensuche mit Trefferzahlen je Filterkombination
+    for kombination in _kombinationen(("suche", "hersteller", "typ", "lagerplatz")):
+        # Die Freisuche geht über den Trigramm-Index (Migration 13)
+        erlaubt, grund = (), ""
+        if not kombination:
+            erlaubt, grund = {"ersatzteile"}, "Seite in id-Reihenfolge mit LIMIT, Facetten über alle Zeilen"
+
+        def facettensuche(repos, werte, kombination=kombination):
+            filter = {feld: werte[feld] for feld in kombination if feld != "suche"}
+            return repos["ersatzteile"].search_ersatzteile(werte["suche"] if "suche" in kombination else "", **filter)
+
+        abfragen.append(Abfrage(f"search_ersatzteile[{_beschreibung(kombination)}]", facettensuche, erlaubt, grund,
+                                kombination))
+    # ErsatzteileFenster: Sortierung per Klick auf die Spaltenüberschrift
+    abfragen += _sortierte_seiten(
+        "ersatzteile_sortiert", ErsatzteileRepository, {"ersatzteile"}, "ersatzteil_id",
+        lambda repos, sort_column, descending, **page: repos["ersatzteile"].search_ersatzteile(
+            sort_column=sort_column, descending=descending, with_facets=False, **page))
+    # MotorenFenster, WartungenFenster und BenutzerVerwaltungFenster blättern ebenso seitenweise
+    abfragen += _sortierte_seiten(
+        "motoren_sortiert", MotorenRepository, {"motoren"}, "motor_id",
+        lambda repos, sort_column, descending, **page: repos["motoren"].get_motoren_page(
+            sort_column=sort_column, descending=descending, **page))
+    abfragen += _sortierte_seiten(
+        "wartungen_sortiert", WartungenRepository, {"w"}, "wartung_id",
+        lambda repos, sort_column, descending, **page: repos["wartungen"].get_wartungen_page(
+            sort_column=sort_column, descending=descending, **page))
+    abfragen += _sortierte_seiten(
+        "benutzer_sortiert", BenutzerRepository, {"benutzer"}, "benutzer_id",
+        lambda repos, sort_column, descending, **page: repos["benutzer"].get_users_page(
+            sort_column=sort_column, descending=descending, **page))
+    abfragen += [
+        Abfrage("get_all_ersatzteile", lambda repos, werte: repos["ersatzteile"].get_all_ersatzteile(),
+                {"ersatzteile"}, VOLLE_LISTE),
+        Abfrage("get_all_ersatzteile[suche]", lambda repos, werte: repos["ersatzteile"].get_all_ersatzteile(werte["suche"])),
+        Abfrage("get_all_hersteller", lambda repos, werte: repos["ersatzteile"].get_all_hersteller()),
+        Abfrage("get_types_by_hersteller",
+                lambda repos, werte: repos["ersatzteile"].get_types_by_hersteller(werte["hersteller"]),
+                felder=("hersteller",)),
+        Abfrage("motoren_seite", lambda repos, werte: repos["motoren"].get_motoren_page(), {"motoren"},
+                "Seite in id-Reihenfolge, durch LIMIT begrenzt"),
+        Abfrage("motoren_seite[suche]", lambda repos, werte: repos["motoren"].get_motoren_page(werte["suche"])),
+        Abfrage("motoren_export[suche]", lambda repos, werte: list(repos["motoren"].iter_motoren(werte["suche"]))),
+        Abfrage("motoren_export[ohne Filter]", lambda repos, werte: list(repos["motoren"].iter_motoren()),
+                {"motoren"}, VOLLE_LISTE),
+        Abfrage("get_ersatzteile_by_ids", lambda repos, werte: repos["ersatzteile"].get_ersatzteile_by_ids(GEAENDERTE_IDS)),
+        Abfrage("get_motoren_by_ids", lambda repos, werte: repos["motoren"].get_motoren_by_ids(GEAENDERTE_IDS)),
+        Abfrage("get_wartungen_by_ids", lambda repos, werte: repos["wartungen"].get_wartungen_by_ids(GEAENDERTE_IDS)),
+        Abfrage("get_users_by_ids", lambda repos, werte: repos["benutzer"].get_users_by_ids(GEAENDERTE_IDS)),
+        Abfrage("wartungen_seite", lambda repos, werte: repos["wartungen"].get_wartungen_page(), {"w"},
+                "Seite in id-Reihenfolge, durch LIMIT begrenzt"),
+        Abfrage("benutzer_seite", lambda repos, werte: repos["benutzer"].get_users_page(), {"benutzer"},
+                "Seite in id-Reihenfolge, durch LIMIT begrenzt"),
+        Abfrage("get_login", lambda repos, werte: repos["benutzer"].get_login(werte["benutzer"])),
+    ]
+    return abfragen
+
+
+def abfragen():
+    """Das Verzeichnis aller registrierten Abfragen."""
+    return _pannen_abfragen() + _ersatzteile_abfragen()
+
+
+def _beispielwerte(conn):
+    """Filterwerte, die in der Testdatenbank vorkommen."""
+    ort = conn.execute("""
+        SELECT ab.name, an.name, t.name
+        FROM anlagenteile t
+        JOIN anlagen an ON an.anlage_id = t.anlage_id
+        JOIN abteilungen ab ON ab.abteilung_id = an.abteilung_id
+        ORDER BY t.anlagenteil_id LIMIT 1
+    """).fetchone()
+    abteilung, anlage, anlagenteil = ort or (None, None, None)
+    ersatzteil = conn.execute("SELECT id, hersteller, typ, lagerplatz FROM ersatzteile ORDER BY id LIMIT 1").fetchone()
+    ersatzteil_id, hersteller, typ, lagerplatz = ersatzteil or (None, "", "", "")
+    return {
+        "abteilung": abteilung,
+        "anlage": anlage,
+        "anlagenteil": anlagenteil,
+        "zeitraum": (f"{START_JAHR}-03-01", f"{START_JAHR}-03-31"),
+        "suche": "Kaffee",
+        "hersteller": hersteller,
+        "typ": typ,
+        "lagerplatz": lagerplatz,
+        "benutzer": "admin",
+        # Cursor-Zeilen für folgende Seiten einer Sortierung
+        "pannen_id": conn.execute("SELECT MIN(id) FROM pannen_daten").fetchone()[0],
+        "ersatzteil_id": ersatzteil_id,
+        "motor_id": conn.execute("SELECT MIN(id) FROM motoren").fetchone()[0],
+        "wartung_id": conn.execute("SELECT MIN(id) FROM wartungen").fetchone()[0],
+        "benutzer_id": conn.execute("SELECT MIN(id) FROM benutzer").fetchone()[0],
+    }
+
+
+def plan_pruefen(plan, erlaubte_scans=(), indexsortiert=False):
+    """
+    plan: Zeilen aus EXPLAIN QUERY PLAN (id, parent, notused, detail).
+    indexsortiert: auch eine Sortierung im temporären B-Baum beanstanden.
+    Liefert die beanstandeten Planzeilen.
+    """
+    # Zwischenergebnisse (Unterabfragen, CTEs) dürfen gelesen werden; ihre eigenen Pläne werden mitgeprüft
+    zwischenergebnisse = {detail.split()[-1] for _, _, _, detail in plan
+                          if detail.startswith(("MATERIALIZE ", "CO-ROUTINE "))}
+    fehler = []
+    for _, _, _, detail in plan:
+        if indexsortiert and detail.startswith("USE TEMP B-TREE FOR") and "ORDER BY" in detail:
+            fehler.append(detail)
+            continue
+        if not detail.startswith("SCAN "):
+            continue
+        tabelle = detail.split()[1]
+        if ("COVERING INDEX" in detail or "VIRTUAL TABLE" in detail or detail == "SCAN CONSTANT ROW"
+                or tabelle in zwischenergebnisse or tabelle in erlaubte_scans):
+            continue
+        fehler.append(detail)
+    return fehler
+
+
+class PlanErgebnis:
+    def __init__(self, abfrage):
+        self.abfrage = abfrage
+        self.anweisungen = []
+        self.uebersprungen = False
+
+    @property
+    def fehler(self):
+        return [(sql, detail) for sql, plan, beanstandet in self.anweisungen for detail in beanstandet]
+
+
+def _ist_abfrage(sql):
+    # Interne Anweisungen virtueller Tabellen (FTS5-Schattentabellen) nennen das Schema 'main'
+    return sql.lstrip().upper().startswith(("SELECT", "WITH")) and "'main'." not in sql
+
+
+def pruefen(db_path, registrierte=None):
+    """
+    Führt alle registrierten Abfragen auf db_path aus und prüft die Pläne der
+    dabei ausgeführten SELECTs. Liefert [PlanErgebnis].
+    """
+    registrierte = registrierte if registrierte is not None else abfragen()
+    repos = {
+        "pannen": PannenRepository(db_path),
+        "ersatzteile": ErsatzteileRepository(db_path),
+        "motoren": MotorenRepository(db_path),
+        "benutzer": BenutzerRepository(db_path),
+        "wartungen": WartungenRepository(db_path),
+    }
+    conn = get_connection(db_path)
+    werte = _beispielwerte(conn)
+    ergebnisse = []
+    for abfrage in registrierte:
+        ergebnis = PlanErgebnis(abfrage)
+        ergebnisse.append(ergebnis)
+        if not all(werte[feld] for feld in abfrage.felder):
+            ergebnis.uebersprungen = True
+            continue
+        mitschnitt = []
+        conn.set_trace_callback(mitschnitt.append)
+        try:
+            abfrage.aufruf(repos, werte)
+        finally:
+            conn.set_trace_callback(None)
+        for sql in dict.fromkeys(filter(_ist_abfrage, mitschnitt)):
+            plan = conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+            ergebnis.anweisungen.append((sql, plan, plan_pruefen(plan, abfrage.erlaubte_scans, abfrage.indexsortiert)))
+        if not ergebnis.anweisungen:
+            logging.warning(f"'{abfrage.name}' hat keine Abfrage ausgeführt.")
+    return ergebnisse
+
+
+def ohne_statistik(db_path, ziel):
+    """
+    Kopiert db_path nach ziel und leert dort sqlite_stat1/sqlite_stat4. Ohne
+    Statistik rechnet der Planer mit festen Annahmen (große Tabellen, wenige
+    Zeilen je Schlüsselwert) statt mit der Verteilung dieser Datenbank. Mit
+    Statistik wählt er auf kleinen Datenbanken zu Recht öfter einen Scan
+    (bei 10k Zeilen etwa für den Abteilungsfilter in id-Reihenfolge), und das
+    Urteil hinge davon ab, wann zuletzt PRAGMA optimize lief.
+    """
+    quelle = sqlite3.connect(db_path)
+    kopie = sqlite3.connect(ziel)
+    try:
+        quelle.backup(kopie)
+        for tabelle in ("sqlite_stat1", "sqlite_stat4"):
+            if kopie.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabelle,)).fetchone():
+                kopie.execute(f"DELETE FROM {tabelle}")
+        kopie.commit()
+    finally:
+        kopie.close()
+        quelle.close()
+    return ziel
+
+
+def _plan_text(plan):
+    eltern = {}
+    zeilen = []
+    for knoten, parent, _, detail in plan:
+        eltern[knoten] = eltern.get(parent, -1) + 1
+        zeilen.append("    " + "  " * eltern[knoten] + detail)
+    return "\n".join(zeilen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prüft die Ausführungspläne der registrierten Abfragen.")
+    # Die Pläne hängen dank ohne_statistik nicht von der Größe ab; die Testdatenbank liefert die Beispielwerte
+    parser.add_argument("--skala", choices=list(SKALEN), default="100k", help="Größe der Testdatenbank")
+    parser.add_argument("--db", help="Vorhandene Datenbank statt der erzeugten Testdatenbank")
+    parser.add_argument("--verzeichnis", default=DATEN_VERZEICHNIS)
+    parser.add_argument("--plaene", action="store_true", help="Pläne aller Abfragen ausgeben")
+    parser.add_argument("--mit-statistik", action="store_true",
+                        help="Mit der ANALYZE-Statistik der Datenbank prüfen (Ergebnis hängt von ihrer Größe ab)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+
+    db_path = args.db or datenbank_erzeugen(args.skala, args.verzeichnis)
+    # Geprüft wird gegen das aktuelle Schema
+    migrate(db_path)
+    get_manager(db_path).close_all()
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        pruef_db = db_path if args.mit_statistik else ohne_statistik(db_path, os.path.join(verzeichnis, "plaene.db"))
+        ergebnisse = pruefen(pruef_db)
+        get_manager(pruef_db).close_all()
+    fehlerhaft = [ergebnis for ergebnis in ergebnisse if ergebnis.fehler]
+    uebersprungen = [ergebnis.abfrage.name for ergebnis in ergebnisse if ergebnis.uebersprungen]
+    for ergebnis in ergebnisse:
+        if not (args.plaene or ergebnis.fehler) or ergebnis.uebersprungen:
+            continue
+        status = "FEHLER" if ergebnis.fehler else "ok"
+        hinweis = f" (erlaubt: {', '.join(sorted(ergebnis.abfrage.erlaubte_scans))} – {ergebnis.abfrage.grund})" \
+            if ergebnis.abfrage.erlaubte_scans else ""
+        print(f"{status:<6} {ergebnis.abfrage.name}{hinweis}")
+        for sql, plan, beanstandet in ergebnis.anweisungen:
+            if args.plaene or beanstandet:
+                print("    " + " ".join(sql.split()))
+                print(_plan_text(plan))
+    if uebersprungen:
+        print(f"Ohne Beispielwerte in der Datenbank übersprungen: {', '.join(uebersprungen)}")
+    anweisungen = sum(len(ergebnis.anweisungen) for ergebnis in ergebnisse)
+    print(f"{len(ergebnisse)} Abfragen, {anweisungen} Anweisungen geprüft, {len(fehlerhaft)} mit Tabellen-Scan "
+          "oder Sortierung.")
+    sys.exit(1 if fehlerhaft else 0)
+
+
+if __name__ == "__main__":
+    main()
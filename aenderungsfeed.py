@@ -0,0 +1,144 @@
+﻿import threading
+import logging
+
+from db_connection import get_connection, DEFAULT_DB_PATH
+from repository import Aenderung
+
+# Meldet offenen Fenstern Schreibzugriffe anderer Fenster und Arbeitsplätze.
+# Trigger schreiben je Zeile einen Eintrag in 'aenderungen' (Migration 14);
+# der Feed merkt sich die zuletzt gelesene id als Wasserstand und liest nur,
+# wenn sich seit der letzten Prüfung etwas an der Datenbank geändert hat
+# (PRAGMA data_version für andere Verbindungen, total_changes für die eigene),
+# wie der Referenz-Cache. Die Abonnenten erhalten je Tabelle eine Liste von
+# Aenderung (ohne row) und lesen nur diese Zeilen nach. Sind zu viele Einträge
+# aufgelaufen, wurde das Protokoll inzwischen gekürzt oder meldet ein
+# Massenimport "neu_laden", erhalten sie None und laden ihre aktuelle Seite neu.
+
+
+class Aenderungsfeed:
+    INTERVALL_MS = 1000
+    # Mehr Einträge auf einmal (z.B. nach einem Massenimport): neu laden statt Einzelzeilen
+    MAX_EREIGNISSE = 500
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, intervall_ms=INTERVALL_MS, max_ereignisse=MAX_EREIGNISSE):
+        self.db_path = db_path
+        self.intervall_ms = intervall_ms
+        self.max_ereignisse = max_ereignisse
+        self._lock = threading.Lock()
+        self._abos = {}
+        self._stand = None
+        self._stamp = None
+        self._root = None
+        self._after = None
+
+    def subscribe(self, tabelle, callback, widget=None):
+        """
+        callback(ereignisse) für Schreibzugriffe auf tabelle (z.B. 'pannen_daten').
+        Mit widget prüft der Feed über dessen after() im Tk-Thread, und das Abo
+        endet, wenn das Widget zerstört wird.
+        """
+        with self._lock:
+            if self._stand is None:
+                self._stand = self._max_id(get_connection(self.db_path)) or 0
+            self._abos.setdefault(tabelle, []).append(callback)
+        if widget is not None:
+            def beenden(event):
+                if event.widget is widget:
+                    self.unsubscribe(tabelle, callback)
+
+            widget.bind("<Destroy>", beenden, add="+")
+            self._planen(widget.nametowidget("."))
+
+    def unsubscribe(self, tabelle, callback):
+        with self._lock:
+            callbacks = self._abos.get(tabelle, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def poll(self):
+        """Liest neue Einträge und verteilt sie; liefert die Anzahl gelesener Einträge."""
+        conn = get_connection(self.db_path)
+        stamp = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+        with self._lock:
+            if stamp == self._stamp or self._stand is None:
+                return 0
+            self._stamp = stamp
+            stand = self._stand
+            max_id = self._max_id(conn)
+            if max_id is None or max_id <= stand:
+                return 0
+            min_id = conn.execute("SELECT MIN(id) FROM aenderungen").fetchone()[0]
+            self._stand = max_id
+            abos = {tabelle: list(callbacks) for tabelle, callbacks in self._abos.items() if callbacks}
+            if min_id > stand + 1:
+                # Protokoll inzwischen gekürzt: welche Tabellen betroffen sind, ist unbekannt
+                ereignisse = {tabelle: None for tabelle in abos}
+            elif max_id - stand > self.max_ereignisse:
+                ereignisse = {tabelle: None for (tabelle,) in conn.execute(
+                    "SELECT DISTINCT tabelle FROM aenderungen WHERE id > ? AND id <= ?", (stand, max_id))}
+            else:
+                ereignisse = self._sammeln(conn.execute(
+                    "SELECT tabelle, zeile_id, art FROM aenderungen WHERE id > ? AND id <= ? ORDER BY id",
+                    (stand, max_id)))
+        for tabelle, callbacks in abos.items():
+            if tabelle not in ereignisse:
+                continue
+            for callback in callbacks:
+                try:
+                    callback(ereignisse[tabelle])
+                except Exception:
+                    logging.exception(f"Fehler beim Verarbeiten der Änderungen an '{tabelle}'")
+        return max_id - stand
+
+    def _sammeln(self, eintraege):
+        # Je Zeile zählt der letzte Eintrag; neu und danach geändert bleibt neu
+        tabellen = {}
+        for tabelle, zeile_id, art in eintraege:
+            if art == Aenderung.NEU_LADEN:
+                tabellen[tabelle] = None
+                continue
+            zeilen = tabellen.setdefault(tabelle, {})
+            if zeilen is None:
+                continue
+            if zeilen.get(zeile_id) == Aenderung.NEU and art == Aenderung.GEAENDERT:
+                continue
+            zeilen.pop(zeile_id, None)
+            zeilen[zeile_id] = art
+        return {tabelle: None if zeilen is None else [Aenderung(art, zeile_id) for zeile_id, art in zeilen.items()]
+                for tabelle, zeilen in tabellen.items()}
+
+    def _max_id(self, conn):
+        return conn.execute("SELECT MAX(id) FROM aenderungen").fetchone()[0]
+
+    def _planen(self, root):
+        if self._after is None:
+            self._root = root
+            self._after = root.after(self.intervall_ms, self._tick)
+
+    def _tick(self):
+        self._after = None
+        try:
+            self.poll()
+        except Exception:
+            logging.exception("Fehler beim Lesen des Änderungsprotokolls")
+        with self._lock:
+            aktiv = any(self._abos.values())
+        if aktiv:
+            try:
+                self._after = self._root.after(self.intervall_ms, self._tick)
+            except Exception:
+                # Anwendung wird beendet
+                self._after = None
+
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+def get_aenderungsfeed(db_path=DEFAULT_DB_PATH):
+    with _feeds_lock:
+        feed = _feeds.get(db_path)
+        if feed is None:
+            feed = Aenderungsfeed(db_path)
+            _feeds[db_path] = feed
+        return feed
@@ -0,0 +1,379 @@
+﻿import os
+import sys
+import csv
+import json
+import time
+import shutil
+import sqlite3
+import logging
+import argparse
+import platform
+import datetime
+import tracemalloc
+import bcrypt
+import demo
+from db_connection import configure_connection, get_manager
+from migrations import apply_migrations
+from massenimport import dynamic_populate
+from initrefdata import init_reference_data_from_excel
+from repository import PannenRepository, ErsatzteileRepository, MotorenRepository, BenutzerRepository
+
+# Benchmarks der wichtigsten Pfade (Repository-Abfragen, Importe, Anmeldung)
+# auf synthetischen Datenbanken aus demo.generate_pannen. Die Datenbanken
+# werden je Skala und Seed einmal erzeugt und in DATEN_VERZEICHNIS
+# wiederverwendet. Ergebnisse (Latenz-Perzentile in ms, Speicherspitze in KB)
+# werden als JSON geschrieben und lassen sich mit einer Basislinie vergleichen.
+#
+#   python benchmark.py lauf --skalen 10k 100k --ausgabe ergebnis.json [--basislinie basis.json]
+#   python benchmark.py vergleich basis.json ergebnis.json [--toleranz 0.2]
+
+# Skala -> (Fabriken, Jahre) für demo.generate_pannen; je Fabrik und Jahr
+# entstehen mit der Vorlage rund 3.300 Pannen
+SKALEN = {
+    "10k": (3, 1),
+    "100k": (30, 1),
+    "1m": (30, 10),
+    "10m": (300, 10),
+}
+DATEN_VERZEICHNIS = "benchmark_daten"
+REFERENZ_DATEI = "konfiguration.xlsx"
+START_JAHR = 2023
+
+# Ersatzteile und Motoren je Panne (gedeckelt), für Stammdaten und Importdatei
+STAMMDATEN_ANTEIL = 0.1
+STAMMDATEN_MAX = 200000
+
+# Ungefilterte Abfragen liefern alle Zeilen; ab dieser Größe übersprungen
+ALLE_ZEILEN_MAX = 2000000
+
+BENUTZER = ("benchmark", "benchmark")
+
+
+class Messung:
+    """Läufe eines Benchmarks: Laufzeiten in Sekunden und Speicherspitze in Bytes."""
+
+    def __init__(self, name):
+        self.name = name
+        self.zeiten = []
+        self.speicher_spitze = None
+
+    def ergebnis(self):
+        zeiten = sorted(t * 1000 for t in self.zeiten)
+        return {
+            "laeufe": len(zeiten),
+            "min_ms": round(zeiten[0], 3),
+            "p50_ms": round(perzentil(zeiten, 50), 3),
+            "p90_ms": round(perzentil(zeiten, 90), 3),
+            "p95_ms": round(perzentil(zeiten, 95), 3),
+            "p99_ms": round(perzentil(zeiten, 99), 3),
+            "max_ms": round(zeiten[-1], 3),
+            "mittel_ms": round(sum(zeiten) / len(zeiten), 3),
+            "speicher_spitze_kb": round(self.speicher_spitze / 1024) if self.speicher_spitze is not None else None,
+        }
+
+
+def perzentil(sortiert, p):
+    """Perzentil mit linearer Interpolation; sortiert muss aufsteigend sortiert sein."""
+    position = (len(sortiert) - 1) * p / 100
+    unten = int(position)
+    oben = min(unten + 1, len(sortiert) - 1)
+    return sortiert[unten] + (sortiert[oben] - sortiert[unten]) * (position - unten)
+
+
+def messen(name, func, vorbereiten=None, aufraeumen=None, wiederholungen=20, max_sekunden=30):
+    """
+    Misst func nach einem Aufwärmlauf bis zu wiederholungen Mal (mindestens
+    drei Läufe, danach höchstens max_sekunden lang). vorbereiten liefert die
+    Argumente für func und wird nicht mitgemessen, ebenso aufraeumen. Ein
+    letzter Lauf mit tracemalloc ermittelt die Speicherspitze (Python-Heap).
+    """
+    messung = Messung(name)
+
+    def lauf(mit_speicher=False):
+        args = vorbereiten() if vorbereiten else ()
+        try:
+            if mit_speicher:
+                tracemalloc.start()
+                try:
+                    func(*args)
+                    messung.speicher_spitze = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+                return
+            start = time.perf_counter()
+            func(*args)
+            messung.zeiten.append(time.perf_counter() - start)
+        finally:
+            if aufraeumen:
+                aufraeumen(*args)
+
+    # Info-Meldungen der Importe würden jeden Lauf protokollieren
+    logging.disable(logging.INFO)
+    try:
+        lauf()
+        messung.zeiten.clear()
+        beginn = time.perf_counter()
+        while len(messung.zeiten) < wiederholungen:
+            lauf()
+            if len(messung.zeiten) >= 3 and time.perf_counter() - beginn > max_sekunden:
+                break
+        lauf(mit_speicher=True)
+    finally:
+        logging.disable(logging.NOTSET)
+    logging.info(f"{name}: {len(messung.zeiten)} Läufe, p50 {perzentil(sorted(messung.zeiten), 50) * 1000:.2f} ms")
+    return messung
+
+
+def _stammdaten_csv(pfad, anzahl):
+    """Schreibt Ersatzteile als CSV (wie ein Export aus der Warenwirtschaft)."""
+    with open(pfad, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["hersteller", "typ", "bauform", "spannung", "bestellnummer", "lagerplatz",
+                         "beschreibung", "bestand", "mindestbestand", "einzelpreis"])
+        for i in range(anzahl):
+            writer.writerow([f"Hersteller {i % 50}", f"Typ {i % 400}", f"B{i % 7}", "400V", f"BN-{i:08d}",
+                             f"Regal {i % 120}", f"Ersatzteil {i} für Anlage {i % 90}", i % 25, 5,
+                             f"{(i % 1000) / 10:.2f}".replace(".", ",")])
+
+
+def _motoren(conn, anzahl):
+    conn.executemany(
+        f"INSERT INTO motoren ({', '.join(MotorenRepository.COLUMNS)}) VALUES ({', '.join('?' * len(MotorenRepository.COLUMNS))})",
+        ((f"M-{i:07d}", "IM", "G", "BS", f"Firma {i % 30}", "nein", f"Typ {i % 200}", f"S{i:09d}",
+          str(0.5 + i % 90), "400", "1450", "", str(1 + i % 60), "0,85", f"Lager {i % 20}", f"Motor {i}")
+         for i in range(anzahl))
+    )
+
+
+def datenbank_erzeugen(skala, verzeichnis=DATEN_VERZEICHNIS, seed=1):
+    """
+    Liefert den Pfad der Benchmark-Datenbank dieser Skala und erzeugt sie bei
+    Bedarf: Pannen über demo.generate_pannen, Ersatzteile über dynamic_populate
+    aus einer CSV, Motoren und ein Benutzer für die Anmeldung.
+    """
+    os.makedirs(verzeichnis, exist_ok=True)
+    db_path = os.path.join(verzeichnis, f"pannen_{skala}_seed{seed}.db")
+    if os.path.exists(db_path):
+        return db_path
+    fabriken, jahre = SKALEN[skala]
+    teil_pfad = db_path + ".teil"
+    if os.path.exists(teil_pfad):
+        os.remove(teil_pfad)
+    logging.info(f"Erzeuge Benchmark-Datenbank '{db_path}' ({fabriken} Fabriken, {jahre} Jahre) ...")
+    # Vorlage neben den Datenbanken ablegen, nicht im Arbeitsverzeichnis
+    vorlage = os.path.join(verzeichnis, demo.CONFIG_FILE)
+    demo.create_config_excel(vorlage)
+    pannen = demo.generate_pannen(teil_pfad, seed=seed, start_jahr=START_JAHR, jahre=jahre, fabriken=fabriken,
+                                  config_file=vorlage)
+
+    stammdaten = min(int(pannen * STAMMDATEN_ANTEIL), STAMMDATEN_MAX)
+    csv_pfad = stammdaten_datei(verzeichnis, stammdaten)
+    dynamic_populate(csv_pfad, teil_pfad, "ersatzteile")
+    conn = sqlite3.connect(teil_pfad)
+    try:
+        configure_connection(conn)
+        with conn:
+            _motoren(conn, stammdaten)
+            conn.execute("INSERT INTO benutzer (username, password, role) VALUES (?, ?, ?)",
+                         (BENUTZER[0], bcrypt.hashpw(BENUTZER[1].encode("utf-8"), bcrypt.gensalt()), "user"))
+        conn.execute("PRAGMA optimize")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    os.replace(teil_pfad, db_path)
+    return db_path
+
+
+def stammdaten_datei(verzeichnis, anzahl):
+    pfad = os.path.join(verzeichnis, f"ersatzteile_{anzahl}.csv")
+    if not os.path.exists(pfad):
+        _stammdaten_csv(pfad, anzahl)
+    return pfad
+
+
+def leere_datenbank(verzeichnis=DATEN_VERZEICHNIS):
+    """Datenbank mit aktuellem Schema ohne Daten, Vorlage für Import-Benchmarks."""
+    os.makedirs(verzeichnis, exist_ok=True)
+    pfad = os.path.join(verzeichnis, "leer.db")
+    if os.path.exists(pfad):
+        os.remove(pfad)
+    conn = sqlite3.connect(pfad)
+    try:
+        configure_connection(conn)
+        apply_migrations(conn)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    return pfad
+
+
+def login(repo, username, password):
+    """Anmeldung wie im Login-Fenster: Benutzer lesen und Passwort mit bcrypt prüfen."""
+    row = repo.get_login(username)
+    return row is not None and row[1] is not None and bcrypt.checkpw(password.encode("utf-8"), row[1])
+
+
+def skala_messen(skala, verzeichnis=DATEN_VERZEICHNIS, seed=1, wiederholungen=20, max_sekunden=30):
+    db_path = datenbank_erzeugen(skala, verzeichnis, seed)
+    pannen_repo = PannenRepository(db_path)
+    ersatzteile_repo = ErsatzteileRepository(db_path)
+    motoren_repo = MotorenRepository(db_path)
+    benutzer_repo = BenutzerRepository(db_path)
+
+    with pannen_repo._connect() as conn:
+        zeilen = conn.execute("SELECT COUNT(*) FROM pannen_daten").fetchone()[0]
+        abteilung, anlage = conn.execute("""
+            SELECT ab.name, an.name FROM anlagen an JOIN abteilungen ab ON ab.abteilung_id = an.abteilung_id
+            ORDER BY an.anlage_id LIMIT 1
+        """).fetchone()
+        stammdaten = conn.execute("SELECT COUNT(*) FROM ersatzteile").fetchone()[0]
+    von, bis = f"{START_JAHR}-03-01", f"{START_JAHR}-03-31"
+
+    messungen = []
+
+    def m(name, func, **kwargs):
+        kwargs.setdefault("wiederholungen", wiederholungen)
+        kwargs.setdefault("max_sekunden", max_sekunden)
+        messungen.append(messen(name, func, **kwargs))
+
+    m("get_filtered_pannen_abteilung_zeitraum",
+      lambda: pannen_repo.get_filtered_pannen(abteilung, "", von, bis))
+    m("get_filtered_pannen_anlage", lambda: pannen_repo.get_filtered_pannen(abteilung, anlage))
+    if zeilen <= ALLE_ZEILEN_MAX:
+        m("get_filtered_pannen_alle", lambda: pannen_repo.get_filtered_pannen())
+    m("get_pannen_counts_by_abteilung", pannen_repo.get_pannen_counts_by_abteilung)
+    m("get_all_ersatzteile", ersatzteile_repo.get_all_ersatzteile)
+    m("get_all_ersatzteile_suche", lambda: ersatzteile_repo.get_all_ersatzteile("Typ 12"))
+    m("get_all_motoren", motoren_repo.get_all_motoren)
+    m("login_bcrypt", lambda: login(benutzer_repo, *BENUTZER))
+
+    # Importe schreiben jeweils in eine frische Kopie der leeren Datenbank
+    vorlage = leere_datenbank(verzeichnis)
+    kopie = os.path.join(verzeichnis, "import.db")
+
+    def frische_kopie():
+        shutil.copyfile(vorlage, kopie)
+        return (kopie,)
+
+    def kopie_entfernen(pfad):
+        for endung in ("", "-wal", "-shm"):
+            if os.path.exists(pfad + endung):
+                os.remove(pfad + endung)
+
+    csv_pfad = stammdaten_datei(verzeichnis, stammdaten)
+    m("dynamic_populate_csv", lambda pfad: dynamic_populate(csv_pfad, pfad, "ersatzteile"),
+      vorbereiten=frische_kopie, aufraeumen=kopie_entfernen, wiederholungen=min(wiederholungen, 5))
+    if os.path.exists(REFERENZ_DATEI):
+        m("init_reference_data_from_excel",
+          lambda pfad: init_reference_data_from_excel(REFERENZ_DATEI, pfad, force=True),
+          vorbereiten=frische_kopie, aufraeumen=kopie_entfernen, wiederholungen=min(wiederholungen, 5))
+    else:
+        logging.warning(f"Referenzdatei '{REFERENZ_DATEI}' fehlt, init_reference_data_from_excel übersprungen.")
+
+    get_manager(db_path).close_all()
+    return {
+        "datenbank": db_path,
+        "pannen": zeilen,
+        "stammdaten": stammdaten,
+        "benchmarks": {messung.name: messung.ergebnis() for messung in messungen},
+    }
+
+
+def umgebung():
+    return {
+        "zeitpunkt": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "plattform": platform.platform(),
+        "prozessor": platform.processor() or platform.machine(),
+        "kerne": os.cpu_count(),
+    }
+
+
+def ergebnis_ausgeben(ergebnis):
+    for skala, daten in ergebnis["skalen"].items():
+        print(f"Skala {skala}: {daten['pannen']} Pannen, {daten['stammdaten']} Ersatzteile/Motoren")
+        for name, werte in daten["benchmarks"].items():
+            print(f"  {name:<40} p50 {werte['p50_ms']:>10.2f} ms  p95 {werte['p95_ms']:>10.2f} ms  "
+                  f"Speicher {werte['speicher_spitze_kb']:>8} KB  ({werte['laeufe']} Läufe)")
+
+
+def vergleichen(basis, aktuell, toleranz=0.2, min_ms=2.0, min_kb=1024):
+    """
+    Vergleicht zwei Ergebnisse (JSON-Dicts) je Skala und Benchmark. Als
+    Regression gilt ein p50 oder p95, der um mehr als toleranz (relativ) und
+    min_ms (absolut, gegen Rauschen) über der Basislinie liegt, ebenso eine
+    Speicherspitze über toleranz und min_kb.
+    Liefert [(skala, benchmark, kennzahl, basis, aktuell, faktor, regression)].
+    """
+    zeilen = []
+    for skala, daten in aktuell.get("skalen", {}).items():
+        basis_skala = basis.get("skalen", {}).get(skala)
+        if basis_skala is None:
+            continue
+        for name, werte in daten["benchmarks"].items():
+            alt = basis_skala["benchmarks"].get(name)
+            if alt is None:
+                continue
+            for kennzahl, schwelle in (("p50_ms", min_ms), ("p95_ms", min_ms), ("speicher_spitze_kb", min_kb)):
+                a, n = alt.get(kennzahl), werte.get(kennzahl)
+                if a is None or n is None:
+                    continue
+                faktor = n / a if a else float("inf") if n else 1.0
+                regression = n > a * (1 + toleranz) and n - a > schwelle
+                zeilen.append((skala, name, kennzahl, a, n, faktor, regression))
+    return zeilen
+
+
+def vergleich_ausgeben(zeilen):
+    regressionen = [z for z in zeilen if z[6]]
+    for skala, name, kennzahl, alt, neu, faktor, regression in zeilen:
+        markierung = "REGRESSION" if regression else ("besser" if faktor < 1 else "")
+        print(f"{skala:>5} {name:<40} {kennzahl:<20} {alt:>12.2f} {neu:>12.2f} {faktor:>7.2f}x {markierung}")
+    print(f"{len(regressionen)} Regressionen in {len(zeilen)} Vergleichen.")
+    return not regressionen
+
+
+def _laden(pfad):
+    with open(pfad, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks für Repository-Abfragen, Importe und Anmeldung.")
+    befehle = parser.add_subparsers(dest="befehl", required=True)
+    lauf = befehle.add_parser("lauf", help="Benchmarks ausführen und als JSON speichern")
+    lauf.add_argument("--skalen", nargs="+", choices=list(SKALEN), default=["10k", "100k"])
+    lauf.add_argument("--ausgabe", default="benchmark_ergebnis.json")
+    lauf.add_argument("--verzeichnis", default=DATEN_VERZEICHNIS, help="Ablage der erzeugten Datenbanken")
+    lauf.add_argument("--seed", type=int, default=1)
+    lauf.add_argument("--wiederholungen", type=int, default=20)
+    lauf.add_argument("--max-sekunden", type=float, default=30, help="Zeitbudget je Benchmark")
+    lauf.add_argument("--basislinie", help="Nach dem Lauf mit dieser Ergebnisdatei vergleichen")
+    lauf.add_argument("--toleranz", type=float, default=0.2)
+    vergleich = befehle.add_parser("vergleich", help="Zwei Ergebnisdateien vergleichen")
+    vergleich.add_argument("basislinie")
+    vergleich.add_argument("ergebnis")
+    vergleich.add_argument("--toleranz", type=float, default=0.2)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+
+    if args.befehl == "vergleich":
+        ok = vergleich_ausgeben(vergleichen(_laden(args.basislinie), _laden(args.ergebnis), args.toleranz))
+        sys.exit(0 if ok else 1)
+
+    ergebnis = {"umgebung": umgebung(), "seed": args.seed, "skalen": {}}
+    for skala in args.skalen:
+        ergebnis["skalen"][skala] = skala_messen(skala, args.verzeichnis, args.seed, args.wiederholungen,
+                                                 args.max_sekunden)
+    with open(args.ausgabe, "w", encoding="utf-8") as f:
+        json.dump(ergebnis, f, indent=2, ensure_ascii=False)
+    ergebnis_ausgeben(ergebnis)
+    logging.info(f"Ergebnisse in '{args.ausgabe}' gespeichert.")
+    if args.basislinie:
+        ok = vergleich_ausgeben(vergleichen(_laden(args.basislinie), ergebnis, args.toleranz))
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+﻿import sqlite3
+import threading
+import logging
+import random
+import time
+import json
+import os
+
+DEFAULT_DB_PATH = "instandhaltung.db"
+CONFIG_FILE = "config.json"
+
+# Größe des Statement-Caches von sqlite3 (Standard: 128). Die Abfragen der
+# Fenster werden dynamisch zusammengebaut, daher etwas großzügiger.
+CACHED_STATEMENTS = 512
+
+# Nebenläufigkeitsmodus (config.json, Abschnitt "db_concurrency"):
+#   "netzwerk" - klassisches Rollback-Journal (Standard, die Datenbank liegt auf
+#                einem Netzlaufwerk); Sperrkonflikte werden über Timeout und
+#                Retry abgefangen.
+#   "wal"      - Write-Ahead-Log: Leser blockieren den Schreiber nicht. Nur für
+#                lokale Dateien einschalten: alle Arbeitsplätze müssen die Datei
+#                über denselben Rechner öffnen (WAL benötigt gemeinsamen
+#                Speicher, kein SMB/NFS-Share).
+CONCURRENCY_DEFAULTS = {
+    "mode": "netzwerk",
+    "busy_timeout_ms": 5000,
+    "write_retries": 6,
+    "retry_backoff_s": 0.05,
+    "retry_backoff_max_s": 2.0,
+    "checkpoint_interval_s": 300,
+}
+
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+
+
+def load_concurrency_settings(config_file=CONFIG_FILE):
+    settings = dict(CONCURRENCY_DEFAULTS)
+    if os.path.exists(config_file):
+        try:
+            with open(config_file, "r", encoding="utf-8-sig") as f:
+                settings.update(json.load(f).get("db_concurrency", {}))
+        except Exception as e:
+            logging.warning(f"Nebenläufigkeitseinstellungen aus '{config_file}' nicht lesbar: {e}")
+    return settings
+
+
+def configure_connection(conn, settings=None):
+    """
+    Setzt die Pragmas einer Verbindung gemäß Nebenläufigkeitsmodus.
+    Der Journalmodus WAL bleibt in der Datenbankdatei gespeichert.
+    """
+    if settings is None:
+        settings = load_concurrency_settings()
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout_ms'])};")
+    if settings["mode"] == "wal":
+        journal_mode = conn.execute("PRAGMA journal_mode = WAL;").fetchone()[0]
+        if journal_mode.lower() != "wal":
+            logging.warning(f"WAL-Modus nicht verfügbar, Journalmodus bleibt '{journal_mode}'.")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+    elif settings["mode"] == "netzwerk":
+        journal_mode = conn.execute("PRAGMA journal_mode;").fetchone()[0]
+        if journal_mode.lower() == "wal":
+            conn.execute("PRAGMA journal_mode = DELETE;")
+    return conn
+
+
+def is_lock_error(error):
+    if getattr(error, "sqlite_errorcode", None) in (SQLITE_BUSY, SQLITE_LOCKED):
+        return True
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+class LockMetrics:
+    """Zählt Wartezeiten auf die Schreibsperre und Checkpoint-Läufe eines Prozesses."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.writes = 0
+            self.retries = 0
+            self.lock_timeouts = 0
+            self.wait_total_s = 0.0
+            self.wait_max_s = 0.0
+            self.checkpoints = 0
+            self.checkpoints_busy = 0
+            self.checkpoint_total_s = 0.0
+            self.checkpoint_max_s = 0.0
+            self.last_checkpoint = None
+
+    def record_write(self, wait_s, retries):
+        with self._lock:
+            self.writes += 1
+            self.retries += retries
+            self.wait_total_s += wait_s
+            self.wait_max_s = max(self.wait_max_s, wait_s)
+
+    def record_timeout(self, wait_s, retries):
+        with self._lock:
+            self.lock_timeouts += 1
+            self.retries += retries
+            self.wait_total_s += wait_s
+            self.wait_max_s = max(self.wait_max_s, wait_s)
+
+    def record_checkpoint(self, duration_s, busy, log_frames, checkpointed):
+        with self._lock:
+            self.checkpoints += 1
+            if busy:
+                self.checkpoints_busy += 1
+            self.checkpoint_total_s += duration_s
+            self.checkpoint_max_s = max(self.checkpoint_max_s, duration_s)
+            self.last_checkpoint = (log_frames, checkpointed)
+
+    def snapshot(self):
+        with self._lock:
+            attempts = self.writes + self.lock_timeouts
+            return {
+                "writes": self.writes,
+                "retries": self.retries,
+                "lock_timeouts": self.lock_timeouts,
+                "wait_total_s": round(self.wait_total_s, 4),
+                "wait_avg_s": round(self.wait_total_s / attempts, 4) if attempts else 0.0,
+                "wait_max_s": round(self.wait_max_s, 4),
+                "checkpoints": self.checkpoints,
+                "checkpoints_busy": self.checkpoints_busy,
+                "checkpoint_total_s": round(self.checkpoint_total_s, 4),
+                "checkpoint_max_s": round(self.checkpoint_max_s, 4),
+                "last_checkpoint": self.last_checkpoint,
+            }
+
+
+class ConnectionManager:
+    """
+    Hält pro Thread eine offene Verbindung zu einer Datenbankdatei.
+    Pragmas werden beim Öffnen einmalig gesetzt; vorbereitete Statements
+    bleiben im Statement-Cache der Verbindung erhalten.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, settings=None):
+        self.db_path = db_path
+        self.settings = settings if settings is not None else load_concurrency_settings()
+        self.metrics = LockMetrics()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._checkpoint_thread = None
+        self._checkpoint_stop = threading.Event()
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_path, cached_statements=CACHED_STATEMENTS)
+        configure_connection(conn, self.settings)
+        with self._lock:
+            self._connections.append(conn)
+        logging.debug(f"Neue Verbindung zu '{self.db_path}' in Thread '{threading.current_thread().name}'.")
+        return conn
+
+    def write(self, func, *args, **kwargs):
+        """
+        Führt func(conn, *args, **kwargs) in einer BEGIN IMMEDIATE-Transaktion aus.
+        Ist die Datenbank gesperrt, wird die gesamte Transaktion mit exponentiellem
+        Backoff wiederholt; danach wird der letzte Sperrfehler weitergegeben.
+        """
+        conn = self.connection()
+        max_retries = int(self.settings["write_retries"])
+        backoff = float(self.settings["retry_backoff_s"])
+        backoff_max = float(self.settings["retry_backoff_max_s"])
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                acquired = time.perf_counter()
+                try:
+                    result = func(conn, *args, **kwargs)
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+                self.metrics.record_write(acquired - start, attempt)
+                return result
+            except sqlite3.OperationalError as e:
+                if not is_lock_error(e):
+                    raise
+                if attempt >= max_retries:
+                    self.metrics.record_timeout(time.perf_counter() - start, attempt)
+                    logging.error(f"Schreibzugriff auf '{self.db_path}' nach {attempt} Wiederholungen gescheitert: {e}")
+                    raise
+                delay = min(backoff * (2 ** attempt), backoff_max)
+                attempt += 1
+                time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def checkpoint(self, mode="PASSIVE"):
+        """Überträgt das WAL in die Datenbankdatei; liefert (busy, log_frames, checkpointed)."""
+        start = time.perf_counter()
+        busy, log_frames, checkpointed = self.connection().execute(f"PRAGMA wal_checkpoint({mode});").fetchone()
+        self.metrics.record_checkpoint(time.perf_counter() - start, busy, log_frames, checkpointed)
+        return busy, log_frames, checkpointed
+
+    def start_checkpoints(self, interval_s=None):
+        """Startet einen Hintergrund-Thread, der regelmäßig einen WAL-Checkpoint ausführt."""
+        if self.settings["mode"] != "wal" or self._checkpoint_thread is not None:
+            return
+        interval_s = float(interval_s if interval_s is not None else self.settings["checkpoint_interval_s"])
+        if interval_s <= 0:
+            return
+        self._checkpoint_stop.clear()
+
+        def run():
+            while not self._checkpoint_stop.wait(interval_s):
+                try:
+                    self.checkpoint()
+                except sqlite3.Error as e:
+                    logging.warning(f"WAL-Checkpoint fehlgeschlagen: {e}")
+            self.close_thread_connection()
+
+        self._checkpoint_thread = threading.Thread(target=run, name="wal-checkpoint", daemon=True)
+        self._checkpoint_thread.start()
+
+    def stop_checkpoints(self):
+        if self._checkpoint_thread is None:
+            return
+        self._checkpoint_stop.set()
+        self._checkpoint_thread.join(timeout=5)
+        self._checkpoint_thread = None
+
+    def close_thread_connection(self):
+        """Schließt die Verbindung des aktuellen Threads (z.B. am Ende eines Worker-Threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+
+    def close_all(self):
+        self.stop_checkpoints()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # Verbindung gehört einem anderen Thread; sie wird mit ihm freigegeben.
+                pass
+        self._local = threading.local()
+        logging.info(f"Sperrstatistik für '{self.db_path}': {self.metrics.snapshot()}")
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_manager(db_path=DEFAULT_DB_PATH):
+    with _managers_lock:
+        manager = _managers.get(db_path)
+        if manager is None:
+            manager = ConnectionManager(db_path)
+            _managers[db_path] = manager
+        return manager
+
+
+def get_connection(db_path=DEFAULT_DB_PATH):
+    """
+    Liefert die gemeinsame Verbindung des aktuellen Threads.
+    Die Verbindung wird nicht geschlossen; 'with conn:' schließt nur die Transaktion ab.
+    """
+    return get_manager(db_path).connection()
+
+
+def write_transaction(func, *args, db_path=DEFAULT_DB_PATH, **kwargs):
+    """Kurzform für get_manager(db_path).write(func, ...)."""
+    return get_manager(db_path).write(func, *args, **kwargs)
+
+
+def lock_metrics(db_path=DEFAULT_DB_PATH):
+    return get_manager(db_path).metrics.snapshot()
+
+
+def close_all():
+    with _managers_lock:
+        managers = list(_managers.values())
+    for manager in managers:
+        manager.close_all()
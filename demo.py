@@ -1,370 +1,559 @@
-﻿#!/usr/bin/env python3
-import sqlite3
-import pandas as pd
-import os
-import random
-from datetime import datetime, timedelta
-
-DB_FILE = "factory_demo.db"
-CONFIG_FILE = "konfiguration_demo.xlsx"
-
-def create_tables():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-
-    # Tabelle für Fabriken
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS factories (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            description TEXT
-        )
-    ''')
-
-    # Tabelle für Abteilungen (departments) – jede Abteilung gehört zu einer Fabrik
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS departments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            factory_id INTEGER,
-            name TEXT NOT NULL,
-            description TEXT,
-            FOREIGN KEY (factory_id) REFERENCES factories(id)
-        )
-    ''')
-
-    # Tabelle für Anlagen – jede Anlage gehört zu einer Abteilung
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS plants (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            department_id INTEGER,
-            name TEXT NOT NULL,
-            description TEXT,
-            FOREIGN KEY (department_id) REFERENCES departments(id)
-        )
-    ''')
-
-    # Tabelle für Anlagenteile – jedes Teil gehört zu einer Anlage
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS plant_parts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            plant_id INTEGER,
-            part_name TEXT,
-            description TEXT,
-            FOREIGN KEY (plant_id) REFERENCES plants(id)
-        )
-    ''')
-
-    # Tabelle für Pannen/Unfälle – hier wird auch der Schichttyp (Früh, Mittag, Nacht) festgehalten
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS incidents (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            plant_part_id INTEGER,
-            incident_date TEXT,
-            shift TEXT,
-            cause TEXT,
-            description TEXT,
-            FOREIGN KEY (plant_part_id) REFERENCES plant_parts(id)
-        )
-    ''')
-
-    # Zusätzliche Tabellen für Motoren, Ersatzteile, Wartungen und Mitarbeiter (für humorvolle Demonstrationen)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS engines (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            serial_number TEXT,
-            model TEXT,
-            description TEXT
-        )
-    ''')
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS spare_parts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            engine_id INTEGER,
-            part_name TEXT,
-            description TEXT,
-            FOREIGN KEY (engine_id) REFERENCES engines(id)
-        )
-    ''')
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS maintenance (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            engine_id INTEGER,
-            maintenance_date TEXT,
-            description TEXT,
-            FOREIGN KEY (engine_id) REFERENCES engines(id)
-        )
-    ''')
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS employees (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            role TEXT,
-            description TEXT
-        )
-    ''')
-
-    conn.commit()
-    conn.close()
-    print("Tabellen erfolgreich erstellt!")
-
-def create_config_excel():
-    # Falls die Konfigurationsdatei noch nicht existiert, wird sie hier erzeugt.
-    if not os.path.exists(CONFIG_FILE):
-        # Abteilungen
-        departments_df = pd.DataFrame({
-            "name": ["Kaffee & Co", "Keks- und Backstube", "Schmunzeltechnik"],
-            "description": [
-                "Zuständig für den koffeinhaltigen Betrieb.",
-                "Hier werden Keksomat und Backwaren produziert.",
-                "Innovative Technik mit einem Augenzwinkern."
-            ]
-        })
-
-        # Anlagen – mit Zuordnung zur Abteilung über den Namen der Abteilung
-        plants_df = pd.DataFrame({
-            "department": ["Kaffee & Co", "Kaffee & Co",
-                           "Keks- und Backstube", "Keks- und Backstube", "Keks- und Backstube",
-                           "Schmunzeltechnik", "Schmunzeltechnik"],
-            "name": ["Bohnenzauber", "Espresso-Express",
-                     "Keksfabrik", "Teigtraum", "Ofenzauber",
-                     "Lachlabor", "Witzwerkstatt"],
-            "description": [
-                "Erzeugt magischen Kaffeegenuss.",
-                "Schnellster Espresso-Service in der Galaxie.",
-                "Hier rollen die Kekse vom Band.",
-                "Wo Teigträume Wirklichkeit werden.",
-                "Magische Wärme für perfekte Backkunst.",
-                "Testlabor für humorvolle Innovationen.",
-                "Hier werden die besten Gags geschmiedet."
-            ]
-        })
-
-        # Anlagenteile – mit Zuordnung zur Anlage über den Anlagennamen
-        plant_parts_data = [
-            # Für Bohnenzauber
-            {"plant": "Bohnenzauber", "part_name": "Kaffeemaschine", "description": "Bereitet perfekten Kaffee zu, wenn sie nicht streikt."},
-            {"plant": "Bohnenzauber", "part_name": "Mahlwerk", "description": "Mahlt die Bohnen mit Präzision und einem Hauch Magie."},
-            {"plant": "Bohnenzauber", "part_name": "Dampfboiler", "description": "Versorgt die Anlage mit Dampf – manchmal zu humorvoll."},
-            # Für Espresso-Express
-            {"plant": "Espresso-Express", "part_name": "Espressomaschine", "description": "Brüht Espresso so schnell, dass man kaum blinzelt."},
-            {"plant": "Espresso-Express", "part_name": "Wasserpumpe", "description": "Sorgt für den nötigen Wasserschub."},
-            {"plant": "Espresso-Express", "part_name": "Kaffeezähler", "description": "Zählt die Tassen, damit niemand zu wenig Kaffee bekommt."},
-            # Für Keksfabrik
-            {"plant": "Keksfabrik", "part_name": "Keksomat", "description": "Automatischer Keksproduzent, anfällig für klebrige Situationen."},
-            {"plant": "Keksfabrik", "part_name": "Backofen", "description": "Hält die Kekse warm, wenn die Maschine versagt."},
-            {"plant": "Keksfabrik", "part_name": "Teigmischer", "description": "Vermischt Zutaten mit viel Liebe (und Überraschungen)."},
-            # Für Teigtraum
-            {"plant": "Teigtraum", "part_name": "Keksomat", "description": "Erzeugt Kekse in hoher Geschwindigkeit – wenn er mal funktioniert."},
-            {"plant": "Teigtraum", "part_name": "FlourMatic", "description": "Automatisiert das Mehl-Zuführen mit einem Hauch von Poesie."},
-            {"plant": "Teigtraum", "part_name": "OfenX", "description": "Hält den Teig in Schach – meistens."},
-            # Für Ofenzauber
-            {"plant": "Ofenzauber", "part_name": "Backofen", "description": "Der Ofen, der immer warmherzig ist."},
-            {"plant": "Ofenzauber", "part_name": "Keksautomat", "description": "Gibt Kekse aus, aber nur, wenn er in Stimmung ist."},
-            # Für Lachlabor
-            {"plant": "Lachlabor", "part_name": "Spaßgenerator", "description": "Erzeugt Lacher in regelmäßigen Abständen."},
-            {"plant": "Lachlabor", "part_name": "Witzchip", "description": "Klein, aber oho – der Witzchip."},
-            {"plant": "Lachlabor", "part_name": "Humorhub", "description": "Das Herzstück des Lachens."},
-            # Für Witzwerkstatt
-            {"plant": "Witzwerkstatt", "part_name": "Lachmaschine", "description": "Lacht, wenn es sein soll, und manchmal auch von selbst."},
-            {"plant": "Witzwerkstatt", "part_name": "Gag-Modul", "description": "Ausgestattet mit den besten Gags der Branche."},
-            {"plant": "Witzwerkstatt", "part_name": "Schmunzelheizung", "description": "Hält die Stimmung warm, selbst bei Kälte."},
-        ]
-        plant_parts_df = pd.DataFrame(plant_parts_data)
-
-        # Schreibe die Daten in eine Excel-Datei mit mehreren Sheets
-        with pd.ExcelWriter(CONFIG_FILE) as writer:
-            departments_df.to_excel(writer, sheet_name="departments", index=False)
-            plants_df.to_excel(writer, sheet_name="plants", index=False)
-            plant_parts_df.to_excel(writer, sheet_name="plant_parts", index=False)
-
-        print(f"Konfigurationsdatei '{CONFIG_FILE}' wurde erstellt.")
-    else:
-        print(f"Konfigurationsdatei '{CONFIG_FILE}' existiert bereits.")
-
-def import_config_data():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-
-    # Lese die Excel-Datei
-    xls = pd.ExcelFile(CONFIG_FILE)
-
-    # Füge eine Basis-Fabrik ein
-    cursor.execute(
-        "INSERT INTO factories (name, description) VALUES (?, ?)",
-        ("Fabrik Fantasia", "Eine fantastische Fabrik, in der Humor und Technik aufeinandertreffen.")
-    )
-    factory_id = cursor.lastrowid
-
-    # Importiere Abteilungen
-    df_departments = pd.read_excel(xls, "departments")
-    department_mapping = {}  # Mapping von Abteilungsname zu ID
-    for _, row in df_departments.iterrows():
-        cursor.execute(
-            "INSERT INTO departments (factory_id, name, description) VALUES (?, ?, ?)",
-            (factory_id, row["name"], row["description"])
-        )
-        department_mapping[row["name"]] = cursor.lastrowid
-
-    # Importiere Anlagen
-    df_plants = pd.read_excel(xls, "plants")
-    plant_mapping = {}  # Mapping von Anlagenname zu ID
-    for _, row in df_plants.iterrows():
-        dep_id = department_mapping.get(row["department"])
-        if dep_id:
-            cursor.execute(
-                "INSERT INTO plants (department_id, name, description) VALUES (?, ?, ?)",
-                (dep_id, row["name"], row["description"])
-            )
-            plant_mapping[row["name"]] = cursor.lastrowid
-
-    # Importiere Anlagenteile
-    df_parts = pd.read_excel(xls, "plant_parts")
-    for _, row in df_parts.iterrows():
-        plant_id = plant_mapping.get(row["plant"])
-        if plant_id:
-            cursor.execute(
-                "INSERT INTO plant_parts (plant_id, part_name, description) VALUES (?, ?, ?)",
-                (plant_id, row["part_name"], row["description"])
-            )
-
-    conn.commit()
-    conn.close()
-    print("Konfigurationsdaten aus Excel erfolgreich importiert!")
-
-def init_other_reference_data():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-
-    # Mitarbeiter
-    employees = [
-        ("Ford Prefect", "Außerirdischer Berater", "Bringt galaktischen Humor in den Betrieb."),
-        ("Arthur Dent", "Techniker", "Trotzt Pannen mit einem Handtuch und Gelassenheit."),
-        ("Zaphod Beeblebrox", "Geschäftsführer", "Führt die Fabrik mit doppeltem Kopf und unkonventionellen Ideen."),
-    ]
-    cursor.executemany(
-        "INSERT INTO employees (name, role, description) VALUES (?, ?, ?)",
-        employees
-    )
-
-    # Motoren
-    engines = [
-        ("ENG-001", "Turbo-Lachmotor", "Antreibt nicht nur, sondern sorgt auch für unerwartete Lacher."),
-        ("ENG-002", "Super-Schmunzel 3000", "Bekannt für charmante Geräusche beim Anlaufen.")
-    ]
-    cursor.executemany(
-        "INSERT INTO engines (serial_number, model, description) VALUES (?, ?, ?)",
-        engines
-    )
-
-    # Ersatzteile für Motoren
-    spare_parts = [
-        (1, "Glücksrad", "Ein Rad, das angeblich Pannen abwehrt."),
-        (1, "Lachschelle", "Wird eingesetzt, wenn der Motor zu ernst wird."),
-        (2, "Witzzylinder", "Ersetzt defekte Zylinder und sorgt für extra Humor.")
-    ]
-    cursor.executemany(
-        "INSERT INTO spare_parts (engine_id, part_name, description) VALUES (?, ?, ?)",
-        spare_parts
-    )
-
-    # Wartungen
-    maintenance = [
-        (1, "2023-02-20", "Regelmäßige Wartung mit Ölwechsel und Lachtests."),
-        (2, "2023-07-15", "Wartung und Nachjustierung der Schmunzelfunktionen.")
-    ]
-    cursor.executemany(
-        "INSERT INTO maintenance (engine_id, maintenance_date, description) VALUES (?, ?, ?)",
-        maintenance
-    )
-
-    conn.commit()
-    conn.close()
-    print("Weitere Referenzdaten (Mitarbeiter, Motoren, Ersatzteile, Wartungen) wurden initialisiert!")
-
-def generate_incidents():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-
-    # Hole alle Anlagenteile (ID und Name)
-    cursor.execute("SELECT id, part_name FROM plant_parts")
-    plant_parts = cursor.fetchall()  # Liste von (id, part_name)
-    if not plant_parts:
-        print("Keine Anlagenteile gefunden, um Pannen zu generieren.")
-        conn.close()
-        return
-
-    # Erstelle eine gewichtete Liste zur Auswahl von Anlagenteilen.
-    weighted_parts = []
-    for part in plant_parts:
-        part_id, part_name = part
-        weight = 2
-        if "kaffeemaschine" in part_name.lower():
-            weight = 5  # Kaffeemaschine häufiger
-        elif "keksomat" in part_name.lower():
-            weight = 1  # Keksomat seltener
-        weighted_parts.extend([part_id] * weight)
-
-    # Schichtplan:
-    # Montag bis Freitag: Früh, Mittag, Nacht
-    # Samstag: nur Früh (ab Mittag frei)
-    # Sonntag: frei
-    shifts = {
-        0: ["Früh", "Mittag", "Nacht"],
-        1: ["Früh", "Mittag", "Nacht"],
-        2: ["Früh", "Mittag", "Nacht"],
-        3: ["Früh", "Mittag", "Nacht"],
-        4: ["Früh", "Mittag", "Nacht"],
-        5: ["Früh"],
-        6: []
-    }
-
-    # Erzeuge Pannen-Daten für jeden Tag im Jahr 2023
-    start_date = datetime(2023, 1, 1)
-    end_date = datetime(2023, 12, 31)
-    current_date = start_date
-
-    incidents_inserted = 0
-
-    while current_date <= end_date:
-        weekday = current_date.weekday()  # Montag=0, Sonntag=6
-        active_shifts = shifts.get(weekday, [])
-        for shift in active_shifts:
-            # Pro Schicht 3 bis 5 Einträge
-            num_incidents = random.randint(3, 5)
-            for _ in range(num_incidents):
-                plant_part_id = random.choice(weighted_parts)
-                # Hole den Teilnamen für individuelle Ursachenbeschreibung
-                cursor.execute("SELECT part_name FROM plant_parts WHERE id = ?", (plant_part_id,))
-                part_name = cursor.fetchone()[0].lower()
-                if "kaffeemaschine" in part_name:
-                    cause = "Kaffeemaschine kaputt"
-                    description = "Die Kaffeemaschine produzierte zu wenig Kaffee – Notfall am Morgen!"
-                elif "keksomat" in part_name:
-                    cause = "Keksomat defekt"
-                    description = "Der Keksomat blieb länger aus – die Kekse mussten warten."
-                else:
-                    cause = "Allgemeiner Defekt"
-                    description = "Ein unerwarteter Fehler störte den Betrieb."
-                incident_date = current_date.strftime("%Y-%m-%d")
-                cursor.execute(
-                    "INSERT INTO incidents (plant_part_id, incident_date, shift, cause, description) VALUES (?, ?, ?, ?, ?)",
-                    (plant_part_id, incident_date, shift, cause, description)
-                )
-                incidents_inserted += 1
-        current_date += timedelta(days=1)
-
-    conn.commit()
-    conn.close()
-    print(f"Demodaten für Pannen wurden erfolgreich generiert ({incidents_inserted} Einträge)!")
-
-def main():
-    create_tables()
-    create_config_excel()
-    import_config_data()
-    init_other_reference_data()
-    generate_incidents()
-    print("Alle Daten wurden erfolgreich befüllt!")
-
-if __name__ == "__main__":
-    main()
-
+﻿#!/usr/bin/env python3
+import sqlite3
+import argparse
+import logging
+import time
+import pandas as pd
+import numpy as np
+import os
+from db_connection import configure_connection
+from massenimport import secondary_indexes, suspend_aenderungen, restore_aenderungen
+from migrations import apply_migrations, PANNEN_FTS_TRIGGER_V8
+
+DB_FILE = "factory_demo.db"
+PANNEN_DB_FILE = "instandhaltung_test.db"
+CONFIG_FILE = "konfiguration_demo.xlsx"
+
+# Schichtplan: Montag bis Freitag Früh, Mittag, Nacht; Samstag nur Früh; Sonntag frei
+SCHICHTEN = ["Früh", "Mittag", "Nacht"]
+SCHICHTEN_JE_WOCHENTAG = np.array([3, 3, 3, 3, 3, 1, 0])
+
+# Ursache und Beschreibung je Teilekategorie; die Gewichte bestimmen, wie oft
+# ein Teil der Kategorie ausfällt (Kaffeemaschine häufiger, Keksomat seltener)
+KATEGORIEN = [
+    ("Allgemeiner Defekt", "Ein unerwarteter Fehler störte den Betrieb.", 2),
+    ("Kaffeemaschine kaputt", "Die Kaffeemaschine produzierte zu wenig Kaffee – Notfall am Morgen!", 5),
+    ("Keksomat defekt", "Der Keksomat blieb länger aus – die Kekse mussten warten.", 1),
+]
+
+MITARBEITER = [
+    ("Ford Prefect", "Außerirdischer Berater", "Bringt galaktischen Humor in den Betrieb."),
+    ("Arthur Dent", "Techniker", "Trotzt Pannen mit einem Handtuch und Gelassenheit."),
+    ("Zaphod Beeblebrox", "Geschäftsführer", "Führt die Fabrik mit doppeltem Kopf und unkonventionellen Ideen."),
+]
+
+def create_tables(db_file=DB_FILE):
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    # Tabelle für Fabriken
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS factories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT
+        )
+    ''')
+
+    # Tabelle für Abteilungen (departments) – jede Abteilung gehört zu einer Fabrik
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS departments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            factory_id INTEGER,
+            name TEXT NOT NULL,
+            description TEXT,
+            FOREIGN KEY (factory_id) REFERENCES factories(id)
+        )
+    ''')
+
+    # Tabelle für Anlagen – jede Anlage gehört zu einer Abteilung
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS plants (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            department_id INTEGER,
+            name TEXT NOT NULL,
+            description TEXT,
+            FOREIGN KEY (department_id) REFERENCES departments(id)
+        )
+    ''')
+
+    # Tabelle für Anlagenteile – jedes Teil gehört zu einer Anlage
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS plant_parts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            plant_id INTEGER,
+            part_name TEXT,
+            description TEXT,
+            FOREIGN KEY (plant_id) REFERENCES plants(id)
+        )
+    ''')
+
+    # Tabelle für Pannen/Unfälle – hier wird auch der Schichttyp (Früh, Mittag, Nacht) festgehalten
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            plant_part_id INTEGER,
+            incident_date TEXT,
+            shift TEXT,
+            cause TEXT,
+            description TEXT,
+            FOREIGN KEY (plant_part_id) REFERENCES plant_parts(id)
+        )
+    ''')
+
+    # Zusätzliche Tabellen für Motoren, Ersatzteile, Wartungen und Mitarbeiter (für humorvolle Demonstrationen)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS engines (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            serial_number TEXT,
+            model TEXT,
+            description TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS spare_parts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            engine_id INTEGER,
+            part_name TEXT,
+            description TEXT,
+            FOREIGN KEY (engine_id) REFERENCES engines(id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS maintenance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            engine_id INTEGER,
+            maintenance_date TEXT,
+            description TEXT,
+            FOREIGN KEY (engine_id) REFERENCES engines(id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS employees (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            role TEXT,
+            description TEXT
+        )
+    ''')
+
+    conn.commit()
+    conn.close()
+    print("Tabellen erfolgreich erstellt!")
+
+def create_config_excel(config_file=CONFIG_FILE):
+    # Falls die Konfigurationsdatei noch nicht existiert, wird sie hier erzeugt.
+    if not os.path.exists(config_file):
+        # Abteilungen
+        departments_df = pd.DataFrame({
+            "name": ["Kaffee & Co", "Keks- und Backstube", "Schmunzeltechnik"],
+            "description": [
+                "Zuständig für den koffeinhaltigen Betrieb.",
+                "Hier werden Keksomat und Backwaren produziert.",
+                "Innovative Technik mit einem Augenzwinkern."
+            ]
+        })
+
+        # Anlagen – mit Zuordnung zur Abteilung über den Namen der Abteilung
+        plants_df = pd.DataFrame({
+            "department": ["Kaffee & Co", "Kaffee & Co",
+                           "Keks- und Backstube", "Keks- und Backstube", "Keks- und Backstube",
+                           "Schmunzeltechnik", "Schmunzeltechnik"],
+            "name": ["Bohnenzauber", "Espresso-Express",
+                     "Keksfabrik", "Teigtraum", "Ofenzauber",
+                     "Lachlabor", "Witzwerkstatt"],
+            "description": [
+                "Erzeugt magischen Kaffeegenuss.",
+                "Schnellster Espresso-Service in der Galaxie.",
+                "Hier rollen die Kekse vom Band.",
+                "Wo Teigträume Wirklichkeit werden.",
+                "Magische Wärme für perfekte Backkunst.",
+                "Testlabor für humorvolle Innovationen.",
+                "Hier werden die besten Gags geschmiedet."
+            ]
+        })
+
+        # Anlagenteile – mit Zuordnung zur Anlage über den Anlagennamen
+        plant_parts_data = [
+            # Für Bohnenzauber
+            {"plant": "Bohnenzauber", "part_name": "Kaffeemaschine", "description": "Bereitet perfekten Kaffee zu, wenn sie nicht streikt."},
+            {"plant": "Bohnenzauber", "part_name": "Mahlwerk", "description": "Mahlt die Bohnen mit Präzision und einem Hauch Magie."},
+            {"plant": "Bohnenzauber", "part_name": "Dampfboiler", "description": "Versorgt die Anlage mit Dampf – manchmal zu humorvoll."},
+            # Für Espresso-Express
+            {"plant": "Espresso-Express", "part_name": "Espressomaschine", "description": "Brüht Espresso so schnell, dass man kaum blinzelt."},
+            {"plant": "Espresso-Express", "part_name": "Wasserpumpe", "description": "Sorgt für den nötigen Wasserschub."},
+            {"plant": "Espresso-Express", "part_name": "Kaffeezähler", "description": "Zählt die Tassen, damit niemand zu wenig Kaffee bekommt."},
+            # Für Keksfabrik
+            {"plant": "Keksfabrik", "part_name": "Keksomat", "description": "Automatischer Keksproduzent, anfällig für klebrige Situationen."},
+            {"plant": "Keksfabrik", "part_name": "Backofen", "description": "Hält die Kekse warm, wenn die Maschine versagt."},
+            {"plant": "Keksfabrik", "part_name": "Teigmischer", "description": "Vermischt Zutaten mit viel Liebe (und Überraschungen)."},
+            # Für Teigtraum
+            {"plant": "Teigtraum", "part_name": "Keksomat", "description": "Erzeugt Kekse in hoher Geschwindigkeit – wenn er mal funktioniert."},
+            {"plant": "Teigtraum", "part_name": "FlourMatic", "description": "Automatisiert das Mehl-Zuführen mit einem Hauch von Poesie."},
+            {"plant": "Teigtraum", "part_name": "OfenX", "description": "Hält den Teig in Schach – meistens."},
+            # Für Ofenzauber
+            {"plant": "Ofenzauber", "part_name": "Backofen", "description": "Der Ofen, der immer warmherzig ist."},
+            {"plant": "Ofenzauber", "part_name": "Keksautomat", "description": "Gibt Kekse aus, aber nur, wenn er in Stimmung ist."},
+            # Für Lachlabor
+            {"plant": "Lachlabor", "part_name": "Spaßgenerator", "description": "Erzeugt Lacher in regelmäßigen Abständen."},
+            {"plant": "Lachlabor", "part_name": "Witzchip", "description": "Klein, aber oho – der Witzchip."},
+            {"plant": "Lachlabor", "part_name": "Humorhub", "description": "Das Herzstück des Lachens."},
+            # Für Witzwerkstatt
+            {"plant": "Witzwerkstatt", "part_name": "Lachmaschine", "description": "Lacht, wenn es sein soll, und manchmal auch von selbst."},
+            {"plant": "Witzwerkstatt", "part_name": "Gag-Modul", "description": "Ausgestattet mit den besten Gags der Branche."},
+            {"plant": "Witzwerkstatt", "part_name": "Schmunzelheizung", "description": "Hält die Stimmung warm, selbst bei Kälte."},
+        ]
+        plant_parts_df = pd.DataFrame(plant_parts_data)
+
+        # Schreibe die Daten in eine Excel-Datei mit mehreren Sheets
+        with pd.ExcelWriter(config_file) as writer:
+            departments_df.to_excel(writer, sheet_name="departments", index=False)
+            plants_df.to_excel(writer, sheet_name="plants", index=False)
+            plant_parts_df.to_excel(writer, sheet_name="plant_parts", index=False)
+
+        print(f"Konfigurationsdatei '{config_file}' wurde erstellt.")
+    else:
+        print(f"Konfigurationsdatei '{config_file}' existiert bereits.")
+
+def _teil_kategorie(part_name):
+    name = part_name.lower()
+    if "kaffeemaschine" in name:
+        return 1
+    if "keksomat" in name:
+        return 2
+    return 0
+
+def _namen(vorlage, anzahl):
+    """Namen aus der Vorlage; ab der zweiten Runde mit laufender Nummer."""
+    return [vorlage[i % len(vorlage)] + ("" if i < len(vorlage) else f" {i // len(vorlage) + 1}")
+            for i in range(anzahl)]
+
+def load_config(config_file=CONFIG_FILE):
+    """Liest die Vorlage (Abteilungen, Anlagen, Anlagenteile) aus der Konfigurationsdatei."""
+    xls = pd.ExcelFile(config_file)
+    departments = pd.read_excel(xls, "departments").to_dict("records")
+    plants = pd.read_excel(xls, "plants").to_dict("records")
+    parts = pd.read_excel(xls, "plant_parts").to_dict("records")
+    return departments, plants, parts
+
+def build_hierarchy(fabriken=1, abteilungen=None, anlagen=None, teile=None, config_file=CONFIG_FILE):
+    """
+    Baut aus der Vorlage die Hierarchie Fabrik -> Abteilung -> Anlage -> Teil.
+    Ohne Anzahl gilt die Zuordnung der Vorlage, mit Anzahl werden die Namen
+    der Vorlage reihum (und nummeriert) vergeben.
+    Liefert [(fabrik, [(abteilung, beschreibung, [(anlage, beschreibung, [(teil, beschreibung)])])])].
+    """
+    departments, plants, parts = load_config(config_file)
+    hierarchie = []
+    for f in range(fabriken):
+        fabrik = "Fabrik Fantasia" if f == 0 else f"Fabrik Fantasia {f + 1}"
+        if abteilungen is None:
+            abt_liste = [(d["name"], d["description"]) for d in departments]
+        else:
+            abt_liste = list(zip(_namen([d["name"] for d in departments], abteilungen),
+                                 _namen([d["description"] for d in departments], abteilungen)))
+        abt_eintraege = []
+        for a, (abt_name, abt_beschreibung) in enumerate(abt_liste):
+            if anlagen is None:
+                # Zuordnung über den Namen der Vorlage (ohne laufende Nummer)
+                vorlage_abt = departments[a % len(departments)]["name"]
+                anl_liste = [(p["name"], p["description"]) for p in plants if p["department"] == vorlage_abt]
+            else:
+                anl_liste = list(zip(_namen([p["name"] for p in plants], anlagen),
+                                     _namen([p["description"] for p in plants], anlagen)))
+            anl_eintraege = []
+            for n, (anl_name, anl_beschreibung) in enumerate(anl_liste):
+                if teile is None:
+                    vorlage_anl = anl_name if anlagen is None else plants[n % len(plants)]["name"]
+                    teil_liste = [(t["part_name"], t["description"]) for t in parts if t["plant"] == vorlage_anl]
+                else:
+                    teil_liste = list(zip(_namen([t["part_name"] for t in parts], teile),
+                                          [parts[i % len(parts)]["description"] for i in range(teile)]))
+                anl_eintraege.append((anl_name, anl_beschreibung, teil_liste))
+            abt_eintraege.append((abt_name, abt_beschreibung, anl_eintraege))
+        hierarchie.append((fabrik, abt_eintraege))
+    return hierarchie
+
+class Teile:
+    """Alle erzeugten Anlagenteile als Arrays; je Fabrik die Indizes und Ausfallwahrscheinlichkeiten."""
+
+    def __init__(self):
+        self.ids = []
+        self.kategorien = []
+        self.anlage_ids = []
+        self.abteilung_ids = []
+        self.je_fabrik = []
+
+    def add_fabrik(self, teile):
+        """teile: [(teil_id, teilname, anlage_id, abteilung_id)]"""
+        start = len(self.ids)
+        for teil_id, name, anlage_id, abteilung_id in teile:
+            self.ids.append(teil_id)
+            self.kategorien.append(_teil_kategorie(name))
+            self.anlage_ids.append(anlage_id)
+            self.abteilung_ids.append(abteilung_id)
+        if teile:
+            indizes = np.arange(start, len(self.ids))
+            gewichte = np.array([KATEGORIEN[self.kategorien[i]][2] for i in indizes], dtype=float)
+            self.je_fabrik.append((indizes, gewichte / gewichte.sum()))
+
+    def arrays(self):
+        self.ids = np.array(self.ids)
+        self.kategorien = np.array(self.kategorien)
+        self.anlage_ids = np.array(self.anlage_ids)
+        self.abteilung_ids = np.array(self.abteilung_ids)
+        return self
+
+def import_config_data(db_file=DB_FILE, fabriken=1, abteilungen=None, anlagen=None, teile=None):
+    """Schreibt die Hierarchie in die Demo-Tabellen; liefert die erzeugten Teile."""
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+    erzeugt = Teile()
+    for fabrik, abt_eintraege in build_hierarchy(fabriken, abteilungen, anlagen, teile):
+        cursor.execute(
+            "INSERT INTO factories (name, description) VALUES (?, ?)",
+            (fabrik, "Eine fantastische Fabrik, in der Humor und Technik aufeinandertreffen.")
+        )
+        factory_id = cursor.lastrowid
+        fabrik_teile = []
+        for abt_name, abt_beschreibung, anl_eintraege in abt_eintraege:
+            cursor.execute(
+                "INSERT INTO departments (factory_id, name, description) VALUES (?, ?, ?)",
+                (factory_id, abt_name, abt_beschreibung)
+            )
+            dep_id = cursor.lastrowid
+            for anl_name, anl_beschreibung, teil_liste in anl_eintraege:
+                cursor.execute(
+                    "INSERT INTO plants (department_id, name, description) VALUES (?, ?, ?)",
+                    (dep_id, anl_name, anl_beschreibung)
+                )
+                plant_id = cursor.lastrowid
+                for part_name, part_beschreibung in teil_liste:
+                    cursor.execute(
+                        "INSERT INTO plant_parts (plant_id, part_name, description) VALUES (?, ?, ?)",
+                        (plant_id, part_name, part_beschreibung)
+                    )
+                    fabrik_teile.append((cursor.lastrowid, part_name, plant_id, dep_id))
+        erzeugt.add_fabrik(fabrik_teile)
+
+    conn.commit()
+    conn.close()
+    print(f"Konfigurationsdaten aus Excel erfolgreich importiert ({len(erzeugt.ids)} Anlagenteile)!")
+    return erzeugt.arrays()
+
+def init_other_reference_data(db_file=DB_FILE):
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    # Mitarbeiter
+    cursor.executemany(
+        "INSERT INTO employees (name, role, description) VALUES (?, ?, ?)",
+        MITARBEITER
+    )
+    # Motoren
+    engines = [
+        ("ENG-001", "Turbo-Lachmotor", "Antreibt nicht nur, sondern sorgt auch für unerwartete Lacher."),
+        ("ENG-002", "Super-Schmunzel 3000", "Bekannt für charmante Geräusche beim Anlaufen.")
+    ]
+    cursor.executemany(
+        "INSERT INTO engines (serial_number, model, description) VALUES (?, ?, ?)",
+        engines
+    )
+
+    # Ersatzteile für Motoren
+    spare_parts = [
+        (1, "Glücksrad", "Ein Rad, das angeblich Pannen abwehrt."),
+        (1, "Lachschelle", "Wird eingesetzt, wenn der Motor zu ernst wird."),
+        (2, "Witzzylinder", "Ersetzt defekte Zylinder und sorgt für extra Humor.")
+    ]
+    cursor.executemany(
+        "INSERT INTO spare_parts (engine_id, part_name, description) VALUES (?, ?, ?)",
+        spare_parts
+    )
+
+    # Wartungen
+    maintenance = [
+        (1, "2023-02-20", "Regelmäßige Wartung mit Ölwechsel und Lachtests."),
+        (2, "2023-07-15", "Wartung und Nachjustierung der Schmunzelfunktionen.")
+    ]
+    cursor.executemany(
+        "INSERT INTO maintenance (engine_id, maintenance_date, description) VALUES (?, ?, ?)",
+        maintenance
+    )
+
+    conn.commit()
+    conn.close()
+    print("Weitere Referenzdaten (Mitarbeiter, Motoren, Ersatzteile, Wartungen) wurden initialisiert!")
+
+def incident_blocks(rng, teile, start_jahr=2023, jahre=1, pro_schicht=(3, 5), block_tage=31):
+    """
+    Erzeugt Pannen vektorisiert in Blöcken von block_tage Tagen. Je Fabrik und
+    Schicht werden pro_schicht (min, max) Pannen gezogen, die Anlagenteile nach
+    den Gewichten ihrer Kategorie. Liefert je Block (datum, schicht, teil_index)
+    für alle Fabriken als Arrays; teil_index verweist in teile.
+    """
+    start = np.datetime64(f"{start_jahr}-01-01")
+    ende = np.datetime64(f"{start_jahr + jahre}-01-01")
+    for block_start in np.arange(start, ende, np.timedelta64(block_tage, "D")):
+        tage = np.arange(block_start, min(block_start + np.timedelta64(block_tage, "D"), ende))
+        # 1970-01-01 war ein Donnerstag; Montag = 0
+        schichten_am_tag = SCHICHTEN_JE_WOCHENTAG[(tage.astype(np.int64) + 3) % 7]
+        slot_tag = np.repeat(np.arange(len(tage)), schichten_am_tag)
+        slot_schicht = np.arange(len(slot_tag)) - np.repeat(np.cumsum(schichten_am_tag) - schichten_am_tag,
+                                                            schichten_am_tag)
+        datum_text = np.array(np.datetime_as_string(tage), dtype=object)
+        tage_alle, schichten_alle, teile_alle = [], [], []
+        for indizes, wahrscheinlichkeiten in teile.je_fabrik:
+            anzahl = rng.integers(pro_schicht[0], pro_schicht[1] + 1, size=len(slot_tag))
+            tage_alle.append(np.repeat(slot_tag, anzahl))
+            schichten_alle.append(np.repeat(slot_schicht, anzahl))
+            teile_alle.append(indizes[rng.choice(len(indizes), size=len(tage_alle[-1]), p=wahrscheinlichkeiten)])
+        if teile_alle:
+            yield datum_text[np.concatenate(tage_alle)], np.concatenate(schichten_alle), np.concatenate(teile_alle)
+
+def generate_incidents(db_file=DB_FILE, teile=None, seed=None, start_jahr=2023, jahre=1, pro_schicht=(3, 5)):
+    """Schreibt die Pannen in die Demo-Tabelle incidents (executemany, eine Transaktion je Block)."""
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA synchronous = OFF")
+    if teile is None:
+        teile = Teile()
+        teile.add_fabrik([(part_id, name, None, None) for part_id, name in
+                          conn.execute("SELECT id, part_name FROM plant_parts")])
+        teile.arrays()
+    if not len(teile.ids):
+        print("Keine Anlagenteile gefunden, um Pannen zu generieren.")
+        conn.close()
+        return 0
+
+    rng = np.random.default_rng(seed)
+    schicht_namen = np.array(SCHICHTEN, dtype=object)
+    ursachen = np.array([k[0] for k in KATEGORIEN], dtype=object)
+    beschreibungen = np.array([k[1] for k in KATEGORIEN], dtype=object)
+    incidents_inserted = 0
+    start = time.perf_counter()
+    for datum, schicht, teil in incident_blocks(rng, teile, start_jahr, jahre, pro_schicht):
+        kategorie = teile.kategorien[teil]
+        with conn:
+            conn.executemany(
+                "INSERT INTO incidents (plant_part_id, incident_date, shift, cause, description) VALUES (?, ?, ?, ?, ?)",
+                zip(teile.ids[teil].tolist(), datum.tolist(), schicht_namen[schicht].tolist(),
+                    ursachen[kategorie].tolist(), beschreibungen[kategorie].tolist())
+            )
+        incidents_inserted += len(teil)
+    conn.close()
+    dauer = time.perf_counter() - start
+    print(f"Demodaten für Pannen wurden erfolgreich generiert ({incidents_inserted} Einträge, "
+          f"{incidents_inserted / max(dauer, 1e-9):.0f} Zeilen/s)!")
+    return incidents_inserted
+
+def generate_pannen(db_file=PANNEN_DB_FILE, seed=None, start_jahr=2023, jahre=1, pro_schicht=(3, 5),
+                    fabriken=1, abteilungen=None, anlagen=None, teile=None, config_file=CONFIG_FILE):
+    """
+    Erzeugt Pannen im Produktionsschema (pannen_daten mit Referenz- und
+    Nachschlagetabellen). Die Hierarchie kommt aus derselben Vorlage; bei
+    mehreren Fabriken wird der Fabrikname dem Abteilungsnamen vorangestellt.
+    Während des Ladens sind Sekundärindizes und der Volltext-Trigger entfernt,
+    am Ende werden sie neu aufgebaut.
+    """
+    conn = sqlite3.connect(db_file)
+    configure_connection(conn)
+    apply_migrations(conn)
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -262144")
+    rng = np.random.default_rng(seed)
+
+    erzeugt = Teile()
+    with conn:
+        for fabrik, abt_eintraege in build_hierarchy(fabriken, abteilungen, anlagen, teile, config_file):
+            fabrik_teile = []
+            for abt_name, _, anl_eintraege in abt_eintraege:
+                name = abt_name if fabriken == 1 else f"{fabrik} / {abt_name}"
+                conn.execute("INSERT OR IGNORE INTO abteilungen (name) VALUES (?)", (name,))
+                abt_id = conn.execute("SELECT abteilung_id FROM abteilungen WHERE name = ?", (name,)).fetchone()[0]
+                for anl_name, _, teil_liste in anl_eintraege:
+                    anlage_id = conn.execute("INSERT INTO anlagen (abteilung_id, name) VALUES (?, ?)",
+                                             (abt_id, anl_name)).lastrowid
+                    for part_name, _ in teil_liste:
+                        teil_id = conn.execute("INSERT INTO anlagenteile (anlage_id, name) VALUES (?, ?)",
+                                               (anlage_id, part_name)).lastrowid
+                        fabrik_teile.append((teil_id, part_name, anlage_id, abt_id))
+            erzeugt.add_fabrik(fabrik_teile)
+        erzeugt.arrays()
+
+        def nachschlagen(tabelle, namen):
+            conn.executemany(f"INSERT OR IGNORE INTO {tabelle} (name) VALUES (?)", [(n,) for n in namen])
+            ids = dict(conn.execute(f"SELECT name, id FROM {tabelle}"))
+            return np.array([ids[n] for n in namen])
+
+        schicht_ids = nachschlagen("schichten", SCHICHTEN)
+        kategorie_ids = nachschlagen("fehlerkategorien", [k[0] for k in KATEGORIEN])
+        ursache_ids = nachschlagen("fehlerursachen", [k[0] for k in KATEGORIEN])
+        melder_ids = nachschlagen("melder", [m[0] for m in MITARBEITER])
+
+    beschreibungen = np.array([k[1] for k in KATEGORIEN], dtype=object)
+    indexes = secondary_indexes(conn, "pannen_daten")
+    with conn:
+        conn.execute("DROP TRIGGER IF EXISTS pannen_fts_ai")
+        # Generierte Zeilen nicht einzeln ins Änderungsprotokoll schreiben
+        aenderungen = suspend_aenderungen(conn, "pannen_daten")
+        for index_name, _ in indexes:
+            conn.execute(f"DROP INDEX {index_name}")
+    pannen = 0
+    start = time.perf_counter()
+    try:
+        for datum, schicht, teil in incident_blocks(rng, erzeugt, start_jahr, jahre, pro_schicht):
+            kategorie = erzeugt.kategorien[teil]
+            anzahl = len(teil)
+            with conn:
+                conn.executemany("""
+                    INSERT INTO pannen_daten
+                        (datum, schicht_id, abteilung_id, anlage_id, anlagenteil_id, beschreibung,
+                         fehlerkategorie_id, fehlerursache_id, ausfallzeit, prioritaet, melder_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, zip(datum.tolist(), schicht_ids[schicht].tolist(), erzeugt.abteilung_ids[teil].tolist(),
+                         erzeugt.anlage_ids[teil].tolist(), erzeugt.ids[teil].tolist(),
+                         beschreibungen[kategorie].tolist(), kategorie_ids[kategorie].tolist(),
+                         ursache_ids[kategorie].tolist(), rng.integers(5, 240, size=anzahl).tolist(),
+                         rng.integers(1, 6, size=anzahl).tolist(),
+                         melder_ids[rng.integers(0, len(melder_ids), size=anzahl)].tolist()))
+            pannen += anzahl
+    finally:
+        # Indizes, Volltextindex und Trigger auch nach einem Abbruch wiederherstellen
+        logging.info("Baue Indizes und Volltextindex neu auf ...")
+        with conn:
+            for _, index_sql in indexes:
+                conn.execute(index_sql)
+            conn.execute("INSERT INTO pannen_fts (pannen_fts) VALUES ('rebuild')")
+            conn.execute(PANNEN_FTS_TRIGGER_V8[0])
+            if aenderungen:
+                restore_aenderungen(conn, aenderungen)
+        conn.execute("PRAGMA optimize")
+        conn.close()
+    dauer = time.perf_counter() - start
+    print(f"{pannen} Pannen in '{db_file}' erzeugt ({pannen / max(dauer, 1e-9):.0f} Zeilen/s inkl. Indexaufbau).")
+    return pannen
+
+def _bereich(text):
+    minimum, _, maximum = text.partition("-")
+    return int(minimum), int(maximum or minimum)
+
+def main():
+    parser = argparse.ArgumentParser(description="Erzeugt Demo- und Lasttestdaten.")
+    parser.add_argument("--ziel", choices=["demo", "pannen"], default="demo",
+                        help="demo: Demo-Tabellen; pannen: Produktionsschema (pannen_daten)")
+    parser.add_argument("--db", help=f"Zieldatenbank (Standard: {DB_FILE} bzw. {PANNEN_DB_FILE})")
+    parser.add_argument("--seed", type=int, help="Startwert des Zufallsgenerators (reproduzierbare Daten)")
+    parser.add_argument("--start-jahr", type=int, default=2023)
+    parser.add_argument("--jahre", type=int, default=1)
+    parser.add_argument("--fabriken", type=int, default=1)
+    parser.add_argument("--abteilungen", type=int, help="Abteilungen je Fabrik (Standard: Vorlage)")
+    parser.add_argument("--anlagen", type=int, help="Anlagen je Abteilung (Standard: Vorlage)")
+    parser.add_argument("--teile", type=int, help="Anlagenteile je Anlage (Standard: Vorlage)")
+    parser.add_argument("--pannen-pro-schicht", type=_bereich, default=(3, 5), metavar="MIN-MAX")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+
+    create_config_excel()
+    if args.ziel == "pannen":
+        generate_pannen(args.db or PANNEN_DB_FILE, args.seed, args.start_jahr, args.jahre, args.pannen_pro_schicht,
+                        args.fabriken, args.abteilungen, args.anlagen, args.teile)
+        return
+    db_file = args.db or DB_FILE
+    create_tables(db_file)
+    teile = import_config_data(db_file, args.fabriken, args.abteilungen, args.anlagen, args.teile)
+    init_other_reference_data(db_file)
+    generate_incidents(db_file, teile, args.seed, args.start_jahr, args.jahre, args.pannen_pro_schicht)
+    print("Alle Daten wurden erfolgreich befüllt!")
+
+if __name__ == "__main__":
+    main()
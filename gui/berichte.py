@@ -1,128 +1,240 @@
-﻿import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-import datetime
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from repository import PannenRepository
-
-class BerichteFenster(tk.Toplevel):
-    def __init__(self, master=None):
-        super().__init__(master)
-        self.title("Berichte")
-        self.geometry("1000x700")
-        self.repo = PannenRepository()
-        self.create_widgets()
-        self.load_filter_data()
-
-    def create_widgets(self):
-        # Filterbereich
-        filter_frame = ttk.LabelFrame(self, text="Filter", padding=10)
-        filter_frame.pack(fill=tk.X, padx=10, pady=10)
-
-        ttk.Label(filter_frame, text="Abteilung:").grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
-        self.abteilung_cb = ttk.Combobox(filter_frame, state="readonly")
-        self.abteilung_cb.grid(row=0, column=1, padx=5, pady=5)
-
-        ttk.Label(filter_frame, text="Anlage:").grid(row=0, column=2, padx=5, pady=5, sticky=tk.W)
-        self.anlage_cb = ttk.Combobox(filter_frame, state="readonly")
-        self.anlage_cb.grid(row=0, column=3, padx=5, pady=5)
-
-        ttk.Label(filter_frame, text="Startdatum (YYYY-MM-DD):").grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
-        self.start_date_entry = ttk.Entry(filter_frame, width=15)
-        self.start_date_entry.grid(row=1, column=1, padx=5, pady=5)
-
-        ttk.Label(filter_frame, text="Enddatum (YYYY-MM-DD):").grid(row=1, column=2, padx=5, pady=5, sticky=tk.W)
-        self.end_date_entry = ttk.Entry(filter_frame, width=15)
-        self.end_date_entry.grid(row=1, column=3, padx=5, pady=5)
-
-        today = datetime.date.today()
-        self.start_date_entry.insert(0, today.replace(day=1).strftime("%Y-%m-%d"))
-        self.end_date_entry.insert(0, today.strftime("%Y-%m-%d"))
-
-        btn_filter = ttk.Button(filter_frame, text="Filter anwenden", command=self.apply_filters)
-        btn_filter.grid(row=2, column=0, columnspan=4, pady=10)
-
-        # Vorschau der gefilterten Daten
-        self.tree = ttk.Treeview(self, columns=("id", "abteilung", "anlage", "datum", "beschreibung"), show="headings")
-        self.tree.heading("id", text="ID")
-        self.tree.heading("abteilung", text="Abteilung")
-        self.tree.heading("anlage", text="Anlage")
-        self.tree.heading("datum", text="Datum")
-        self.tree.heading("beschreibung", text="Beschreibung")
-        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        # Buttons für Export und Diagramme
-        btn_frame = ttk.Frame(self)
-        btn_frame.pack(fill=tk.X, padx=10, pady=10)
-        btn_export = ttk.Button(btn_frame, text="Exportieren", command=self.export_data)
-        btn_export.pack(side=tk.LEFT, padx=5)
-        btn_chart = ttk.Button(btn_frame, text="Diagramme anzeigen", command=self.show_charts)
-        btn_chart.pack(side=tk.LEFT, padx=5)
-
-    def load_filter_data(self):
-        abteilungen = self.repo.get_abteilungen()
-        self.abteilung_cb['values'] = [""] + abteilungen
-        self.abteilung_cb.current(0)
-        anlagen = self.repo.get_anlagen()
-        self.anlage_cb['values'] = [""] + anlagen
-        self.anlage_cb.current(0)
-
-    def apply_filters(self):
-        abteilung = self.abteilung_cb.get().strip()
-        anlage = self.anlage_cb.get().strip()
-        start_date = self.start_date_entry.get().strip()
-        end_date = self.end_date_entry.get().strip()
-
-        rows = self.repo.get_filtered_pannen(abteilung, anlage, start_date, end_date)
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        for row in rows:
-            self.tree.insert("", tk.END, values=row)
-
-    def export_data(self):
-        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Dateien", "*.csv")])
-        if not file_path:
-            return
-
-        data = []
-        for child in self.tree.get_children():
-            data.append(self.tree.item(child)['values'])
-
-        try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write("ID,Abteilung,Anlage,Datum,Beschreibung\n")
-                for row in data:
-                    line = ",".join([str(item) for item in row])
-                    f.write(line + "\n")
-            messagebox.showinfo("Export", f"Daten wurden erfolgreich exportiert nach:\n{file_path}")
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Export fehlgeschlagen: {e}")
-
-    def show_charts(self):
-        result = self.repo.get_pannen_counts_by_abteilung()
-        abteilungen = [row[0] for row in result]
-        counts = [row[1] for row in result]
-
-        if not abteilungen:
-            messagebox.showinfo("Diagramme", "Keine Daten für Diagramme vorhanden.")
-            return
-
-        fig, ax = plt.subplots(figsize=(6, 4))
-        ax.bar(abteilungen, counts, color="skyblue")
-        ax.set_title("Anzahl Pannen pro Abteilung")
-        ax.set_xlabel("Abteilung")
-        ax.set_ylabel("Anzahl")
-        plt.xticks(rotation=45, ha="right")
-
-        chart_window = tk.Toplevel(self)
-        chart_window.title("Diagramme")
-        canvas = FigureCanvasTkAgg(fig, master=chart_window)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    root.withdraw()
-    bf = BerichteFenster(root)
-    bf.mainloop()
-
+﻿import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import csv
+import datetime
+import os
+import threading
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from repository import PannenRepository
+from gui.listenansicht import VirtuelleListe, Spaltensortierung, zeilen_anwenden
+from aenderungsfeed import get_aenderungsfeed
+from gui.hintergrund import Hintergrundabfragen
+
+class ExportAbgebrochen(Exception):
+    pass
+
+
+class BerichteFenster(tk.Toplevel):
+    COLUMNS = ["id", "abteilung", "anlage", "datum", "beschreibung"]
+    EXPORT_KOPF = ["ID", "Abteilung", "Anlage", "Datum", "Beschreibung"]
+    FORTSCHRITT_MS = 250
+
+    def __init__(self, master=None):
+        super().__init__(master)
+        self.title("Berichte")
+        self.geometry("1000x700")
+        self.repo = PannenRepository()
+        self.current_filters = {}
+        # Laufender Export: Abbruch-Event und Zähler der geschriebenen Zeilen
+        self.export = None
+        self.create_widgets()
+        get_aenderungsfeed(self.repo.db_path).subscribe("pannen_daten", self.on_aenderungen, widget=self)
+        self.load_filter_data()
+
+    def create_widgets(self):
+        # Filterbereich
+        filter_frame = ttk.LabelFrame(self, text="Filter", padding=10)
+        filter_frame.pack(fill=tk.X, padx=10, pady=10)
+
+        ttk.Label(filter_frame, text="Abteilung:").grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
+        self.abteilung_cb = ttk.Combobox(filter_frame, state="readonly")
+        self.abteilung_cb.grid(row=0, column=1, padx=5, pady=5)
+
+        ttk.Label(filter_frame, text="Anlage:").grid(row=0, column=2, padx=5, pady=5, sticky=tk.W)
+        self.anlage_cb = ttk.Combobox(filter_frame, state="readonly")
+        self.anlage_cb.grid(row=0, column=3, padx=5, pady=5)
+
+        ttk.Label(filter_frame, text="Startdatum (YYYY-MM-DD):").grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
+        self.start_date_entry = ttk.Entry(filter_frame, width=15)
+        self.start_date_entry.grid(row=1, column=1, padx=5, pady=5)
+
+        ttk.Label(filter_frame, text="Enddatum (YYYY-MM-DD):").grid(row=1, column=2, padx=5, pady=5, sticky=tk.W)
+        self.end_date_entry = ttk.Entry(filter_frame, width=15)
+        self.end_date_entry.grid(row=1, column=3, padx=5, pady=5)
+
+        today = datetime.date.today()
+        self.start_date_entry.insert(0, today.replace(day=1).strftime("%Y-%m-%d"))
+        self.end_date_entry.insert(0, today.strftime("%Y-%m-%d"))
+
+        btn_filter = ttk.Button(filter_frame, text="Filter anwenden", command=self.apply_filters)
+        btn_filter.grid(row=2, column=0, columnspan=4, pady=10)
+
+        # Vorschau der gefilterten Daten (seitenweise nachgeladen)
+        tree_frame = ttk.Frame(self)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.tree = ttk.Treeview(tree_frame, columns=("id", "abteilung", "anlage", "datum", "beschreibung"), show="headings")
+        self.tree.heading("id", text="ID")
+        self.tree.heading("abteilung", text="Abteilung")
+        self.tree.heading("anlage", text="Anlage")
+        self.tree.heading("datum", text="Datum")
+        self.tree.heading("beschreibung", text="Beschreibung")
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        self.hintergrund = Hintergrundabfragen(self, self.repo.db_path)
+        self.liste = VirtuelleListe(self.tree, scrollbar=vsb, executor=self.hintergrund, descending=True)
+        self.sortierung = Spaltensortierung(
+            self.tree, {col: col for col in self.COLUMNS if col in self.repo.SORT_COLUMNS}, self.on_sort,
+            sort_column="id", descending=True)
+
+        # Buttons für Export und Diagramme
+        btn_frame = ttk.Frame(self)
+        btn_frame.pack(fill=tk.X, padx=10, pady=10)
+        self.btn_export = ttk.Button(btn_frame, text="Exportieren", command=self.export_data)
+        self.btn_export.pack(side=tk.LEFT, padx=5)
+        btn_chart = ttk.Button(btn_frame, text="Diagramme anzeigen", command=self.show_charts)
+        btn_chart.pack(side=tk.LEFT, padx=5)
+        self.btn_export_abbrechen = ttk.Button(btn_frame, text="Export abbrechen", command=self.cancel_export,
+                                               state="disabled")
+        self.btn_export_abbrechen.pack(side=tk.LEFT, padx=5)
+        self.export_status = ttk.Label(btn_frame, text="")
+        self.export_status.pack(side=tk.LEFT, padx=5)
+
+    def load_filter_data(self):
+        abteilungen = self.repo.get_abteilungen()
+        self.abteilung_cb['values'] = [""] + abteilungen
+        self.abteilung_cb.current(0)
+        anlagen = self.repo.get_anlagen()
+        self.anlage_cb['values'] = [""] + anlagen
+        self.anlage_cb.current(0)
+
+    def apply_filters(self):
+        abteilung = self.abteilung_cb.get().strip()
+        anlage = self.anlage_cb.get().strip()
+        start_date = self.start_date_entry.get().strip()
+        end_date = self.end_date_entry.get().strip()
+
+        filters = {
+            "abteilung": abteilung,
+            "anlage": anlage,
+            "start_date": start_date,
+            "end_date": end_date,
+        }
+        self.current_filters = filters
+        self.show_pannen()
+
+    def show_pannen(self):
+        filters = self.current_filters
+        sortierung = self.sortierung.parameter()
+        self.liste.set_sort(self.COLUMNS.index(sortierung["sort_column"]), sortierung["descending"])
+        self.liste.set_source(lambda **page: self.repo.get_pannen_page(**filters, **sortierung, columns=self.COLUMNS,
+                                                                       **page))
+
+    def on_sort(self):
+        # Vor dem ersten "Filter anwenden" gibt es noch nichts neu zu laden
+        if self.liste.fetch_page is not None:
+            self.show_pannen()
+
+    def on_aenderungen(self, ereignisse):
+        # Neue und geänderte Pannen aus anderen Fenstern zeilenweise übernehmen
+        if self.liste.fetch_page is None:
+            return
+        if ereignisse is None:
+            self.liste.reload()
+            return
+        ids = [ereignis.id for ereignis in ereignisse]
+        filters = self.current_filters
+        self.hintergrund.submit(None, lambda: self.repo.get_pannen_by_ids(ids, **filters, columns=self.COLUMNS),
+                                lambda rows: zeilen_anwenden(self.liste.apply, ids, rows))
+
+    def export_data(self):
+        # Exportiert wird die angezeigte Liste: die zuletzt angewendeten Filter in der
+        # angezeigten Reihenfolge, einschließlich der noch nicht nachgeladenen Seiten
+        if self.liste.fetch_page is None:
+            messagebox.showinfo("Export", "Bitte zuerst \"Filter anwenden\"; exportiert wird die angezeigte Liste.")
+            return
+        if self.export is not None:
+            return
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Dateien", "*.csv")])
+        if not file_path:
+            return
+
+        filters, sortierung = dict(self.current_filters), self.sortierung.parameter()
+        export = {"abbruch": threading.Event(), "zeilen": 0}
+
+        def schreiben():
+            # Läuft im Hintergrund-Thread; ein abgebrochener oder fehlgeschlagener
+            # Export hinterlässt keine halbe Datei
+            rows = self.repo.iter_filtered_pannen(**filters, **sortierung, columns=self.COLUMNS)
+            try:
+                with open(file_path, "w", encoding="utf-8", newline="") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(self.EXPORT_KOPF)
+                    for row in rows:
+                        if export["abbruch"].is_set():
+                            raise ExportAbgebrochen()
+                        writer.writerow(row)
+                        export["zeilen"] += 1
+            except BaseException:
+                rows.close()
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                raise
+            return export["zeilen"]
+
+        def fertig(anzahl):
+            self.export_beendet(f"{anzahl} Zeilen exportiert")
+            messagebox.showinfo("Export", f"{anzahl} Zeilen wurden erfolgreich exportiert nach:\n{file_path}")
+
+        def fehler(e):
+            self.export_beendet("Export fehlgeschlagen")
+            messagebox.showerror("Fehler", f"Export fehlgeschlagen: {e}")
+
+        self.export = export
+        self.btn_export.configure(state="disabled")
+        self.btn_export_abbrechen.configure(state="normal")
+        self.hintergrund.submit("export", schreiben, fertig, on_error=fehler)
+        self.export_fortschritt()
+
+    def export_fortschritt(self):
+        if self.export is None:
+            return
+        self.export_status.configure(text=f"Export läuft: {self.export['zeilen']} Zeilen")
+        self.after(self.FORTSCHRITT_MS, self.export_fortschritt)
+
+    def cancel_export(self):
+        # Abgebrochene Aufträge liefern nichts mehr aus; die Oberfläche räumt hier auf
+        if self.export is None:
+            return
+        self.export["abbruch"].set()
+        self.hintergrund.cancel("export")
+        self.export_beendet("Export abgebrochen")
+
+    def export_beendet(self, text):
+        self.export = None
+        self.btn_export.configure(state="normal")
+        self.btn_export_abbrechen.configure(state="disabled")
+        self.export_status.configure(text=text)
+
+    def show_charts(self):
+        self.hintergrund.submit("diagramm", self.repo.get_pannen_counts_by_abteilung, self.draw_charts,
+                                on_error=lambda e: messagebox.showerror("Fehler", f"Diagramme fehlgeschlagen: {e}"))
+
+    def draw_charts(self, result):
+        abteilungen = [row[0] for row in result]
+        counts = [row[1] for row in result]
+
+        if not abteilungen:
+            messagebox.showinfo("Diagramme", "Keine Daten für Diagramme vorhanden.")
+            return
+
+        fig, ax = plt.subplots(figsize=(6, 4))
+        ax.bar(abteilungen, counts, color="skyblue")
+        ax.set_title("Anzahl Pannen pro Abteilung")
+        ax.set_xlabel("Abteilung")
+        ax.set_ylabel("Anzahl")
+        plt.xticks(rotation=45, ha="right")
+
+        chart_window = tk.Toplevel(self)
+        chart_window.title("Diagramme")
+        canvas = FigureCanvasTkAgg(fig, master=chart_window)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.withdraw()
+    bf = BerichteFenster(root)
+    bf.mainloop()
+
@@ -1,148 +1,229 @@
-﻿import tkinter as tk
-from tkinter import ttk, messagebox
-import csv
-from repository import ErsatzteileRepository
-
-class ErsatzteileFenster(tk.Toplevel):
-    def __init__(self, master=None):
-        super().__init__(master)
-        self.title("Ersatzteilverwaltung")
-        self.geometry("1400x800")
-        self.state("zoomed")
-        self.repo = ErsatzteileRepository()
-        self.felder = [
-            "Hersteller", "Typ", "Bauform", "Spannung", 
-            "Bestellnummer", "Lagerplatz", "Beschreibung", "Zusatz1", "Zusatz2", "Zusatz3"
-        ]
-        self.entries = {}
-        self.create_widgets()
-        self.load_dropdown_filters()
-        self.load_data()
-
-    def create_widgets(self):
-        # Linker Bereich: Formular zur Erfassung
-        left_frame = ttk.LabelFrame(self, text="Neues Ersatzteil erfassen", padding=10)
-        left_frame.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
-        for i, feld in enumerate(self.felder):
-            lbl = ttk.Label(left_frame, text=feld + ":")
-            lbl.grid(row=i, column=0, sticky=tk.W, padx=5, pady=3)
-            entry = ttk.Entry(left_frame, width=30)
-            entry.grid(row=i, column=1, padx=5, pady=3)
-            self.entries[feld] = entry
-        btn_save = ttk.Button(left_frame, text="Ersatzteil speichern", command=self.save_ersatzteil)
-        btn_save.grid(row=len(self.felder), column=0, columnspan=2, pady=10)
-        
-        # Rechter Bereich: Filter und TreeView
-        right_frame = ttk.Frame(self)
-        right_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Dropdown-Bereich für Hersteller und Typ (Schnellsuche)
-        dropdown_frame = ttk.LabelFrame(right_frame, text="Schnellsuche", padding=10)
-        dropdown_frame.pack(fill=tk.X, pady=(0,10))
-        ttk.Label(dropdown_frame, text="Hersteller:").grid(row=0, column=0, padx=5, pady=5)
-        self.hersteller_cb = ttk.Combobox(dropdown_frame, state="readonly")
-        self.hersteller_cb.grid(row=0, column=1, padx=5, pady=5)
-        self.hersteller_cb.bind("<<ComboboxSelected>>", self.on_hersteller_selected)
-        ttk.Label(dropdown_frame, text="Typ:").grid(row=0, column=2, padx=5, pady=5)
-        self.typ_cb = ttk.Combobox(dropdown_frame, state="readonly")
-        self.typ_cb.grid(row=0, column=3, padx=5, pady=5)
-        self.typ_cb.bind("<<ComboboxSelected>>", self.on_typ_selected)
-        
-        # Filterbereich für eine freie Suche
-        filter_frame = ttk.LabelFrame(right_frame, text="Ersatzteile filtern", padding=10)
-        filter_frame.pack(fill=tk.X, pady=(0,10))
-        ttk.Label(filter_frame, text="Suche:").grid(row=0, column=0, padx=5, pady=5)
-        self.search_var = tk.StringVar()
-        self.search_entry = ttk.Entry(filter_frame, textvariable=self.search_var, width=30)
-        self.search_entry.grid(row=0, column=1, padx=5, pady=5)
-        self.search_entry.bind("<KeyRelease>", self.on_search)
-        
-        # TreeView zur Anzeige der Ersatzteile
-        self.tree = ttk.Treeview(right_frame, 
-                                 columns=("id", "hersteller", "typ", "bauform", "spannung", "bestellnummer", "lagerplatz", "beschreibung"),
-                                 show="headings")
-        self.tree.heading("id", text="ID")
-        self.tree.heading("hersteller", text="Hersteller")
-        self.tree.heading("typ", text="Typ")
-        self.tree.heading("bauform", text="Bauform")
-        self.tree.heading("spannung", text="Spannung")
-        self.tree.heading("bestellnummer", text="Bestellnummer")
-        self.tree.heading("lagerplatz", text="Lagerplatz")
-        self.tree.heading("beschreibung", text="Beschreibung")
-        self.tree.column("id", width=50)
-        self.tree.column("hersteller", width=100)
-        self.tree.column("typ", width=100)
-        self.tree.column("bauform", width=100)
-        self.tree.column("spannung", width=80)
-        self.tree.column("bestellnummer", width=100)
-        self.tree.column("lagerplatz", width=100)
-        self.tree.column("beschreibung", width=200)
-        self.tree.pack(fill=tk.BOTH, expand=True)
-
-    def load_dropdown_filters(self):
-        # Hersteller aus der DB laden
-        hersteller_list = self.repo.get_all_hersteller()
-        self.hersteller_cb['values'] = [""] + hersteller_list
-        self.hersteller_cb.current(0)
-        # Typ-Dropdown zunächst leeren
-        self.typ_cb['values'] = [""]
-        self.typ_cb.current(0)
-
-    def on_hersteller_selected(self, event=None):
-        selected_hersteller = self.hersteller_cb.get().strip()
-        if selected_hersteller:
-            typ_list = self.repo.get_types_by_hersteller(selected_hersteller)
-            self.typ_cb['values'] = [""] + typ_list
-            self.typ_cb.current(0)
-        else:
-            self.typ_cb['values'] = [""]
-            self.typ_cb.current(0)
-        self.load_data()
-
-    def on_typ_selected(self, event=None):
-        self.load_data()
-
-    def on_search(self, event=None):
-        self.load_data()
-
-    def save_ersatzteil(self):
-        data = []
-        for feld in self.felder:
-            data.append(self.entries[feld].get().strip())
-        try:
-            self.repo.insert_ersatzteil(tuple(data))
-            messagebox.showinfo("Erfolg", "Ersatzteil wurde gespeichert.")
-            self.clear_form()
-            self.load_data()
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Fehler beim Speichern: {e}")
-
-    def load_data(self, search_query=""):
-        # Alle Ersatzteile mit optionaler Freisuche laden
-        records = self.repo.get_all_ersatzteile(search_query)
-        hersteller_filter = self.hersteller_cb.get().strip()
-        typ_filter = self.typ_cb.get().strip()
-        filtered = []
-        for rec in records:
-            # rec: (id, hersteller, typ, bauform, spannung, bestellnummer, lagerplatz, beschreibung, ...)
-            match = True
-            if hersteller_filter and rec[1] != hersteller_filter:
-                match = False
-            if typ_filter and rec[2] != typ_filter:
-                match = False
-            if match:
-                filtered.append(rec)
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        for rec in filtered:
-            self.tree.insert("", tk.END, values=rec[:8])
-
-    def clear_form(self):
-        for feld in self.felder:
-            self.entries[feld].delete(0, tk.END)
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    root.withdraw()
-    ef = ErsatzteileFenster(root)
-    ef.mainloop()
+﻿import tkinter as tk
+from tkinter import ttk, messagebox
+import csv
+from repository import ErsatzteileRepository
+from gui.listenansicht import VirtuelleListe, Spaltensortierung, zeilen_anwenden
+from aenderungsfeed import get_aenderungsfeed
+from gui.hintergrund import Hintergrundabfragen
+from gui.suche import Entpreller, Suchcache
+
+class ErsatzteileFenster(tk.Toplevel):
+    def __init__(self, master=None):
+        super().__init__(master)
+        self.title("Ersatzteilverwaltung")
+        self.geometry("1400x800")
+        self.state("zoomed")
+        self.repo = ErsatzteileRepository()
+        # Vollständig geladene Treffer ohne Facettenfilter, für Verfeinerungen der Freisuche
+        self.suchcache = Suchcache(self.repo.search_filter)
+        self.letzte_suche = None
+        self.aktive_filter = {}
+        self.felder = [
+            "Hersteller", "Typ", "Bauform", "Spannung", 
+            "Bestellnummer", "Lagerplatz", "Beschreibung", "Zusatz1", "Zusatz2", "Zusatz3"
+        ]
+        self.entries = {}
+        # Anzeigetext der Facetten-Auswahl ("Siemens (12)") -> Wert
+        self.facet_labels = {facet: {} for facet in self.repo.FACETS}
+        self.create_widgets()
+        get_aenderungsfeed(self.repo.db_path).subscribe("ersatzteile", self.on_aenderungen, widget=self)
+        self.load_dropdown_filters()
+        self.load_data()
+
+    def create_widgets(self):
+        # Linker Bereich: Formular zur Erfassung
+        left_frame = ttk.LabelFrame(self, text="Neues Ersatzteil erfassen", padding=10)
+        left_frame.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
+        for i, feld in enumerate(self.felder):
+            lbl = ttk.Label(left_frame, text=feld + ":")
+            lbl.grid(row=i, column=0, sticky=tk.W, padx=5, pady=3)
+            entry = ttk.Entry(left_frame, width=30)
+            entry.grid(row=i, column=1, padx=5, pady=3)
+            self.entries[feld] = entry
+        btn_save = ttk.Button(left_frame, text="Ersatzteil speichern", command=self.save_ersatzteil)
+        btn_save.grid(row=len(self.felder), column=0, columnspan=2, pady=10)
+        
+        # Rechter Bereich: Filter und TreeView
+        right_frame = ttk.Frame(self)
+        right_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Dropdown-Bereich für Hersteller, Typ und Lagerplatz (Schnellsuche mit Trefferzahlen)
+        dropdown_frame = ttk.LabelFrame(right_frame, text="Schnellsuche", padding=10)
+        dropdown_frame.pack(fill=tk.X, pady=(0,10))
+        ttk.Label(dropdown_frame, text="Hersteller:").grid(row=0, column=0, padx=5, pady=5)
+        self.hersteller_cb = ttk.Combobox(dropdown_frame, state="readonly")
+        self.hersteller_cb.grid(row=0, column=1, padx=5, pady=5)
+        self.hersteller_cb.bind("<<ComboboxSelected>>", self.on_hersteller_selected)
+        ttk.Label(dropdown_frame, text="Typ:").grid(row=0, column=2, padx=5, pady=5)
+        self.typ_cb = ttk.Combobox(dropdown_frame, state="readonly")
+        self.typ_cb.grid(row=0, column=3, padx=5, pady=5)
+        self.typ_cb.bind("<<ComboboxSelected>>", self.on_typ_selected)
+        ttk.Label(dropdown_frame, text="Lagerplatz:").grid(row=0, column=4, padx=5, pady=5)
+        self.lagerplatz_cb = ttk.Combobox(dropdown_frame, state="readonly")
+        self.lagerplatz_cb.grid(row=0, column=5, padx=5, pady=5)
+        self.lagerplatz_cb.bind("<<ComboboxSelected>>", self.on_typ_selected)
+        self.treffer_label = ttk.Label(dropdown_frame, text="")
+        self.treffer_label.grid(row=0, column=6, padx=15, pady=5)
+        self.facet_cbs = {"hersteller": self.hersteller_cb, "typ": self.typ_cb, "lagerplatz": self.lagerplatz_cb}
+        
+        # Filterbereich für eine freie Suche
+        filter_frame = ttk.LabelFrame(right_frame, text="Ersatzteile filtern", padding=10)
+        filter_frame.pack(fill=tk.X, pady=(0,10))
+        ttk.Label(filter_frame, text="Suche:").grid(row=0, column=0, padx=5, pady=5)
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(filter_frame, textvariable=self.search_var, width=30)
+        self.search_entry.grid(row=0, column=1, padx=5, pady=5)
+        self.entprellt = Entpreller(self, self.on_search)
+        self.search_entry.bind("<KeyRelease>", self.entprellt)
+        self.search_entry.bind("<Return>", self.entprellt.jetzt)
+        
+        # TreeView zur Anzeige der Ersatzteile
+        tree_frame = ttk.Frame(right_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(tree_frame, 
+                                 columns=("id", "hersteller", "typ", "bauform", "spannung", "bestellnummer", "lagerplatz", "beschreibung"),
+                                 show="headings")
+        self.tree.heading("id", text="ID")
+        self.tree.heading("hersteller", text="Hersteller")
+        self.tree.heading("typ", text="Typ")
+        self.tree.heading("bauform", text="Bauform")
+        self.tree.heading("spannung", text="Spannung")
+        self.tree.heading("bestellnummer", text="Bestellnummer")
+        self.tree.heading("lagerplatz", text="Lagerplatz")
+        self.tree.heading("beschreibung", text="Beschreibung")
+        self.tree.column("id", width=50)
+        self.tree.column("hersteller", width=100)
+        self.tree.column("typ", width=100)
+        self.tree.column("bauform", width=100)
+        self.tree.column("spannung", width=80)
+        self.tree.column("bestellnummer", width=100)
+        self.tree.column("lagerplatz", width=100)
+        self.tree.column("beschreibung", width=200)
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.hintergrund = Hintergrundabfragen(self, self.repo.db_path)
+        self.liste = VirtuelleListe(self.tree, scrollbar=vsb, to_values=lambda row: row[:8],
+                                    executor=self.hintergrund)
+        self.sortierung = Spaltensortierung(self.tree, {col: col for col in self.repo.SORT_COLUMNS}, self.on_sort)
+
+    def load_dropdown_filters(self):
+        # Auswahl leeren; Werte und Trefferzahlen kommen mit load_data()
+        for cb in self.facet_cbs.values():
+            cb['values'] = [""]
+            cb.current(0)
+
+    def selected_filters(self):
+        return {facet: self.facet_labels[facet].get(cb.get(), "") for facet, cb in self.facet_cbs.items()}
+
+    def update_facets(self, facets):
+        selected = self.selected_filters()
+        for facet, cb in self.facet_cbs.items():
+            labels = {f"{value} ({count})": value for value, count in facets[facet]}
+            current = selected[facet]
+            if current and current not in labels.values():
+                labels[f"{current} (0)"] = current
+            self.facet_labels[facet] = labels
+            cb['values'] = [""] + list(labels)
+            cb.set(next((label for label, value in labels.items() if value == current), ""))
+        self.treffer_label.config(text=f"{facets['gesamt']} Treffer")
+
+    def on_hersteller_selected(self, event=None):
+        # Typen gehören zum Hersteller; eine alte Typauswahl wird verworfen
+        self.typ_cb.set("")
+        self.load_data()
+
+    def on_typ_selected(self, event=None):
+        self.load_data()
+
+    def on_search(self, event=None):
+        if self.search_var.get().strip() != self.letzte_suche:
+            self.load_data()
+
+    def on_sort(self):
+        # Gespeicherte Treffer liegen in der alten Reihenfolge vor
+        self.suchcache.clear()
+        self.load_data()
+
+    def save_ersatzteil(self):
+        data = []
+        for feld in self.felder:
+            data.append(self.entries[feld].get().strip())
+        try:
+            aenderung = self.repo.insert_ersatzteil(tuple(data))
+            self.suchcache.clear()
+            messagebox.showinfo("Erfolg", "Ersatzteil wurde gespeichert.")
+            self.clear_form()
+            # Nur die neue Zeile übernehmen; die Trefferzahlen kommen mit einer eigenen Abfrage
+            search_query, filters = self.letzte_suche or "", self.aktive_filter
+            self.liste.apply(aenderung, passt=self.repo.row_matches(aenderung.row, search_query, **filters))
+            self.refresh_facets()
+        except Exception as e:
+            messagebox.showerror("Fehler", f"Fehler beim Speichern: {e}")
+
+    def refresh_facets(self):
+        search_query, filters = self.letzte_suche or "", self.aktive_filter
+        self.hintergrund.submit("facetten", lambda: self.repo.get_facet_counts(search_query, **filters),
+                                self.update_facets)
+
+    def on_aenderungen(self, ereignisse):
+        # Schreibzugriffe anderer Fenster und Arbeitsplätze zeilenweise übernehmen
+        self.suchcache.clear()
+        if ereignisse is None:
+            self.load_data()
+            return
+        ids = [ereignis.id for ereignis in ereignisse]
+        search_query, filters = self.letzte_suche or "", self.aktive_filter
+
+        def anwenden(rows):
+            zeilen_anwenden(self.liste.apply, ids, rows,
+                            passt=lambda row: self.repo.row_matches(row, search_query, **filters))
+            self.refresh_facets()
+
+        self.hintergrund.submit(None, lambda: self.repo.get_ersatzteile_by_ids(ids), anwenden)
+
+    def load_data(self):
+        # Freisuche und Facetten werden in SQL ausgewertet; die Trefferzahlen
+        # kommen mit der ersten Seite, weitere Seiten lädt die Liste beim Scrollen.
+        # fetch_page läuft im Hintergrund; die Facetten zeigt on_loaded im Tk-Thread.
+        search_query = self.search_var.get().strip()
+        filters = self.selected_filters()
+        self.letzte_suche = search_query
+        self.aktive_filter = filters
+        sortierung = self.sortierung.parameter()
+        self.liste.set_sort((["id"] + self.repo.COLUMNS).index(sortierung["sort_column"]), sortierung["descending"])
+        ohne_facetten = not any(filters.values())
+        rows = self.suchcache.get(search_query) if ohne_facetten else None
+        if rows is not None:
+            self.liste.show_rows(rows, vollstaendig=True)
+            self.update_facets(self.repo.facet_counts_of(rows))
+            return
+        ergebnis = {}
+        stand = self.suchcache.stand
+
+        def fetch_page(**page):
+            first = page.get("after_id") is None and page.get("before_id") is None
+            rows, facets = self.repo.search_ersatzteile(search_query, with_facets=first, **filters, **sortierung,
+                                                        **page)
+            if facets is not None:
+                ergebnis["facets"] = facets
+            return rows
+
+        def loaded(rows):
+            facets = ergebnis["facets"]
+            # Passen alle Treffer auf die erste Seite, ist das Ergebnis vollständig
+            if ohne_facetten and facets["gesamt"] == len(rows):
+                self.suchcache.put(search_query, rows, stand)
+            self.update_facets(facets)
+
+        self.liste.set_source(fetch_page, on_loaded=loaded)
+
+    def clear_form(self):
+        for feld in self.felder:
+            self.entries[feld].delete(0, tk.END)
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.withdraw()
+    ef = ErsatzteileFenster(root)
+    ef.mainloop()
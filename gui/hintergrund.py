@@ -0,0 +1,157 @@
+﻿import queue
+import logging
+import threading
+from db_connection import get_manager, DEFAULT_DB_PATH
+
+
+class _Auftrag:
+    def __init__(self, schluessel, func, on_done, on_error):
+        self.schluessel = schluessel
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self.abgebrochen = False
+
+
+class Hintergrundabfragen:
+    """
+    Führt Repository-Aufrufe eines Fensters in einem Worker-Thread aus und
+    liefert die Ergebnisse per after()-Polling im Tk-Hauptthread aus, so dass
+    die Oberfläche auch bei großen Datenbanken oder langsamen Netzlaufwerken
+    bedienbar bleibt.
+
+    submit(schluessel, func, on_done) ersetzt einen älteren Auftrag mit
+    demselben Schlüssel: ein noch wartender wird verworfen, ein laufender über
+    den Progress-Handler seiner Verbindung abgebrochen (die Abfrage endet mit
+    'interrupted'). Ergebnisse ersetzter Aufträge werden nie ausgeliefert.
+    Aufträge mit schluessel=None ersetzen nichts und werden nicht ersetzt.
+    Solange Aufträge offen sind, zeigt das Fenster den Wartecursor (on_busy).
+
+    func läuft im Worker-Thread und darf keine Widgets anfassen; on_done und
+    on_error laufen im Tk-Hauptthread. Der Worker nutzt die Thread-Verbindung
+    des ConnectionManagers zu db_path, also dieselbe Datenbank wie die
+    Repositories des Fensters.
+    """
+
+    POLL_MS = 30
+    # Alle wie viele SQLite-VM-Schritte ein laufender Auftrag auf Abbruch prüft
+    PROGRESS_SCHRITTE = 1000
+
+    def __init__(self, widget, db_path=DEFAULT_DB_PATH, on_busy=None, poll_ms=POLL_MS):
+        self.widget = widget
+        self.db_path = db_path
+        self.on_busy = on_busy or self._wartecursor
+        self.poll_ms = poll_ms
+        self._auftraege = queue.Queue()
+        self._ergebnisse = queue.Queue()
+        self._aktuell = {}
+        self._offen = 0
+        self._laufend = None
+        self._thread = None
+        self._polling = False
+        self._geschlossen = False
+        widget.bind("<Destroy>", self._on_destroy, add="+")
+
+    def submit(self, schluessel, func, on_done, on_error=None):
+        if self._geschlossen:
+            return None
+        auftrag = _Auftrag(schluessel, func, on_done, on_error)
+        if schluessel is not None:
+            self.cancel(schluessel)
+            self._aktuell[schluessel] = auftrag
+        self._offen += 1
+        if self._offen == 1:
+            self.on_busy(True)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name="gui-hintergrund", daemon=True)
+            self._thread.start()
+        self._auftraege.put(auftrag)
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+        return auftrag
+
+    def cancel(self, schluessel):
+        auftrag = self._aktuell.pop(schluessel, None)
+        if auftrag is not None:
+            auftrag.abgebrochen = True
+
+    def busy(self):
+        return self._offen > 0
+
+    def close(self):
+        if self._geschlossen:
+            return
+        self._geschlossen = True
+        for schluessel in list(self._aktuell):
+            self.cancel(schluessel)
+        if self._thread is not None:
+            self._auftraege.put(None)
+
+    def _on_destroy(self, event):
+        if event.widget is self.widget:
+            self.close()
+
+    def _abbrechen(self):
+        # Progress-Handler: ein Wert ungleich 0 bricht die laufende Anweisung ab
+        auftrag = self._laufend
+        return 1 if auftrag is not None and auftrag.abgebrochen else 0
+
+    def _worker(self):
+        manager = get_manager(self.db_path)
+        conn = manager.connection()
+        conn.set_progress_handler(self._abbrechen, self.PROGRESS_SCHRITTE)
+        try:
+            while True:
+                auftrag = self._auftraege.get()
+                if auftrag is None:
+                    return
+                ergebnis = fehler = None
+                if not auftrag.abgebrochen:
+                    self._laufend = auftrag
+                    try:
+                        ergebnis = auftrag.func()
+                    except Exception as e:
+                        fehler = e
+                    finally:
+                        self._laufend = None
+                self._ergebnisse.put((auftrag, ergebnis, fehler))
+        finally:
+            conn.set_progress_handler(None, 0)
+            manager.close_thread_connection()
+
+    def _poll(self):
+        self._polling = False
+        if self._geschlossen:
+            return
+        while True:
+            try:
+                auftrag, ergebnis, fehler = self._ergebnisse.get_nowait()
+            except queue.Empty:
+                break
+            self._offen -= 1
+            if auftrag.abgebrochen:
+                continue
+            if self._aktuell.get(auftrag.schluessel) is auftrag:
+                del self._aktuell[auftrag.schluessel]
+            try:
+                if fehler is None:
+                    auftrag.on_done(ergebnis)
+                elif auftrag.on_error is not None:
+                    auftrag.on_error(fehler)
+                else:
+                    logging.error(f"Hintergrundabfrage '{auftrag.schluessel}' fehlgeschlagen: {fehler}")
+            except Exception:
+                logging.exception(f"Fehler beim Anzeigen des Ergebnisses von '{auftrag.schluessel}'")
+        if self._offen:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+        else:
+            self.on_busy(False)
+
+    def _wartecursor(self, busy):
+        try:
+            self.widget.winfo_toplevel().configure(cursor="watch" if busy else "")
+        except Exception:
+            # Fenster wird gerade geschlossen
+            pass
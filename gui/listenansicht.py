@@ -0,0 +1,408 @@
+﻿import logging
+import tkinter as tk
+from repository import Aenderung
+
+
+def aenderung_anwenden(tree, aenderung, to_values=None, passt=True, index=tk.END):
+    """
+    Überträgt eine Aenderung (repository.Aenderung) auf einen Treeview, dessen
+    Item-IDs die Datensatz-IDs sind, statt ihn neu zu füllen. Scrollposition,
+    Auswahl und Reihenfolge der übrigen Zeilen bleiben erhalten.
+    passt=False: die Zeile gehört nicht (mehr) in die Ansicht, z.B. wegen eines
+    Filters, und wird entfernt. Neue Zeilen kommen an index; None: nicht einfügen.
+    Liefert "neu", "geaendert", "geloescht" oder None (Baum unverändert).
+    """
+    iid = str(aenderung.id)
+    vorhanden = tree.exists(iid)
+    if aenderung.row is None or not passt:
+        if vorhanden:
+            tree.delete(iid)
+            return "geloescht"
+        return None
+    values = to_values(aenderung.row) if to_values else aenderung.row
+    if vorhanden:
+        tree.item(iid, values=values)
+        return "geaendert"
+    if index is None:
+        return None
+    tree.insert("", index, iid=iid, values=values)
+    return "neu"
+
+
+def zeilen_anwenden(apply, ids, rows, passt=None):
+    """
+    Überträgt nachgelesene Zeilen zu geänderten ids (aenderungsfeed) mit
+    apply(aenderung): gefundene Zeilen werden übernommen, fehlende (gelöscht
+    oder nicht mehr im Filter bzw. passt(row) falsch) entfernt.
+    """
+    gefunden = {row[0]: row for row in rows if passt is None or passt(row)}
+    for row_id in ids:
+        row = gefunden.get(row_id)
+        apply(Aenderung(Aenderung.NEU if row is not None else Aenderung.GELOESCHT, row_id, row))
+
+
+def sqlite_sortierschluessel(value):
+    """Vergleichsschlüssel wie ORDER BY in SQLite: NULL vor Zahlen vor Text vor BLOB."""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, value)
+
+
+class Spaltensortierung:
+    """
+    Sortieren per Klick auf die Spaltenüberschrift eines Treeviews. spalten
+    bildet die anklickbaren Baumspalten auf Sortierspalten der Abfrage ab
+    (SORT_COLUMNS des Repositorys); sortiert wird in der Datenbank, on_change()
+    lädt die Liste dazu neu. Der erste Klick sortiert aufsteigend, der zweite
+    absteigend, der dritte stellt die Grundsortierung wieder her. Die
+    Überschrift der sortierten Spalte zeigt die Richtung.
+    """
+
+    PFEILE = {False: " ▲", True: " ▼"}
+
+    def __init__(self, tree, spalten, on_change, sort_column="id", descending=False):
+        self.tree = tree
+        self.spalten = spalten
+        self.on_change = on_change
+        self.grundsortierung = (sort_column, descending)
+        self.sort_column = sort_column
+        self.descending = descending
+        self._texte = {spalte: tree.heading(spalte, "text") for spalte in spalten}
+        for spalte in spalten:
+            tree.heading(spalte, command=lambda spalte=spalte: self.klick(spalte))
+        self._pfeile_zeigen()
+
+    def klick(self, spalte):
+        sort_column = self.spalten[spalte]
+        if sort_column != self.sort_column:
+            self.sort_column, self.descending = sort_column, False
+        elif self.descending and sort_column != self.grundsortierung[0]:
+            self.sort_column, self.descending = self.grundsortierung
+        else:
+            self.descending = not self.descending
+        self._pfeile_zeigen()
+        self.on_change()
+
+    def parameter(self):
+        """sort_column und descending für die Abfragen der Repositories."""
+        return {"sort_column": self.sort_column, "descending": self.descending}
+
+    def ist_grundsortierung(self):
+        return (self.sort_column, self.descending) == self.grundsortierung
+
+    def _pfeile_zeigen(self):
+        for spalte, sort_column in self.spalten.items():
+            pfeil = self.PFEILE[self.descending] if sort_column == self.sort_column else ""
+            self.tree.heading(spalte, text=self._texte[spalte] + pfeil)
+
+
+class VirtuelleListe:
+    """
+    Hängt sich an einen ttk.Treeview und hält nur wenige Seiten einer großen
+    Ergebnismenge. Nähert sich die Ansicht dem Ende (oder dem Anfang) der
+    geladenen Zeilen, wird die nächste (vorige) Seite per Keyset-Paging
+    nachgeladen und eine Seite am anderen Ende verworfen.
+
+    fetch_page(after_id=None, before_id=None, cursor_value=..., page_size=...)
+    liefert die Zeilen einer Seite; cursor_value ist der Sortierwert der Zeile
+    after_id/before_id, wie er geladen wurde (die Zeile kann inzwischen gelöscht
+    sein). Die Item-IDs im Baum sind die Datensatz-IDs.
+    Die Bildlaufleiste zeigt die Position innerhalb der geladenen Seiten.
+
+    Mit executor (gui.hintergrund.Hintergrundabfragen) laufen fetch_page und
+    load_rows im Hintergrund; eine neue Quelle ersetzt eine noch laufende
+    Abfrage. Ohne executor wird wie bisher direkt im Tk-Thread geladen.
+
+    descending: die Quelle liefert die neuesten Zeilen zuerst. Sortiert die
+    Quelle nach einer anderen Spalte, teilt set_sort() das der Liste mit; apply()
+    ordnet neue und geänderte Zeilen danach ein, sofern ihre Stelle geladen ist.
+    """
+
+    # Schlüssel der Listenabfragen im executor; eine neue ersetzt die laufende
+    SCHLUESSEL = "liste"
+
+    def __init__(self, tree, scrollbar=None, page_size=200, max_pages=5, id_index=0, to_values=None,
+                 executor=None, descending=False):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.id_index = id_index
+        self.to_values = to_values or (lambda row: row)
+        self.executor = executor
+        self.descending = descending
+        self.sort_index = id_index
+        self.fetch_page = None
+        self._pages = []
+        # Sortierschlüssel der geladenen Zeilen je Item-ID, für apply()
+        self._keys = {}
+        self._has_more = False
+        self._has_previous = False
+        self._pending = False
+        self._vollstaendig = False
+        self.tree.configure(yscrollcommand=self._on_yscroll)
+
+    def set_sort(self, sort_index, descending=False):
+        """
+        Reihenfolge der folgenden Quelle: sort_index ist die Stelle des
+        Sortierwerts in den Zeilen (id_index: nach id), descending die Richtung.
+        Vor set_source() bzw. show_rows() aufrufen.
+        """
+        self.sort_index = sort_index
+        self.descending = descending
+
+    def set_source(self, fetch_page, on_loaded=None):
+        """
+        Neue Datenquelle (z.B. geänderter Filter); lädt die erste Seite.
+        on_loaded(rows) wird danach im Tk-Thread aufgerufen.
+        """
+        self.fetch_page = fetch_page
+        self.reload(on_loaded)
+
+    def reload(self, on_loaded=None):
+        fetch_page = self.fetch_page
+        if fetch_page is None:
+            self._clear()
+            return
+
+        def show(rows):
+            self._pending = False
+            self._clear()
+            self._append_page(rows)
+            self._has_more = len(rows) == self.page_size
+            self.tree.yview_moveto(0)
+            if on_loaded is not None:
+                on_loaded(rows)
+
+        # Bis die erste Seite da ist, nicht mit der alten Quelle nachladen
+        self._pending = True
+        self._run(lambda: fetch_page(page_size=self.page_size), show)
+
+    def show_rows(self, rows, vollstaendig=False):
+        """
+        Zeigt eine feste Zeilenliste ohne Nachladen (z.B. Suchergebnisse).
+        vollstaendig: die Zeilen sind alle Treffer in der Reihenfolge von set_sort(),
+        apply() darf neue Zeilen einordnen (bei nach Relevanz sortierten Treffern nicht).
+        """
+        self.fetch_page = None
+        self._vollstaendig = vollstaendig
+        self._pending = False
+        if self.executor is not None:
+            self.executor.cancel(self.SCHLUESSEL)
+        self._clear()
+        self._append_page(rows)
+
+    def load_rows(self, func, on_loaded=None):
+        """Wie show_rows, die Zeilen liefert aber func() (im Hintergrund, falls executor)."""
+        self.fetch_page = None
+        self._vollstaendig = False
+        self._pending = False
+
+        def show(rows):
+            self._clear()
+            self._append_page(rows)
+            if on_loaded is not None:
+                on_loaded(rows)
+
+        self._run(func, show)
+
+    def _run(self, func, on_done):
+        if self.executor is None:
+            on_done(func())
+        else:
+            self.executor.submit(self.SCHLUESSEL, func, on_done, self._on_error)
+
+    def _on_error(self, error):
+        self._pending = False
+        logging.error(f"Fehler beim Laden der Liste: {error}")
+
+    def apply(self, aenderung, passt=True):
+        """
+        Übernimmt eine einzelne geschriebene Zeile (repository.Aenderung), ohne
+        neu zu laden. Neue Zeilen (und Zeilen mit geändertem Sortierwert) kommen
+        an ihre Stelle in der Sortierung, sofern diese Stelle geladen ist; sonst
+        erscheinen sie beim Blättern von selbst.
+        """
+        iid = str(aenderung.id)
+        first = float(self.tree.yview()[0])
+        anchor = self._first_visible()
+        index = None
+        verschoben = False
+        if aenderung.row is not None and passt:
+            key = self._sort_key(aenderung.row)
+            if self.tree.exists(iid) and self._keys.get(iid) != key:
+                # Sortierwert geändert: an der alten Stelle entfernen, an der neuen einordnen
+                self.tree.delete(iid)
+                self._remove(iid)
+                verschoben = True
+            index = self._neu_index(key)
+        art = aenderung_anwenden(self.tree, aenderung, self.to_values, passt, index)
+        if art == "geloescht":
+            self._remove(iid)
+        elif art == "neu":
+            self._insert(iid, index, key)
+            # Wer nicht ganz oben steht, behält seine Zeilen im Blick
+            if first > 0:
+                self._restore_view(anchor)
+        elif art == "geaendert":
+            self._keys[iid] = key
+        if verschoben:
+            return "geaendert" if art == "neu" else "geloescht"
+        return art
+
+    def _neu_index(self, key):
+        # Stelle in der geladenen Reihenfolge; None, wenn sie davor oder dahinter nicht geladen ist
+        if self.fetch_page is None and not self._vollstaendig:
+            return None
+        keys = [self._keys[iid] for page in self._pages for iid in page]
+        position = sum(1 for k in keys if (k > key if self.descending else k < key))
+        if position == 0 and self._has_previous:
+            return None
+        if position == len(keys) and self._has_more:
+            return None
+        return position
+
+    def _insert(self, iid, position, key):
+        self._keys[iid] = key
+        for page in self._pages:
+            if position <= len(page):
+                page.insert(position, iid)
+                return
+            position -= len(page)
+        self._pages.append([iid])
+
+    def _remove(self, iid):
+        self._keys.pop(iid, None)
+        for page in self._pages:
+            if iid in page:
+                page.remove(iid)
+        self._pages = [page for page in self._pages if page]
+
+    def _sort_key(self, row):
+        # Wie ORDER BY spalte, id in der Datenbank
+        return sqlite_sortierschluessel(row[self.sort_index]), row[self.id_index]
+
+    def _cursor_value(self, iid):
+        # Sortierwert zurück aus dem Schlüssel (NULL wird zu (0, 0))
+        (rang, wert), _ = self._keys[iid]
+        return wert if rang else None
+
+    def loaded_count(self):
+        return sum(len(page) for page in self._pages)
+
+    def _clear(self):
+        self.tree.delete(*self.tree.get_children())
+        self._pages = []
+        self._keys = {}
+        self._has_more = False
+        self._has_previous = False
+
+    def _row_id(self, row):
+        return row[self.id_index]
+
+    def _append_page(self, rows):
+        ids = []
+        for row in rows:
+            iid = str(self._row_id(row))
+            self._verschieben(iid)
+            self.tree.insert("", tk.END, iid=iid, values=self.to_values(row))
+            self._keys[iid] = self._sort_key(row)
+            ids.append(iid)
+        if ids:
+            self._pages.append(ids)
+
+    def _prepend_page(self, rows):
+        ids = []
+        for index, row in enumerate(rows):
+            iid = str(self._row_id(row))
+            self._verschieben(iid)
+            self.tree.insert("", index, iid=iid, values=self.to_values(row))
+            self._keys[iid] = self._sort_key(row)
+            ids.append(iid)
+        if ids:
+            self._pages.insert(0, ids)
+
+    def _verschieben(self, iid):
+        # Schon geladen (Sortierwert inzwischen anderswo geändert): die neue Seite gilt
+        if self.tree.exists(iid):
+            self.tree.delete(iid)
+            self._remove(iid)
+
+    def _on_yscroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        if self.fetch_page is None or self._pending:
+            return
+        first, last = float(first), float(last)
+        if (last >= 0.9 and self._has_more) or (first <= 0.1 and self._has_previous):
+            # Nicht innerhalb des Scroll-Callbacks umbauen, sondern im nächsten Leerlauf
+            self._pending = True
+            self.tree.after_idle(self._load_more)
+
+    def _first_visible(self):
+        children = self.tree.get_children()
+        if not children:
+            return None
+        first = float(self.tree.yview()[0])
+        return children[min(int(first * len(children)), len(children) - 1)]
+
+    def _restore_view(self, anchor):
+        children = self.tree.get_children()
+        if anchor and children and self.tree.exists(anchor):
+            self.tree.yview_moveto(self.tree.index(anchor) / len(children))
+
+    def _load_more(self):
+        fetch_page = self.fetch_page
+        if fetch_page is None or not self._pages:
+            self._pending = False
+            return
+        first, last = (float(v) for v in self.tree.yview())
+        if last >= 0.9 and self._has_more:
+            iid = self._pages[-1][-1]
+            after_id, cursor_value = self._row_id_of(iid), self._cursor_value(iid)
+            self._run(lambda: fetch_page(after_id=after_id, cursor_value=cursor_value, page_size=self.page_size),
+                      self._show_next)
+        elif first <= 0.1 and self._has_previous:
+            iid = self._pages[0][0]
+            before_id, cursor_value = self._row_id_of(iid), self._cursor_value(iid)
+            self._run(lambda: fetch_page(before_id=before_id, cursor_value=cursor_value, page_size=self.page_size),
+                      self._show_previous)
+        else:
+            self._pending = False
+
+    def _show_next(self, rows):
+        # _pending bleibt bis hier gesetzt, damit kein zweiter Abruf startet
+        self._pending = False
+        anchor = self._first_visible()
+        self._has_more = len(rows) == self.page_size
+        self._append_page(rows)
+        if len(self._pages) > self.max_pages:
+            self._drop_page(0)
+            self._has_previous = True
+        self._restore_view(anchor)
+
+    def _show_previous(self, rows):
+        self._pending = False
+        anchor = self._first_visible()
+        self._has_previous = len(rows) == self.page_size
+        self._prepend_page(rows)
+        if len(self._pages) > self.max_pages:
+            self._drop_page(-1)
+            self._has_more = True
+        self._restore_view(anchor)
+
+    def _drop_page(self, index):
+        page = self._pages.pop(index)
+        self.tree.delete(*page)
+        for iid in page:
+            self._keys.pop(iid, None)
+
+    def _row_id_of(self, iid):
+        try:
+            return int(iid)
+        except ValueError:
+            return iid
@@ -1,116 +1,199 @@
-﻿import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-import csv
-from repository import MotorenRepository
-
-class MotorenFenster(tk.Toplevel):
-    def __init__(self, master=None):
-        super().__init__(master)
-        self.title("Motorenverwaltung")
-        self.geometry("1400x800")
-        self.state("zoomed")
-        self.repo = MotorenRepository()
-        self.felder = [
-            "Motornummer", "im SW", "G", "BS", "Firma", "NEU", "Typ", "Seriennummer",
-            "Leistung", "Spannung", "N1_min", "N2_min", "Strom", "Cosinus Phi", "Lagerort", "Bemerkung"
-        ]
-        self.entries = {}
-        self.create_widgets()
-        self.load_data()
-
-    def create_widgets(self):
-        # Linker Bereich: Formular
-        left_frame = ttk.LabelFrame(self, text="Neuen Motor erfassen", padding=10)
-        left_frame.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
-        for i, feld in enumerate(self.felder):
-            lbl = ttk.Label(left_frame, text=feld + ":")
-            lbl.grid(row=i, column=0, sticky=tk.W, padx=5, pady=3)
-            entry = ttk.Entry(left_frame, width=30)
-            entry.grid(row=i, column=1, padx=5, pady=3)
-            self.entries[feld] = entry
-        btn_save = ttk.Button(left_frame, text="Motor speichern", command=self.save_motor)
-        btn_save.grid(row=len(self.felder), column=0, columnspan=2, pady=10)
-
-        # Rechter Bereich: Filter und TreeView
-        right_frame = ttk.Frame(self)
-        right_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        filter_frame = ttk.LabelFrame(right_frame, text="Motoren filtern", padding=10)
-        filter_frame.pack(fill=tk.X, pady=(0,10))
-        ttk.Label(filter_frame, text="Suche:").grid(row=0, column=0, padx=5, pady=5)
-        self.search_var = tk.StringVar()
-        self.search_entry = ttk.Entry(filter_frame, textvariable=self.search_var, width=30)
-        self.search_entry.grid(row=0, column=1, padx=5, pady=5)
-        self.search_entry.bind("<KeyRelease>", self.on_search)
-        btn_export = ttk.Button(filter_frame, text="Exportieren", command=self.export_data)
-        btn_export.grid(row=0, column=2, padx=5, pady=5)
-        
-        self.tree = ttk.Treeview(right_frame, columns=("id", "motornummer", "Firma", "Typ", "Seriennummer", "Leistung", "Spannung", "Bemerkung"), show="headings")
-        self.tree.heading("id", text="ID")
-        self.tree.heading("motornummer", text="Motornummer")
-        self.tree.heading("Firma", text="Firma")
-        self.tree.heading("Typ", text="Typ")
-        self.tree.heading("Seriennummer", text="Seriennummer")
-        self.tree.heading("Leistung", text="Leistung")
-        self.tree.heading("Spannung", text="Spannung")
-        self.tree.heading("Bemerkung", text="Bemerkung")
-        self.tree.column("id", width=50)
-        self.tree.column("motornummer", width=100)
-        self.tree.column("Firma", width=100)
-        self.tree.column("Typ", width=100)
-        self.tree.column("Seriennummer", width=100)
-        self.tree.column("Leistung", width=80)
-        self.tree.column("Spannung", width=80)
-        self.tree.column("Bemerkung", width=200)
-        self.tree.pack(fill=tk.BOTH, expand=True)
-
-    def save_motor(self):
-        data = []
-        for feld in self.felder:
-            data.append(self.entries[feld].get().strip())
-        try:
-            self.repo.insert_motor(tuple(data))
-            messagebox.showinfo("Erfolg", "Motor wurde gespeichert.")
-            self.clear_form()
-            self.load_data()
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Fehler beim Speichern: {e}")
-
-    def load_data(self, search_query=""):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        records = self.repo.get_all_motoren(search_query)
-        for rec in records:
-            # Wir zeigen hier beispielhaft ausgewählte Spalten an:
-            # ID, Motornummer, Firma (Index 5), Typ (Index 7), Seriennummer (Index 8), Leistung (Index 9), Spannung (Index 10), Bemerkung (Index 16)
-            self.tree.insert("", tk.END, values=(rec[0], rec[1], rec[5], rec[7], rec[8], rec[9], rec[10], rec[16]))
-    
-    def on_search(self, event=None):
-        query = self.search_var.get().strip()
-        self.load_data(query)
-    
-    def export_data(self):
-        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Dateien", "*.csv")])
-        if not file_path:
-            return
-        data = []
-        for child in self.tree.get_children():
-            data.append(self.tree.item(child)['values'])
-        try:
-            with open(file_path, "w", encoding="utf-8", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(["ID", "Motornummer", "Firma", "Typ", "Seriennummer", "Leistung", "Spannung", "Bemerkung"])
-                writer.writerows(data)
-            messagebox.showinfo("Export", f"Daten wurden erfolgreich exportiert nach:\n{file_path}")
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Export fehlgeschlagen: {e}")
-    
-    def clear_form(self):
-        for feld in self.felder:
-            self.entries[feld].delete(0, tk.END)
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    root.withdraw()
-    mf = MotorenFenster(root)
-    mf.mainloop()
+﻿import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import csv
+import os
+from repository import MotorenRepository
+from gui.hintergrund import Hintergrundabfragen
+from gui.suche import Entpreller, Suchcache
+from gui.listenansicht import VirtuelleListe, Spaltensortierung, zeilen_anwenden
+from aenderungsfeed import get_aenderungsfeed
+
+class MotorenFenster(tk.Toplevel):
+    EXPORT_KOPF = ["ID", "Motornummer", "Firma", "Typ", "Seriennummer", "Leistung", "Spannung", "Bemerkung"]
+
+    def __init__(self, master=None):
+        super().__init__(master)
+        self.title("Motorenverwaltung")
+        self.geometry("1400x800")
+        self.state("zoomed")
+        self.repo = MotorenRepository()
+        self.hintergrund = Hintergrundabfragen(self, self.repo.db_path)
+        self.suchcache = Suchcache(self.repo.search_filter)
+        self.letzte_suche = None
+        self.felder = [
+            "Motornummer", "im SW", "G", "BS", "Firma", "NEU", "Typ", "Seriennummer",
+            "Leistung", "Spannung", "N1_min", "N2_min", "Strom", "Cosinus Phi", "Lagerort", "Bemerkung"
+        ]
+        self.entries = {}
+        self.create_widgets()
+        get_aenderungsfeed(self.repo.db_path).subscribe("motoren", self.on_aenderungen, widget=self)
+        self.load_data()
+
+    def create_widgets(self):
+        # Linker Bereich: Formular
+        left_frame = ttk.LabelFrame(self, text="Neuen Motor erfassen", padding=10)
+        left_frame.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
+        for i, feld in enumerate(self.felder):
+            lbl = ttk.Label(left_frame, text=feld + ":")
+            lbl.grid(row=i, column=0, sticky=tk.W, padx=5, pady=3)
+            entry = ttk.Entry(left_frame, width=30)
+            entry.grid(row=i, column=1, padx=5, pady=3)
+            self.entries[feld] = entry
+        btn_save = ttk.Button(left_frame, text="Motor speichern", command=self.save_motor)
+        btn_save.grid(row=len(self.felder), column=0, columnspan=2, pady=10)
+
+        # Rechter Bereich: Filter und TreeView
+        right_frame = ttk.Frame(self)
+        right_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        filter_frame = ttk.LabelFrame(right_frame, text="Motoren filtern", padding=10)
+        filter_frame.pack(fill=tk.X, pady=(0,10))
+        ttk.Label(filter_frame, text="Suche:").grid(row=0, column=0, padx=5, pady=5)
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(filter_frame, textvariable=self.search_var, width=30)
+        self.search_entry.grid(row=0, column=1, padx=5, pady=5)
+        self.entprellt = Entpreller(self, self.on_search)
+        self.search_entry.bind("<KeyRelease>", self.entprellt)
+        self.search_entry.bind("<Return>", self.entprellt.jetzt)
+        self.btn_export = ttk.Button(filter_frame, text="Exportieren", command=self.export_data)
+        self.btn_export.grid(row=0, column=2, padx=5, pady=5)
+        
+        tree_frame = ttk.Frame(right_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=("id", "motornummer", "Firma", "Typ", "Seriennummer", "Leistung", "Spannung", "Bemerkung"), show="headings")
+        self.tree.heading("id", text="ID")
+        self.tree.heading("motornummer", text="Motornummer")
+        self.tree.heading("Firma", text="Firma")
+        self.tree.heading("Typ", text="Typ")
+        self.tree.heading("Seriennummer", text="Seriennummer")
+        self.tree.heading("Leistung", text="Leistung")
+        self.tree.heading("Spannung", text="Spannung")
+        self.tree.heading("Bemerkung", text="Bemerkung")
+        self.tree.column("id", width=50)
+        self.tree.column("motornummer", width=100)
+        self.tree.column("Firma", width=100)
+        self.tree.column("Typ", width=100)
+        self.tree.column("Seriennummer", width=100)
+        self.tree.column("Leistung", width=80)
+        self.tree.column("Spannung", width=80)
+        self.tree.column("Bemerkung", width=200)
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.liste = VirtuelleListe(self.tree, scrollbar=vsb, to_values=self.to_values, executor=self.hintergrund)
+        # Baumspalte -> Sortierspalte; Leistung und Spannung sortieren nach dem Zahlenwert
+        self.sortierung = Spaltensortierung(self.tree, {
+            "id": "id", "motornummer": "motornummer", "Firma": "firma", "Typ": "typ",
+            "Seriennummer": "seriennummer", "Leistung": "leistung", "Spannung": "spannung",
+        }, self.on_sort)
+
+    def save_motor(self):
+        data = []
+        for feld in self.felder:
+            data.append(self.entries[feld].get().strip())
+        try:
+            aenderung = self.repo.insert_motor(tuple(data))
+            self.suchcache.clear()
+            messagebox.showinfo("Erfolg", "Motor wurde gespeichert.")
+            self.clear_form()
+            # Nur die neue Zeile einordnen, wenn sie zur aktuellen Suche passt
+            passt = not self.letzte_suche or self.repo.search_filter(self.letzte_suche)(aenderung.row)
+            self.liste.apply(aenderung, passt)
+        except Exception as e:
+            messagebox.showerror("Fehler", f"Fehler beim Speichern: {e}")
+
+    def load_data(self, search_query=""):
+        # Verfeinerungen einer vollständig geladenen Suche filtert der Cache; sonst
+        # blättert die Liste seitenweise im Hintergrund, jede neue Suche ersetzt
+        # eine noch laufende Abfrage
+        self.letzte_suche = search_query
+        sortierung = self.sortierung.parameter()
+        self.liste.set_sort(self.repo.sort_index(sortierung["sort_column"], self.repo.ROW_COLUMNS),
+                            sortierung["descending"])
+        records = self.suchcache.get(search_query)
+        if records is not None:
+            self.liste.show_rows(records, vollstaendig=True)
+            return
+        stand = self.suchcache.stand
+
+        def loaded(records):
+            # Passen alle Treffer auf die erste Seite, ist das Ergebnis vollständig
+            if len(records) < self.liste.page_size:
+                self.suchcache.put(search_query, records, stand)
+
+        self.liste.set_source(lambda **page: self.repo.get_motoren_page(search_query, **sortierung, **page),
+                              on_loaded=loaded)
+
+    def on_aenderungen(self, ereignisse):
+        # Schreibzugriffe anderer Fenster und Arbeitsplätze zeilenweise übernehmen
+        self.suchcache.clear()
+        search_query = self.letzte_suche or ""
+        if ereignisse is None:
+            self.load_data(search_query)
+            return
+        ids = [ereignis.id for ereignis in ereignisse]
+        passt = self.repo.search_filter(search_query) if search_query else None
+        self.hintergrund.submit(None, lambda: self.repo.get_motoren_by_ids(ids),
+                                lambda rows: zeilen_anwenden(self.liste.apply, ids, rows, passt))
+
+    def to_values(self, rec):
+        # Wir zeigen hier beispielhaft ausgewählte Spalten an:
+        # ID, Motornummer, Firma (Index 5), Typ (Index 7), Seriennummer (Index 8), Leistung (Index 9), Spannung (Index 10), Bemerkung (Index 16)
+        return (rec[0], rec[1], rec[5], rec[7], rec[8], rec[9], rec[10], rec[16])
+    
+    def on_search(self, event=None):
+        query = self.search_var.get().strip()
+        if query != self.letzte_suche:
+            self.load_data(query)
+
+    def on_sort(self):
+        # Gespeicherte Treffer liegen in der alten Reihenfolge vor
+        self.suchcache.clear()
+        self.load_data(self.letzte_suche or "")
+    
+    def export_data(self):
+        # Exportiert wird die angezeigte Suche in der angezeigten Reihenfolge, auch
+        # die noch nicht nachgeladenen Seiten; geschrieben wird im Hintergrund
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Dateien", "*.csv")])
+        if not file_path:
+            return
+        search_query, sortierung = self.letzte_suche or "", self.sortierung.parameter()
+
+        def schreiben():
+            rows = self.repo.iter_motoren(search_query, **sortierung)
+            anzahl = 0
+            try:
+                with open(file_path, "w", encoding="utf-8", newline="") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(self.EXPORT_KOPF)
+                    for row in rows:
+                        writer.writerow(self.to_values(row))
+                        anzahl += 1
+            except BaseException:
+                # Ein fehlgeschlagener Export hinterlässt keine halbe Datei
+                rows.close()
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                raise
+            return anzahl
+
+        def fertig(anzahl):
+            self.btn_export.configure(state="normal")
+            messagebox.showinfo("Export", f"{anzahl} Motoren wurden erfolgreich exportiert nach:\n{file_path}")
+
+        def fehler(e):
+            self.btn_export.configure(state="normal")
+            messagebox.showerror("Fehler", f"Export fehlgeschlagen: {e}")
+
+        self.btn_export.configure(state="disabled")
+        self.hintergrund.submit("export", schreiben, fertig, on_error=fehler)
+    
+    def clear_form(self):
+        for feld in self.felder:
+            self.entries[feld].delete(0, tk.END)
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.withdraw()
+    mf = MotorenFenster(root)
+    mf.mainloop()
@@ -0,0 +1,84 @@
+﻿from collections import OrderedDict
+
+
+class Entpreller:
+    """
+    Für Suchfelder mit <KeyRelease>: func läuft erst, wenn ms Millisekunden
+    lang keine Taste mehr kam, statt bei jedem Tastendruck.
+    """
+
+    VERZOEGERUNG_MS = 250
+
+    def __init__(self, widget, func, ms=VERZOEGERUNG_MS):
+        self.widget = widget
+        self.func = func
+        self.ms = ms
+        self._after = None
+
+    def __call__(self, event=None):
+        self.abbrechen()
+        self._after = self.widget.after(self.ms, self.jetzt)
+
+    def jetzt(self, event=None):
+        self.abbrechen()
+        self.func()
+
+    def abbrechen(self):
+        if self._after is not None:
+            self.widget.after_cancel(self._after)
+            self._after = None
+
+
+class Suchcache:
+    """
+    Die letzten vollständigen Suchergebnisse eines Fensters (LRU).
+
+    get(suche) liefert die Zeilen genau dieser Suche oder, wenn filter_fuer
+    gesetzt ist, eine Verfeinerung: enthält die neue Suche eine gespeicherte
+    (Tippen von "6SL" nach "6SL3210"), werden deren Zeilen mit
+    filter_fuer(suche) gefiltert, ohne die Datenbank zu fragen. Das ist nur
+    für Suchen mit LIKE '%…%' richtig (repository.like_search_pattern).
+    None heißt: nicht abgedeckt, die Datenbank muss gefragt werden.
+
+    Nur vollständige Ergebnisse ablegen (keine einzelne Seite); nach jedem
+    Schreibzugriff clear() aufrufen. Ergebnisse einer Hintergrundsuche mit dem
+    stand vom Start der Suche ablegen: lief inzwischen ein clear(), sind sie
+    veraltet und put() verwirft sie.
+    """
+
+    GROESSE = 16
+    # Größere Ergebnisse werden nicht gehalten; die nächste Suche fragt die Datenbank
+    MAX_ZEILEN = 5000
+
+    def __init__(self, filter_fuer=None, groesse=GROESSE, max_zeilen=MAX_ZEILEN):
+        self.filter_fuer = filter_fuer
+        self.groesse = groesse
+        self.max_zeilen = max_zeilen
+        self._eintraege = OrderedDict()
+        self.stand = 0
+
+    def get(self, suche):
+        if suche in self._eintraege:
+            self._eintraege.move_to_end(suche)
+            return self._eintraege[suche]
+        if self.filter_fuer is None:
+            return None
+        basis = [rows for gespeichert, rows in self._eintraege.items() if gespeichert in suche]
+        if not basis:
+            return None
+        passt = self.filter_fuer(suche)
+        rows = [row for row in min(basis, key=len) if passt(row)]
+        self.put(suche, rows)
+        return rows
+
+    def put(self, suche, rows, stand=None):
+        if len(rows) > self.max_zeilen or (stand is not None and stand != self.stand):
+            return
+        self._eintraege[suche] = rows
+        self._eintraege.move_to_end(suche)
+        while len(self._eintraege) > self.groesse:
+            self._eintraege.popitem(last=False)
+
+    def clear(self):
+        self._eintraege.clear()
+        self.stand += 1
@@ -1,70 +1,164 @@
-﻿import sqlite3
-import openpyxl
-import logging
-
-logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
-
-def init_reference_data_from_excel(excel_file="Konfiguration.xlsx", db_path="instandhaltung.db"):
-    """
-    Importiert Referenzdaten aus der Excel-Konfiguration:
-      - Jeder Blattname (außer Sonderblätter) wird als Abteilung genutzt.
-      - Zeile 1: Anlagen; ab Zeile 2: Anlagenteile.
-    """
-    try:
-        wb = openpyxl.load_workbook(excel_file)
-        logging.info(f"Excel '{excel_file}' geladen.")
-    except Exception as e:
-        logging.error(f"Fehler beim Laden von '{excel_file}': {e}")
-        return
-    
-    try:
-        with sqlite3.connect(db_path) as conn:
-            conn.execute("PRAGMA foreign_keys = ON;")
-            cursor = conn.cursor()
-            skip_sheets = {"General", "OptionalFields"}
-            
-            for sheet_name in wb.sheetnames:
-                if sheet_name in skip_sheets:
-                    continue
-                sheet = wb[sheet_name]
-                abt_name = sheet_name.strip()
-                if not abt_name:
-                    continue
-                cursor.execute("INSERT OR IGNORE INTO abteilungen (name) VALUES (?)", (abt_name,))
-                conn.commit()
-                cursor.execute("SELECT abteilung_id FROM abteilungen WHERE name=?", (abt_name,))
-                row = cursor.fetchone()
-                if row is None:
-                    continue
-                abt_id = row[0]
-                
-                # Anlagen aus Zeile 1
-                rows = list(sheet.iter_rows(min_row=1, max_row=1, values_only=True))
-                if not rows:
-                    continue
-                anlagen = [str(cell).strip() for cell in rows[0] if cell]
-                anlagen_ids = []
-                for anlage in anlagen:
-                    cursor.execute("INSERT OR IGNORE INTO anlagen (abteilung_id, name) VALUES (?, ?)", (abt_id, anlage))
-                    conn.commit()
-                    cursor.execute("SELECT anlage_id FROM anlagen WHERE abteilung_id=? AND name=?", (abt_id, anlage))
-                    r = cursor.fetchone()
-                    anlagen_ids.append(r[0] if r else None)
-                
-                # Anlagenteile ab Zeile 2
-                for row_values in sheet.iter_rows(min_row=2, values_only=True):
-                    for idx, cell in enumerate(row_values):
-                        if cell and idx < len(anlagen_ids) and anlagen_ids[idx]:
-                            anlagenteil = str(cell).strip()
-                            if anlagenteil:
-                                cursor.execute("INSERT OR IGNORE INTO anlagenteile (anlage_id, name) VALUES (?, ?)",
-                                               (anlagen_ids[idx], anlagenteil))
-                conn.commit()
-                logging.info(f"Referenzdaten für Abteilung '{abt_name}' importiert.")
-            logging.info("Alle Referenzdaten importiert.")
-    except Exception as e:
-        logging.error(f"Fehler beim Import der Referenzdaten: {e}")
-
-if __name__ == "__main__":
-    init_reference_data_from_excel()
-
+﻿import os
+import sqlite3
+import hashlib
+import datetime
+import logging
+import openpyxl
+from db_connection import configure_connection
+from refcache import get_referenz_cache
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+
+SKIP_SHEETS = {"General", "OptionalFields"}
+
+
+def _cell_text(value):
+    return str(value).strip() if value is not None else ""
+
+
+def read_reference_workbook(excel_file):
+    """
+    Liest die Hierarchie aus der Excel-Konfiguration:
+      - Jeder Blattname (außer Sonderblätter) wird als Abteilung genutzt.
+      - Zeile 1: Anlagen; ab Zeile 2 in derselben Spalte die Anlagenteile.
+    Liefert {abteilung: {anlage: {anlagenteil: None}}} in der Reihenfolge der Datei.
+    """
+    wb = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        hierarchie = {}
+        for sheet_name in wb.sheetnames:
+            abteilung = sheet_name.strip()
+            if sheet_name in SKIP_SHEETS or not abteilung:
+                continue
+            anlagen = hierarchie.setdefault(abteilung, {})
+            rows = wb[sheet_name].iter_rows(values_only=True)
+            spalten = [_cell_text(cell) for cell in next(rows, None) or ()]
+            for anlage in spalten:
+                if anlage:
+                    anlagen.setdefault(anlage, {})
+            for row in rows:
+                for idx, cell in enumerate(row[:len(spalten)]):
+                    teil = _cell_text(cell)
+                    if teil and spalten[idx]:
+                        anlagen[spalten[idx]][teil] = None
+        return hierarchie
+    finally:
+        wb.close()
+
+
+def apply_hierarchy(conn, hierarchie):
+    """
+    Fügt fehlende Abteilungen, Anlagen und Anlagenteile mengenweise ein; was es
+    schon gibt, bleibt unverändert (auch Einträge, die in der Datei fehlen).
+    Läuft in der Transaktion des Aufrufers. Liefert die Anzahl neuer Einträge
+    als (abteilungen, anlagen, anlagenteile).
+    """
+    abt_ids = dict(conn.execute("SELECT name, abteilung_id FROM abteilungen"))
+    neue_abteilungen = [(name,) for name in hierarchie if name not in abt_ids]
+    if neue_abteilungen:
+        conn.executemany("INSERT INTO abteilungen (name) VALUES (?)", neue_abteilungen)
+        abt_ids = dict(conn.execute("SELECT name, abteilung_id FROM abteilungen"))
+
+    def load_anlagen():
+        # Absteigend gelesen, damit bei doppelten Namen die älteste Anlage gilt
+        return {(abt_id, name): anlage_id for anlage_id, abt_id, name in
+                conn.execute("SELECT anlage_id, abteilung_id, name FROM anlagen ORDER BY anlage_id DESC")}
+
+    anlage_ids = load_anlagen()
+    neue_anlagen = [(abt_ids[abteilung], anlage)
+                    for abteilung, anlagen in hierarchie.items() for anlage in anlagen
+                    if (abt_ids[abteilung], anlage) not in anlage_ids]
+    if neue_anlagen:
+        conn.executemany("INSERT INTO anlagen (abteilung_id, name) VALUES (?, ?)", neue_anlagen)
+        anlage_ids = load_anlagen()
+
+    vorhandene_teile = set(conn.execute("SELECT anlage_id, name FROM anlagenteile"))
+    neue_teile = [(anlage_ids[(abt_ids[abteilung], anlage)], teil)
+                  for abteilung, anlagen in hierarchie.items()
+                  for anlage, teile in anlagen.items() for teil in teile
+                  if (anlage_ids[(abt_ids[abteilung], anlage)], teil) not in vorhandene_teile]
+    if neue_teile:
+        conn.executemany("INSERT INTO anlagenteile (anlage_id, name) VALUES (?, ?)", neue_teile)
+    return len(neue_abteilungen), len(neue_anlagen), len(neue_teile)
+
+
+def _file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+def _referenz_version(conn):
+    return conn.execute("SELECT version FROM referenz_version WHERE id = 1").fetchone()[0]
+
+
+def init_reference_data_from_excel(excel_file="Konfiguration.xlsx", db_path="instandhaltung.db", force=False):
+    """
+    Importiert die Referenzdaten aus der Excel-Konfiguration in einer
+    Transaktion; eingefügt wird nur, was noch fehlt. Eine bereits importierte
+    Datei wird übersprungen, solange sie unverändert ist (Größe und
+    Änderungszeit, sonst Inhalts-Hash) und die Referenztabellen seitdem nicht
+    geändert wurden. force importiert in jedem Fall.
+    Liefert True nach einem Import, False, wenn nichts zu tun war, None bei Fehlern.
+    """
+    datei = os.path.normcase(os.path.abspath(excel_file))
+    try:
+        stat = os.stat(excel_file)
+        conn = sqlite3.connect(db_path)
+    except (OSError, sqlite3.Error) as e:
+        logging.error(f"Fehler beim Zugriff auf '{excel_file}' oder '{db_path}': {e}")
+        return None
+
+    try:
+        configure_connection(conn)
+        gespeichert = conn.execute(
+            "SELECT groesse, mtime_ns, hash, referenz_version FROM referenz_import WHERE datei = ?", (datei,)
+        ).fetchone()
+        digest = None
+        if gespeichert and not force and gespeichert[3] == _referenz_version(conn):
+            if (gespeichert[0], gespeichert[1]) == (stat.st_size, stat.st_mtime_ns):
+                logging.info(f"Referenzdaten aus '{excel_file}' unverändert, Import übersprungen.")
+                return False
+            digest = _file_hash(excel_file)
+            if digest == gespeichert[2]:
+                # Nur der Zeitstempel hat sich geändert (z.B. Datei neu kopiert)
+                with conn:
+                    conn.execute("UPDATE referenz_import SET groesse = ?, mtime_ns = ? WHERE datei = ?",
+                                 (stat.st_size, stat.st_mtime_ns, datei))
+                logging.info(f"Referenzdaten aus '{excel_file}' inhaltlich unverändert, Import übersprungen.")
+                return False
+
+        digest = digest or _file_hash(excel_file)
+        hierarchie = read_reference_workbook(excel_file)
+        logging.info(f"Excel '{excel_file}' gelesen: {len(hierarchie)} Abteilungen.")
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            neu = apply_hierarchy(conn, hierarchie)
+            conn.execute("""
+                INSERT OR REPLACE INTO referenz_import (datei, groesse, mtime_ns, hash, referenz_version, importiert_am)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (datei, stat.st_size, stat.st_mtime_ns, digest, _referenz_version(conn),
+                  datetime.datetime.now().isoformat(timespec="seconds")))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        logging.info(f"Referenzdaten importiert: {neu[0]} Abteilungen, {neu[1]} Anlagen, {neu[2]} Anlagenteile neu.")
+    except Exception as e:
+        logging.error(f"Fehler beim Import der Referenzdaten: {e}")
+        return None
+    finally:
+        conn.close()
+    if any(neu):
+        # Der Zähler referenz_version wurde per Trigger erhöht; den Cache dieses
+        # Prozesses trotzdem sofort verwerfen.
+        get_referenz_cache(db_path).invalidate()
+    return True
+
+
+if __name__ == "__main__":
+    init_reference_data_from_excel()
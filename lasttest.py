@@ -0,0 +1,234 @@
+﻿import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import datetime
+import concurrent.futures
+import demo
+from benchmark import perzentil, umgebung
+from db_connection import get_manager, is_lock_error
+from refcache import get_referenz_cache
+from repository import PannenRepository
+
+# Lasttest mit mehreren Arbeitsplätzen auf einer gemeinsamen Datenbankdatei.
+# Jeder Arbeitsplatz ist ein eigener Prozess mit eigenem ConnectionManager
+# (wie ein laufendes Programm) und erzeugt Verkehr wie die Fenster:
+#   speichern - PannenFenster.save_panne: insert_panne mit Rücklesen der neuen Zeile
+#   filtern   - PannenFenster.filter_pannen: erste Seite mit allen Filtern
+#   bericht   - BerichteFenster.apply_filters: erste Seite mit Berichtsspalten
+# Die Aufträge kommen in festen Raten (Poisson-Ankünfte je Arbeitsplatz). Die
+# Latenz zählt ab dem geplanten Startzeitpunkt, enthält also auch das Warten
+# hinter einem langsamen Vorgänger; die reine Bearbeitungszeit steht daneben.
+#
+#   python lasttest.py --db kopie.db --arbeitsplaetze 8 --dauer 60 --speichern 6 --filtern 20 --berichte 4
+
+LASTTEST_DB_FILE = "lasttest.db"
+BERICHT_SPALTEN = ["id", "abteilung", "anlage", "datum", "beschreibung"]
+VORGAENGE = ("speichern", "filtern", "bericht")
+
+
+def _zeitraum(rng, jahr_von, jahr_bis):
+    start = datetime.date(rng.randint(jahr_von, jahr_bis), rng.randint(1, 12), 1)
+    return start.isoformat(), (start + datetime.timedelta(days=rng.choice((7, 30, 90)))).isoformat()
+
+
+class Arbeitsplatz:
+    """Erzeugt die Aufrufe eines Arbeitsplatzes mit zufälligen, aber gültigen Filtern."""
+
+    def __init__(self, db_path, nummer, seed):
+        self.repo = PannenRepository(db_path)
+        self.nummer = nummer
+        self.rng = random.Random(seed * 1000 + nummer)
+        cache = get_referenz_cache(db_path)
+        self.orte = []
+        for abteilung in cache.abteilungen():
+            for anlage in cache.anlagen(abteilung):
+                for teil in cache.anlagenteile(anlage, abteilung) or [""]:
+                    self.orte.append((abteilung, anlage, teil))
+        with self.repo._connect() as conn:
+            jahre = conn.execute("SELECT MIN(datum), MAX(datum) FROM pannen_daten").fetchone()
+        heute = datetime.date.today().year
+        self.jahr_von = int(jahre[0][:4]) if jahre[0] else heute
+        self.jahr_bis = int(jahre[1][:4]) if jahre[1] else heute
+
+    def speichern(self):
+        abteilung, anlage, teil = self.rng.choice(self.orte)
+        self.repo.insert_panne((
+            datetime.date.today().isoformat(), self.rng.choice(demo.SCHICHTEN), "", abteilung, anlage, teil, "",
+            f"Lasttest Arbeitsplatz {self.nummer}", "", "Lasttest", "Lasttest",
+            str(self.rng.randint(5, 240)), str(self.rng.randint(1, 5)), f"Arbeitsplatz {self.nummer}",
+        ))
+
+    def filtern(self):
+        abteilung, anlage, teil = self.rng.choice(self.orte)
+        start_date, end_date = _zeitraum(self.rng, self.jahr_von, self.jahr_bis)
+        # Wie im Fenster: nicht jedes Filterfeld ist gefüllt
+        self.repo.get_pannen_page(abteilung, anlage if self.rng.random() < 0.7 else "", start_date, end_date,
+                                  teil if self.rng.random() < 0.3 else "")
+
+    def bericht(self):
+        abteilung, anlage, _ = self.rng.choice(self.orte)
+        start_date, end_date = _zeitraum(self.rng, self.jahr_von, self.jahr_bis)
+        self.repo.get_pannen_page(abteilung, anlage if self.rng.random() < 0.5 else "", start_date, end_date,
+                                  columns=BERICHT_SPALTEN)
+
+
+def _fahrplan(rng, raten, dauer):
+    """Geplante Startzeitpunkte (Sekunden ab Beginn) je Vorgang; raten in Aufrufen pro Minute."""
+    plan = []
+    for vorgang, rate in raten.items():
+        if rate <= 0:
+            continue
+        zeitpunkt = rng.expovariate(rate / 60)
+        while zeitpunkt < dauer:
+            plan.append((zeitpunkt, vorgang))
+            zeitpunkt += rng.expovariate(rate / 60)
+    plan.sort()
+    return plan
+
+
+def arbeitsplatz_ausfuehren(db_path, nummer, seed, raten, dauer, beginn, checkpoint_intervall):
+    """
+    Läuft in einem eigenen Prozess. Wartet bis beginn (time.time()), arbeitet
+    den Fahrplan ab und liefert Latenzen, Fehler und die Sperrstatistik.
+    """
+    platz = Arbeitsplatz(db_path, nummer, seed)
+    manager = get_manager(db_path)
+    manager.start_checkpoints(checkpoint_intervall)
+    plan = _fahrplan(platz.rng, raten, dauer)
+    ergebnis = {vorgang: {"latenz": [], "dienstzeit": [], "sperrfehler": 0, "fehler": 0} for vorgang in VORGAENGE}
+    # Startzeitpunkt über die Uhr, damit alle Prozesse gleichzeitig loslegen
+    time.sleep(max(0.0, beginn - time.time()))
+    start = time.perf_counter()
+    for zeitpunkt, vorgang in plan:
+        warten = start + zeitpunkt - time.perf_counter()
+        if warten > 0:
+            time.sleep(warten)
+        anfang = time.perf_counter()
+        werte = ergebnis[vorgang]
+        try:
+            getattr(platz, vorgang)()
+        except Exception as e:
+            if is_lock_error(e):
+                werte["sperrfehler"] += 1
+            else:
+                werte["fehler"] += 1
+                logging.error(f"Arbeitsplatz {nummer}, {vorgang}: {e}")
+            continue
+        ende = time.perf_counter()
+        werte["latenz"].append(ende - (start + zeitpunkt))
+        werte["dienstzeit"].append(ende - anfang)
+    ergebnis["laufzeit"] = time.perf_counter() - start
+    manager.stop_checkpoints()
+    ergebnis["sperren"] = manager.metrics.snapshot()
+    manager.close_all()
+    return ergebnis
+
+
+def _kennzahlen(werte):
+    if not werte:
+        return None
+    ms = sorted(w * 1000 for w in werte)
+    return {
+        "p50_ms": round(perzentil(ms, 50), 2),
+        "p95_ms": round(perzentil(ms, 95), 2),
+        "p99_ms": round(perzentil(ms, 99), 2),
+        "max_ms": round(ms[-1], 2),
+    }
+
+
+def auswerten(ergebnisse, dauer):
+    """Fasst die Ergebnisse aller Arbeitsplätze zusammen."""
+    laufzeit = max([dauer] + [e["laufzeit"] for e in ergebnisse])
+    zusammenfassung = {"laufzeit_s": round(laufzeit, 2), "vorgaenge": {}}
+    for vorgang in VORGAENGE:
+        latenz = [w for e in ergebnisse for w in e[vorgang]["latenz"]]
+        dienstzeit = [w for e in ergebnisse for w in e[vorgang]["dienstzeit"]]
+        zusammenfassung["vorgaenge"][vorgang] = {
+            "anzahl": len(latenz),
+            "pro_s": round(len(latenz) / laufzeit, 2),
+            "sperrfehler": sum(e[vorgang]["sperrfehler"] for e in ergebnisse),
+            "fehler": sum(e[vorgang]["fehler"] for e in ergebnisse),
+            "latenz": _kennzahlen(latenz),
+            "dienstzeit": _kennzahlen(dienstzeit),
+        }
+    sperren = [e["sperren"] for e in ergebnisse]
+    zusammenfassung["sperren"] = {
+        "schreibvorgaenge": sum(s["writes"] for s in sperren),
+        "wiederholungen": sum(s["retries"] for s in sperren),
+        "sperr_timeouts": sum(s["lock_timeouts"] for s in sperren),
+        "wartezeit_max_s": max((s["wait_max_s"] for s in sperren), default=0.0),
+        "checkpoints": sum(s["checkpoints"] for s in sperren),
+        "checkpoints_blockiert": sum(s["checkpoints_busy"] for s in sperren),
+        "checkpoint_max_s": max((s["checkpoint_max_s"] for s in sperren), default=0.0),
+    }
+    return zusammenfassung
+
+
+def lasttest(db_path, arbeitsplaetze, dauer, raten, seed=1, checkpoint_intervall=None, vorlauf=2.0):
+    """Startet die Arbeitsplätze als Prozesse und liefert die Auswertung."""
+    logging.info(f"Lasttest auf '{db_path}': {arbeitsplaetze} Arbeitsplätze, {dauer} s, Raten/min je Platz {raten}")
+    # Prozesse starten (unter Windows per spawn) und Referenzdaten laden, bevor die Uhr läuft
+    beginn = time.time() + vorlauf + 0.2 * arbeitsplaetze
+    with concurrent.futures.ProcessPoolExecutor(arbeitsplaetze) as pool:
+        futures = [pool.submit(arbeitsplatz_ausfuehren, db_path, nummer, seed, raten, dauer, beginn,
+                               checkpoint_intervall)
+                   for nummer in range(1, arbeitsplaetze + 1)]
+        ergebnisse = [future.result() for future in futures]
+    zusammenfassung = auswerten(ergebnisse, dauer)
+    wal = db_path + "-wal"
+    zusammenfassung["wal_kb"] = round(os.path.getsize(wal) / 1024) if os.path.exists(wal) else 0
+    return zusammenfassung
+
+
+def ausgeben(zusammenfassung):
+    for vorgang, werte in zusammenfassung["vorgaenge"].items():
+        latenz = werte["latenz"] or {}
+        dienstzeit = werte["dienstzeit"] or {}
+        print(f"{vorgang:<10} {werte['anzahl']:>7} Aufrufe {werte['pro_s']:>8.2f}/s  "
+              f"Latenz p50 {latenz.get('p50_ms', 0):>8.2f} p95 {latenz.get('p95_ms', 0):>8.2f} "
+              f"p99 {latenz.get('p99_ms', 0):>8.2f} max {latenz.get('max_ms', 0):>8.2f} ms  "
+              f"(Bearbeitung p99 {dienstzeit.get('p99_ms', 0):.2f} ms)  "
+              f"Sperrfehler {werte['sperrfehler']}, Fehler {werte['fehler']}")
+    sperren = zusammenfassung["sperren"]
+    print(f"Schreibvorgänge {sperren['schreibvorgaenge']}, Wiederholungen {sperren['wiederholungen']}, "
+          f"Sperr-Timeouts {sperren['sperr_timeouts']}, längste Wartezeit {sperren['wartezeit_max_s']:.3f} s")
+    print(f"Checkpoints {sperren['checkpoints']} (blockiert {sperren['checkpoints_blockiert']}, "
+          f"längster {sperren['checkpoint_max_s']:.3f} s), WAL am Ende {zusammenfassung['wal_kb']} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lasttest mit mehreren Arbeitsplätzen auf einer Datenbankdatei.")
+    parser.add_argument("--db", default=LASTTEST_DB_FILE,
+                        help="Datenbankdatei (wird beschrieben; fehlt sie, wird sie mit Demodaten erzeugt)")
+    parser.add_argument("--arbeitsplaetze", type=int, default=4, help="Anzahl Prozesse")
+    parser.add_argument("--dauer", type=float, default=60, help="Sekunden")
+    parser.add_argument("--speichern", type=float, default=2, help="Speichervorgänge pro Minute je Arbeitsplatz")
+    parser.add_argument("--filtern", type=float, default=10, help="Filtervorgänge pro Minute je Arbeitsplatz")
+    parser.add_argument("--berichte", type=float, default=2, help="Berichtsabfragen pro Minute je Arbeitsplatz")
+    parser.add_argument("--checkpoint-intervall", type=float,
+                        help="Sekunden zwischen WAL-Checkpoints je Arbeitsplatz (Standard: config.json)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--fabriken", type=int, default=3, help="Größe der Demodaten, falls --db fehlt")
+    parser.add_argument("--ausgabe", help="Ergebnis zusätzlich als JSON speichern")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+
+    if not os.path.exists(args.db):
+        demo.create_config_excel()
+        demo.generate_pannen(args.db, seed=args.seed, fabriken=args.fabriken)
+    raten = {"speichern": args.speichern, "filtern": args.filtern, "bericht": args.berichte}
+    zusammenfassung = lasttest(args.db, args.arbeitsplaetze, args.dauer, raten, args.seed, args.checkpoint_intervall)
+    ausgeben(zusammenfassung)
+    if args.ausgabe:
+        with open(args.ausgabe, "w", encoding="utf-8") as f:
+            json.dump({"umgebung": umgebung(), "arbeitsplaetze": args.arbeitsplaetze, "raten_pro_min": raten,
+                       "ergebnis": zusammenfassung}, f, indent=2, ensure_ascii=False)
+    sys.exit(1 if zusammenfassung["sperren"]["sperr_timeouts"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,881 @@
+﻿import sqlite3
+import logging
+import csv
+import codecs
+import time
+import itertools
+import operator
+import os
+import glob
+import multiprocessing
+import concurrent.futures
+import hashlib
+import threading
+from queue import Empty, Full, Queue
+import openpyxl
+from db_connection import configure_connection, is_lock_error
+from migrations import AENDERUNGEN_TABELLEN, SUCH_FTS
+from repository import Aenderung
+from normalize import PANNEN_NORMALIZERS, normalizer_for_type
+from repository import ErsatzteileRepository, MotorenRepository
+
+# Normalisierer je Zieltabelle; Spalten ohne Eintrag werden unverändert übernommen
+IMPORT_NORMALIZERS = {
+    "pannen": PANNEN_NORMALIZERS,
+}
+
+BATCH_SIZE = 5000
+PROGRESS_INTERVAL_S = 2.0
+
+# Dateiendungen, die als CSV/TSV statt als Arbeitsmappe gelesen werden
+CSV_EXTENSIONS = {".csv", ".tsv", ".txt"}
+CSV_DELIMITERS = ";,\t|"
+CSV_SAMPLE_BYTES = 1 << 20
+
+# Ab so vielen Zeilen (und mindestens so vielen, wie die Tabelle schon hat)
+# werden Sekundärindizes während des Imports verworfen und am Ende neu
+# aufgebaut; das Sortieren beim Aufbau ist schneller als die Pflege je Zeile.
+INDEX_REBUILD_ROWS = 100000
+
+# Sichten, die in eine Tabelle mit Änderungsprotokoll schreiben
+PROTOKOLL_TABELLEN = {"pannen": "pannen_daten"}
+
+
+def read_excel_rows(file_path):
+    """
+    Öffnet das aktive Blatt im read_only-Modus und liefert (wb, headers, zeilen).
+    Die Zeilen werden beim Iterieren gelesen, der Speicherbedarf bleibt konstant.
+    Der Aufrufer schließt die Arbeitsmappe (wb.close()) nach dem Import.
+    """
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    rows = wb.active.iter_rows(values_only=True)
+    first = next(rows, None) or ()
+    headers = [str(cell).strip().lower() if cell is not None else "" for cell in first]
+    return wb, headers, rows
+
+
+def detect_encoding(sample):
+    """BOM, sonst UTF-8, wenn die Probe gültig ist, sonst Windows-1252 (ältere ERP-Exporte)."""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        sample.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # Ein am Ende der Probe abgeschnittenes Zeichen zählt nicht
+        if e.start < len(sample) - 3:
+            return "cp1252"
+    return "utf-8"
+
+
+def detect_delimiter(header_line, file_path=""):
+    counts = {delimiter: header_line.count(delimiter) for delimiter in CSV_DELIMITERS}
+    delimiter = max(counts, key=counts.get)
+    if counts[delimiter] == 0:
+        return "\t" if file_path.lower().endswith(".tsv") else ";"
+    return delimiter
+
+
+def read_csv_rows(file_path, encoding=None, delimiter=None):
+    """
+    Öffnet eine CSV/TSV-Datei und liefert (datei, headers, zeilen) wie
+    read_excel_rows; Zeichensatz und Trennzeichen werden erkannt, wenn nicht
+    angegeben. Leere Felder werden zu None. Der Aufrufer schließt die Datei.
+    """
+    if encoding is None:
+        with open(file_path, "rb") as f:
+            encoding = detect_encoding(f.read(CSV_SAMPLE_BYTES))
+    f = open(file_path, encoding=encoding, newline="", errors="replace" if encoding == "cp1252" else "strict")
+    try:
+        if delimiter is None:
+            delimiter = detect_delimiter(f.readline(), file_path)
+            f.seek(0)
+        reader = csv.reader(f, delimiter=delimiter)
+        headers = [cell.strip().lower() for cell in next(reader, [])]
+    except BaseException:
+        f.close()
+        raise
+    logging.info(f"CSV '{file_path}': Zeichensatz {encoding}, Trennzeichen {delimiter!r}")
+    return f, headers, ([value or None for value in row] for row in reader)
+
+
+def read_rows(file_path):
+    """Excel oder CSV/TSV je nach Dateiendung; liefert (quelle, headers, zeilen), quelle.close() schließt."""
+    if os.path.splitext(file_path)[1].lower() in CSV_EXTENSIONS:
+        return read_csv_rows(file_path)
+    return read_excel_rows(file_path)
+
+
+def table_columns(conn, table_name):
+    """Spaltennamen -> deklarierter Typ, in Tabellenreihenfolge."""
+    return {row[1].strip().lower(): row[2].upper() for row in conn.execute(f"PRAGMA table_info({table_name})")}
+
+
+class ImportFortschritt:
+    """Protokolliert regelmäßig Zeilenzahl und Durchsatz (Zeilen/s)."""
+
+    def __init__(self, name, callback=None, interval_s=PROGRESS_INTERVAL_S):
+        self.name = name
+        self.callback = callback
+        self.interval_s = interval_s
+        self.start = time.perf_counter()
+        self._last_report = self.start
+        self.rows = 0
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.start
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def add(self, count):
+        self.rows += count
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval_s:
+            self._last_report = now
+            self.report()
+
+    def report(self, final=False):
+        status = "fertig" if final else "läuft"
+        logging.info(f"Import '{self.name}' {status}: {self.rows} Zeilen, {self.rate():.0f} Zeilen/s")
+        if self.callback:
+            self.callback(self.rows, self.rate())
+
+
+class ZeilenUmwandler:
+    """
+    Bildet Importzeilen (passend zu headers) auf die gemeinsamen Spalten der
+    Zieltabelle ab, normalisiert sie und überspringt leere Zeilen. Zahlen-
+    spalten (INTEGER/REAL) werden typisiert, sonst gelten IMPORT_NORMALIZERS.
+    Läuft ohne Datenbankverbindung (auch in Parser-Prozessen).
+    """
+
+    def __init__(self, headers, db_columns, table_name):
+        self.columns = [col for col in db_columns if col in headers]
+        if not self.columns:
+            return
+        positions = [headers.index(col) for col in self.columns]
+        normalizers = {col: normalizer_for_type(db_columns[col]) for col in self.columns}
+        normalizers = {col: func for col, func in normalizers.items() if func is not None}
+        normalizers.update(IMPORT_NORMALIZERS.get(table_name, {}))
+        self._width = max(positions) + 1
+        self._pick = operator.itemgetter(*positions) if len(positions) > 1 else lambda row: (row[positions[0]],)
+        self._convert_columns = [(i, normalizers[col]) for i, col in enumerate(self.columns) if col in normalizers]
+
+    def convert(self, row):
+        if len(row) < self._width:
+            row = tuple(row) + (None,) * (self._width - len(row))
+        values = self._pick(row)
+        if self._convert_columns:
+            values = list(values)
+            for i, converter in self._convert_columns:
+                values[i] = converter(values[i])
+            values = tuple(values)
+        return values
+
+    def convert_rows(self, rows):
+        for row in rows:
+            # row.count zählt in C und ist deutlich schneller als any(...)
+            if row and row.count(None) + row.count("") < len(row):
+                yield self.convert(row)
+
+    def convert_numbered(self, rows, first_row=2):
+        """Wie convert_rows, liefert aber (zeilennummer, werte) mit der Zeilennummer der Quelle."""
+        for number, row in enumerate(rows, first_row):
+            if row and row.count(None) + row.count("") < len(row):
+                yield number, self.convert(row)
+
+
+def prefetch_batches(rows, batch_size, depth=4):
+    """
+    Liest und wandelt Blöcke in einem Hintergrund-Thread vor. sqlite3 gibt den
+    GIL während des Schreibens frei, so überlappen Parsen und Schreiben.
+    """
+    queue = Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return
+            except Full:
+                continue
+
+    def produce():
+        try:
+            while not stop.is_set():
+                batch = list(itertools.islice(rows, batch_size))
+                put(batch)
+                if not batch:
+                    return
+        except BaseException as e:
+            put(e)
+
+    thread = threading.Thread(target=produce, name="import-parser", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = queue.get()
+            if isinstance(item, BaseException):
+                raise item
+            if not item:
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def secondary_indexes(conn, table_name):
+    """(name, sql) der selbst angelegten, nicht eindeutigen Indizes einer Tabelle."""
+    namen = [row[1] for row in conn.execute(f"PRAGMA index_list({table_name})") if row[2] == 0 and row[3] == "c"]
+    return [conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone()
+            for name in namen]
+
+
+def suspend_fts(conn, table_name):
+    """
+    Entfernt in der laufenden Transaktion den Trigger, der neue Zeilen einzeln
+    in den Trigramm-Index (migrations.SUCH_FTS) einträgt. Liefert (trigger_sql,
+    letzte id) für restore_fts oder None, wenn die Tabelle keinen hat.
+    """
+    if table_name not in SUCH_FTS:
+        return None
+    trigger = f"{table_name}_fts_ai"
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (trigger,)).fetchone()
+    if row is None:
+        return None
+    conn.execute(f"DROP TRIGGER {trigger}")
+    return row[0], conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table_name}").fetchone()[0]
+
+
+def restore_fts(conn, table_name, suspended):
+    """
+    Trägt die seit suspend_fts eingefügten Zeilen mit einer Anweisung in den
+    Trigramm-Index ein (etwa fünfmal schneller als der Trigger je Zeile) und
+    legt den Trigger wieder an. Neue Zeilen haben immer eine höhere id.
+    """
+    trigger_sql, letzte_id = suspended
+    spalten = ", ".join(SUCH_FTS[table_name])
+    conn.execute(f"INSERT INTO {table_name}_fts (rowid, {spalten}) "
+                 f"SELECT id, {spalten} FROM {table_name} WHERE id > ?", (letzte_id,))
+    conn.execute(trigger_sql)
+
+
+def suspend_aenderungen(conn, table_name):
+    """
+    Entfernt in der laufenden Transaktion den Trigger, der jede neue Zeile ins
+    Änderungsprotokoll (migrations.AENDERUNGEN_TABELLEN) schreibt. Liefert
+    (tabelle, trigger_sql) für restore_aenderungen oder None.
+    """
+    tabelle = PROTOKOLL_TABELLEN.get(table_name, table_name)
+    if tabelle not in AENDERUNGEN_TABELLEN:
+        return None
+    trigger = f"{tabelle}_aenderung_ai"
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (trigger,)).fetchone()
+    if row is None:
+        return None
+    conn.execute(f"DROP TRIGGER {trigger}")
+    return tabelle, row[0]
+
+
+def restore_aenderungen(conn, suspended):
+    """Legt den Trigger wieder an; offene Fenster laden die Tabelle einmal neu statt je Zeile."""
+    tabelle, trigger_sql = suspended
+    conn.execute(trigger_sql)
+    conn.execute("INSERT INTO aenderungen (tabelle, zeile_id, art) VALUES (?, 0, ?)", (tabelle, Aenderung.NEU_LADEN))
+
+
+def insert_sql(table_name, columns):
+    return f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+
+
+def write_batch(conn, sql, batch, label):
+    """
+    Schreibt einen Block per executemany in der laufenden Transaktion. Schlägt er
+    fehl, wird er zeilenweise wiederholt; fehlerhafte Zeilen werden protokolliert.
+    Liefert (eingefuegt, meldungen).
+    """
+    conn.execute("SAVEPOINT block")
+    try:
+        conn.executemany(sql, batch)
+        conn.execute("RELEASE block")
+        return len(batch), []
+    except sqlite3.Error as e:
+        if is_lock_error(e):
+            raise
+        conn.execute("ROLLBACK TO block")
+        conn.execute("RELEASE block")
+    inserted = 0
+    messages = []
+    for data in batch:
+        try:
+            conn.execute(sql, data)
+            inserted += 1
+        except sqlite3.Error as row_error:
+            if is_lock_error(row_error):
+                raise
+            messages.append(f"{row_error}. Daten: {data}")
+            logging.error(f"Fehler beim Einfügen ({label}): {row_error}. Daten: {data}")
+    return inserted, messages
+
+
+def import_rows(conn, table_name, headers, rows, batch_size=BATCH_SIZE, progress=None,
+                index_rebuild_rows=INDEX_REBUILD_ROWS):
+    """
+    Schreibt rows (Sequenzen passend zu headers) in table_name: nur Spalten, die
+    in beiden vorkommen; leere Zeilen werden übersprungen. Alles läuft in einer
+    Transaktion, geschrieben wird blockweise per executemany. Schlägt ein Block
+    fehl, wird er zeilenweise wiederholt und nur die fehlerhaften Zeilen werden
+    protokolliert und verworfen. Große Importe bauen die Sekundärindizes am
+    Ende neu auf (index_rebuild_rows, None schaltet das ab); den Trigramm-Index
+    ergänzt immer erst das Ende der Transaktion, ebenso den einen Eintrag
+    "neu_laden" im Änderungsprotokoll.
+    Liefert (eingefuegt, fehler).
+    """
+    umwandler = ZeilenUmwandler(headers, table_columns(conn, table_name), table_name)
+    if not umwandler.columns:
+        logging.warning(f"Keine gemeinsamen Spalten zwischen Import und Tabelle '{table_name}' gefunden.")
+        return 0, 0
+    logging.info(f"Import nach '{table_name}', Spalten: {umwandler.columns}")
+    return write_rows(conn, table_name, umwandler.columns, umwandler.convert_rows(rows),
+                      batch_size, progress, index_rebuild_rows)
+
+
+def write_rows(conn, table_name, columns, rows, batch_size=BATCH_SIZE, progress=None,
+               index_rebuild_rows=INDEX_REBUILD_ROWS):
+    """
+    Schreibt bereits umgewandelte Zeilen (Werte in der Reihenfolge von columns);
+    der Ablauf ist derselbe wie bei import_rows. Liefert (eingefuegt, fehler).
+    """
+    sql = insert_sql(table_name, columns)
+    if progress is None:
+        progress = ImportFortschritt(table_name)
+    inserted = errors = 0
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    batches = prefetch_batches(rows, batch_size)
+    try:
+        fts = suspend_fts(conn, table_name)
+        aenderungen = suspend_aenderungen(conn, table_name)
+        indexes = secondary_indexes(conn, table_name) if index_rebuild_rows else []
+        if indexes:
+            index_rebuild_rows = max(index_rebuild_rows, conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0])
+        dropped = []
+        for batch in batches:
+            count, messages = write_batch(conn, sql, batch, table_name)
+            inserted += count
+            errors += len(messages)
+            progress.add(len(batch))
+            if indexes and not dropped and inserted >= index_rebuild_rows:
+                # Innerhalb der Transaktion: bei einem Abbruch bleiben die Indizes erhalten
+                for name, _ in indexes:
+                    conn.execute(f"DROP INDEX {name}")
+                dropped = indexes
+                logging.info(f"Import nach '{table_name}': {len(dropped)} Indizes werden am Ende neu aufgebaut.")
+        for _, index_sql in dropped:
+            conn.execute(index_sql)
+        if fts:
+            restore_fts(conn, table_name, fts)
+        if aenderungen:
+            restore_aenderungen(conn, aenderungen)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        batches.close()
+    progress.report(final=True)
+    return inserted, errors
+
+
+def dynamic_populate(file_path, db_path, table_name, batch_size=BATCH_SIZE, progress_callback=None):
+    """
+    Liest die Excel-Datei (read_only) oder CSV/TSV-Datei zeilenweise und überträgt
+    alle Werte in die angegebene Tabelle. Es werden nur die Spalten befüllt, die
+    sowohl in der Datei als auch in der Datenbank vorhanden sind; die erste Zeile
+    enthält die Header.
+    progress_callback(zeilen, zeilen_pro_s) wird regelmäßig aufgerufen.
+    Liefert (eingefuegt, fehler) oder None, wenn die Datei nicht lesbar ist.
+    """
+    try:
+        wb, headers, rows = read_rows(file_path)
+        logging.info(f"Header aus '{file_path}': {headers}")
+    except Exception as e:
+        logging.error(f"Fehler beim Laden der Datei '{file_path}': {e}")
+        return None
+
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            configure_connection(conn)
+            # Größerer Seitencache für Indexpflege während des Imports (in KiB)
+            conn.execute("PRAGMA cache_size = -65536")
+            progress = ImportFortschritt(f"{file_path} -> {table_name}", progress_callback)
+            result = import_rows(conn, table_name, headers, rows, batch_size, progress)
+        finally:
+            conn.close()
+        logging.info(f"Daten aus '{file_path}' in Tabelle '{table_name}' importiert: "
+                     f"{result[0]} Zeilen, {result[1]} Fehler.")
+        return result
+    except Exception as e:
+        logging.error(f"Fehler beim Import in Tabelle '{table_name}': {e}")
+        return None
+    finally:
+        wb.close()
+
+
+# --- Verzeichnisimport -------------------------------------------------------
+# Parser-Prozesse lesen je eine Arbeitsmappe (openpyxl ist CPU-gebunden) und
+# schicken umgewandelte Zeilenblöcke über eine Queue an den Hauptprozess, der
+# als einziger schreibt. Die Queue ist begrenzt, damit schnelle Parser den
+# Schreiber nicht mit Daten überfluten. Bricht der Schreiber ab, setzt er das
+# Abbruch-Event und leert die Queue, bis alle Parser aufgegeben haben.
+
+_parser_queue = None
+_parser_abbruch = None
+
+
+def _init_parser(queue, abbruch):
+    global _parser_queue, _parser_abbruch
+    _parser_queue = queue
+    _parser_abbruch = abbruch
+    # Nach einem Abbruch nicht beim Beenden auf das Leeren der Queue warten; im
+    # Normalfall hat der Schreiber ohnehin alles bis zur Meldung "ende" gelesen
+    queue.cancel_join_thread()
+
+
+def _parse_workbook(file_path, db_columns, table_name, batch_size):
+    queue = _parser_queue
+    try:
+        wb, headers, rows = read_rows(file_path)
+        try:
+            umwandler = ZeilenUmwandler(headers, db_columns, table_name)
+            if not umwandler.columns:
+                queue.put(("fehler", file_path, f"Keine gemeinsamen Spalten mit Tabelle '{table_name}'"))
+                return
+            columns = tuple(umwandler.columns)
+            rows = umwandler.convert_rows(rows)
+            while True:
+                batch = list(itertools.islice(rows, batch_size))
+                if not batch or _parser_abbruch.is_set():
+                    break
+                queue.put(("zeilen", file_path, columns, batch))
+        finally:
+            wb.close()
+        queue.put(("ende", file_path, None))
+    except Exception as e:
+        queue.put(("fehler", file_path, f"{type(e).__name__}: {e}"))
+
+
+class DateiStatistik:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.start = None
+        self.duration_s = None
+        self.rows = 0
+        self.inserted = 0
+        self.errors = []
+        self.failed = False
+
+    def started(self):
+        # Die Dauer zählt ab der ersten Nachricht des Parsers, nicht ab dem Einreihen
+        if self.start is None:
+            self.start = time.perf_counter()
+
+    def finish(self):
+        self.started()
+        self.duration_s = time.perf_counter() - self.start
+
+    def as_dict(self):
+        return {
+            "datei": self.file_path,
+            "zeilen": self.rows,
+            "eingefuegt": self.inserted,
+            "fehler": len(self.errors),
+            "meldungen": self.errors[:20],
+            "abgebrochen": self.failed,
+            "dauer_s": round(self.duration_s or 0.0, 2),
+        }
+
+
+def import_directory(directory, db_path, table_name, pattern="*.xlsx", workers=None, batch_size=BATCH_SIZE):
+    """
+    Importiert alle Dateien eines Verzeichnisses (pattern, Excel oder CSV) in table_name.
+    Gelesen wird parallel in workers Prozessen (Standard: alle Kerne), geschrieben
+    nur vom aufrufenden Prozess; jeder Block wird einzeln bestätigt.
+    Liefert je Datei ein Dict mit Zeilen, eingefügten Zeilen, Fehlern und Dauer.
+    """
+    files = sorted(glob.glob(os.path.join(directory, pattern)))
+    # Von Excel angelegte Sperrdateien (~$Mappe.xlsx) auslassen
+    files = [f for f in files if not os.path.basename(f).startswith("~$")]
+    if not files:
+        logging.warning(f"Keine Dateien '{pattern}' in '{directory}' gefunden.")
+        return []
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+
+    conn = sqlite3.connect(db_path)
+    try:
+        configure_connection(conn)
+        conn.execute("PRAGMA cache_size = -65536")
+        db_columns = table_columns(conn, table_name)
+        stats = {f: DateiStatistik(f) for f in files}
+        offen = set(files)
+        progress = ImportFortschritt(f"{directory} -> {table_name}")
+        queue = multiprocessing.Queue(maxsize=workers * 4)
+        abbruch = multiprocessing.Event()
+        logging.info(f"Importiere {len(files)} Dateien aus '{directory}' mit {workers} Parser-Prozessen.")
+        with concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_parser,
+                                                    initargs=(queue, abbruch)) as pool:
+            futures = {pool.submit(_parse_workbook, f, db_columns, table_name, batch_size): f for f in files}
+            try:
+                _write_messages(conn, table_name, queue, futures, stats, offen, progress)
+            except BaseException:
+                # Sonst warten Parser in queue.put und das Verlassen des with-Blocks hängt
+                abbruch.set()
+                for future in futures:
+                    future.cancel()
+                while not all(future.done() for future in futures):
+                    try:
+                        queue.get(timeout=0.1)
+                    except Empty:
+                        pass
+                raise
+        progress.report(final=True)
+    finally:
+        conn.close()
+
+    result = [stats[f].as_dict() for f in files]
+    for entry in result:
+        logging.info(f"{os.path.basename(entry['datei'])}: {entry['eingefuegt']}/{entry['zeilen']} Zeilen, "
+                     f"{entry['fehler']} Fehler, {entry['dauer_s']} s" + (" (abgebrochen)" if entry["abgebrochen"] else ""))
+    return result
+
+
+def _write_messages(conn, table_name, queue, futures, stats, offen, progress):
+    """Schreibt die Blöcke der Parser, bis für jede Datei das Ende gemeldet ist."""
+    statements = {}
+    while offen:
+        try:
+            message = queue.get(timeout=1.0)
+        except Empty:
+            # Abgestürzte Parser melden sich nicht mehr über die Queue
+            for future, file_path in futures.items():
+                if file_path in offen and future.done() and future.exception() is not None:
+                    stat = stats[file_path]
+                    stat.failed = True
+                    stat.errors.append(f"Parser-Prozess abgebrochen: {future.exception()}")
+                    stat.finish()
+                    offen.discard(file_path)
+            continue
+        kind, file_path, *payload = message
+        stat = stats[file_path]
+        stat.started()
+        if kind == "zeilen":
+            columns, batch = payload
+            sql = statements.get(columns)
+            if sql is None:
+                sql = statements[columns] = insert_sql(table_name, columns)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                fts = suspend_fts(conn, table_name)
+                aenderungen = suspend_aenderungen(conn, table_name)
+                inserted, messages = write_batch(conn, sql, batch, os.path.basename(file_path))
+                if fts:
+                    restore_fts(conn, table_name, fts)
+                if aenderungen:
+                    restore_aenderungen(conn, aenderungen)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            stat.rows += len(batch)
+            stat.inserted += inserted
+            stat.errors.extend(messages)
+            progress.add(len(batch))
+        else:
+            if kind == "fehler":
+                stat.failed = True
+                stat.errors.append(payload[0])
+                logging.error(f"Import von '{file_path}' abgebrochen: {payload[0]}")
+            stat.finish()
+            offen.discard(file_path)
+
+
+# --- Inkrementeller Import ---------------------------------------------------
+# Zeilen werden über einen natürlichen Schlüssel zugeordnet und am Hash der
+# importierten Werte verglichen (Tabelle import_fingerprints, Migration 10).
+# Geschrieben werden nur neue, geänderte und aus der Quelle verschwundene Zeilen.
+
+# Dieselben Schlüssel wie upsert_many der Repositories, damit beide Wege
+# dieselben Zeilen als einen Datensatz ansehen
+IMPORT_KEYS = {
+    "motoren": MotorenRepository.UPSERT_KEY,
+    "ersatzteile": ErsatzteileRepository.UPSERT_KEY,
+}
+
+REPORT_LIMIT = 200
+_TRENNER = "\x1f"
+
+
+def _text(value):
+    # Excel liefert Zahlen, die TEXT-Spalten speichern Text; None und '' gelten als gleich
+    return "" if value is None else str(value).strip()
+
+
+def row_hash(columns, values):
+    # Die Spaltenliste geht mit ein: kommt eine Spalte hinzu, gilt jede Zeile als geändert
+    text = _TRENNER.join(columns) + "\x1e" + _TRENNER.join(map(_text, values))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class AbgleichBericht:
+    def __init__(self, table_name, key_columns, dry_run=False):
+        self.table_name = table_name
+        self.key_columns = key_columns
+        self.dry_run = dry_run
+        self.start = time.perf_counter()
+        self.duration_s = None
+        self.rows = 0
+        self.inserted = []
+        self.updated = []
+        self.deleted = []
+        self.unchanged = 0
+        self.changes = []
+        self.errors = []
+
+    def error(self, message):
+        self.errors.append(message)
+        logging.error(f"Abgleich '{self.table_name}': {message}")
+
+    def finish(self):
+        self.duration_s = time.perf_counter() - self.start
+
+    def as_dict(self):
+        def keys(entries):
+            return [key.split(_TRENNER) for key in entries[:REPORT_LIMIT]]
+        return {
+            "tabelle": self.table_name,
+            "schluessel": list(self.key_columns),
+            "probelauf": self.dry_run,
+            "zeilen": self.rows,
+            "eingefuegt": len(self.inserted),
+            "geaendert": len(self.updated),
+            "geloescht": len(self.deleted),
+            "unveraendert": self.unchanged,
+            "fehler": len(self.errors),
+            "meldungen": self.errors[:REPORT_LIMIT],
+            "neue_schluessel": keys(self.inserted),
+            "geloeschte_schluessel": keys(self.deleted),
+            "aenderungen": self.changes[:REPORT_LIMIT],
+            "dauer_s": round(self.duration_s or 0.0, 2),
+        }
+
+
+def _read_source(umwandler, rows, key_columns, bericht, progress):
+    """Liest die Quelle in ein Dict schluessel -> (werte, hash)."""
+    columns = umwandler.columns
+    key_positions = [columns.index(col) for col in key_columns]
+    quelle = {}
+    for values in umwandler.convert_rows(rows):
+        bericht.rows += 1
+        progress.add(1)
+        key_values = [_text(values[i]) for i in key_positions]
+        if not any(key_values):
+            bericht.error(f"Zeile ohne Schlüssel übersprungen: {values}")
+            continue
+        key = _TRENNER.join(key_values)
+        if key in quelle:
+            bericht.error(f"Doppelter Schlüssel {key_values}, Zeile übersprungen.")
+            continue
+        quelle[key] = (values, row_hash(columns, values))
+    return quelle
+
+
+def _load_fingerprints(conn, table_name):
+    """schluessel -> (zeilen_id, hash); Einträge zu inzwischen gelöschten Zeilen werden entfernt."""
+    bekannt = {}
+    verwaist = []
+    for key, zeilen_id, digest, vorhanden in conn.execute(f"""
+        SELECT f.schluessel, f.zeilen_id, f.hash, t.id
+        FROM import_fingerprints f LEFT JOIN {table_name} t ON t.id = f.zeilen_id
+        WHERE f.tabelle = ?
+    """, (table_name,)):
+        if vorhanden is None:
+            verwaist.append((table_name, key))
+        else:
+            bekannt[key] = (zeilen_id, digest)
+    if verwaist:
+        conn.executemany("DELETE FROM import_fingerprints WHERE tabelle = ? AND schluessel = ?", verwaist)
+    return bekannt
+
+
+def _match_untracked(conn, table_name, columns, key_columns, keys):
+    """
+    Ordnet Schlüssel ohne Fingerprint vorhandenen Zeilen zu (z.B. nach einem
+    früheren Vollimport): schluessel -> (zeilen_id, hash der gespeicherten Werte).
+    """
+    key_positions = [columns.index(col) for col in key_columns]
+    gefunden = {}
+    for row in conn.execute(f"""
+        SELECT id, {', '.join(columns)} FROM {table_name}
+        WHERE id NOT IN (SELECT zeilen_id FROM import_fingerprints WHERE tabelle = ?)
+        ORDER BY id
+    """, (table_name,)):
+        values = row[1:]
+        key = _TRENNER.join(_text(values[i]) for i in key_positions)
+        if key in keys and key not in gefunden:
+            gefunden[key] = (row[0], row_hash(columns, values))
+    return gefunden
+
+
+def _describe_changes(conn, table_name, columns, quelle, updated):
+    """Alte und neue Werte der geänderten Spalten (für den Bericht, höchstens REPORT_LIMIT Zeilen)."""
+    changes = []
+    for key, zeilen_id in updated[:REPORT_LIMIT]:
+        alt = conn.execute(f"SELECT {', '.join(columns)} FROM {table_name} WHERE id = ?", (zeilen_id,)).fetchone()
+        neu = quelle[key][0]
+        spalten = {col: [a, n] for col, a, n in zip(columns, alt, neu) if _text(a) != _text(n)}
+        changes.append({"schluessel": key.split(_TRENNER), "id": zeilen_id, "spalten": spalten})
+    return changes
+
+
+def sync_rows(conn, table_name, headers, rows, key_columns=None, delete_missing=True, dry_run=False, progress=None):
+    """
+    Gleicht table_name mit rows ab (inkrementeller Import). Zeilen werden über
+    key_columns (Standard: IMPORT_KEYS) zugeordnet und am Inhalts-Hash der
+    importierten Spalten verglichen; geschrieben werden nur neue und geänderte
+    Zeilen sowie mit delete_missing die Zeilen eines früheren Imports, die in der
+    Quelle fehlen. Nie importierte Zeilen (z.B. in der Oberfläche erfasst) bleiben
+    unberührt. Die Quelle wird vor der Schreibtransaktion komplett gelesen.
+    Mit dry_run wird nur der Bericht erstellt. Liefert einen AbgleichBericht.
+    """
+    key_columns = tuple(key_columns or IMPORT_KEYS.get(table_name, ()))
+    if not key_columns:
+        raise ValueError(f"Kein Schlüssel für Tabelle '{table_name}' konfiguriert.")
+    umwandler = ZeilenUmwandler(headers, table_columns(conn, table_name), table_name)
+    fehlend = [col for col in key_columns if col not in umwandler.columns]
+    if fehlend:
+        raise ValueError(f"Schlüsselspalten {fehlend} fehlen im Import nach '{table_name}'.")
+    columns = umwandler.columns
+    bericht = AbgleichBericht(table_name, key_columns, dry_run)
+    if progress is None:
+        progress = ImportFortschritt(table_name)
+    quelle = _read_source(umwandler, rows, key_columns, bericht, progress)
+    progress.report(final=True)
+    if not quelle and delete_missing:
+        # Eine leere Quelle ist fast immer ein Fehler (falsches Blatt) und würde alles löschen
+        logging.warning(f"Quelle für '{table_name}' enthält keine Zeilen, es wird nichts gelöscht.")
+        delete_missing = False
+
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        bekannt = _load_fingerprints(conn, table_name)
+        offen = {key for key in quelle if key not in bekannt}
+        zugeordnet = _match_untracked(conn, table_name, columns, key_columns, offen) if offen else {}
+        fingerprints = []
+        for key, (values, digest) in quelle.items():
+            if key in bekannt:
+                zeilen_id, alt = bekannt[key]
+            elif key in zugeordnet:
+                zeilen_id, alt = zugeordnet[key]
+                fingerprints.append((table_name, key, zeilen_id, digest))
+            else:
+                bericht.inserted.append(key)
+                continue
+            if alt == digest:
+                bericht.unchanged += 1
+            else:
+                bericht.updated.append((key, zeilen_id))
+        if delete_missing:
+            bericht.deleted = [key for key in bekannt if key not in quelle]
+        bericht.changes = _describe_changes(conn, table_name, columns, quelle, bericht.updated)
+
+        if dry_run:
+            conn.rollback()
+        else:
+            _apply_sync(conn, table_name, columns, quelle, bekannt, bericht, fingerprints)
+            conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    bericht.finish()
+    return bericht
+
+
+def _apply_sync(conn, table_name, columns, quelle, bekannt, bericht, fingerprints):
+    sql_insert = insert_sql(table_name, columns)
+    sql_update = f"UPDATE {table_name} SET {', '.join(f'{col} = ?' for col in columns)} WHERE id = ?"
+    fehlgeschlagen = set()
+    # Bei Sichten (INSTEAD OF-Trigger) setzt SQLite lastrowid nicht; unter der
+    # Schreibsperre hat die neue Zeile die größte id der Basistabelle
+    basis = PROTOKOLL_TABELLEN.get(table_name)
+    # Zeilenweise, damit die neue ID feststeht und ein Fehler nur seine Zeile betrifft;
+    # es sind üblicherweise nur wenige Zeilen
+    for key in bericht.inserted:
+        values, digest = quelle[key]
+        try:
+            zeilen_id = conn.execute(sql_insert, values).lastrowid
+            if basis is not None:
+                zeilen_id = conn.execute(f"SELECT MAX(id) FROM {basis}").fetchone()[0]
+            fingerprints.append((table_name, key, zeilen_id, digest))
+        except sqlite3.Error as e:
+            if is_lock_error(e):
+                raise
+            fehlgeschlagen.add(key)
+            bericht.error(f"{e}. Daten: {values}")
+    for key, zeilen_id in bericht.updated:
+        values, digest = quelle[key]
+        try:
+            conn.execute(sql_update, tuple(values) + (zeilen_id,))
+            fingerprints.append((table_name, key, zeilen_id, digest))
+        except sqlite3.Error as e:
+            if is_lock_error(e):
+                raise
+            fehlgeschlagen.add(key)
+            bericht.error(f"{e}. Daten: {values}")
+    if bericht.deleted:
+        conn.executemany(f"DELETE FROM {table_name} WHERE id = ?", [(bekannt[key][0],) for key in bericht.deleted])
+        conn.executemany("DELETE FROM import_fingerprints WHERE tabelle = ? AND schluessel = ?",
+                         [(table_name, key) for key in bericht.deleted])
+    conn.executemany("INSERT OR REPLACE INTO import_fingerprints (tabelle, schluessel, zeilen_id, hash) VALUES (?, ?, ?, ?)",
+                     fingerprints)
+    if fehlgeschlagen:
+        bericht.inserted = [key for key in bericht.inserted if key not in fehlgeschlagen]
+        bericht.updated = [entry for entry in bericht.updated if entry[0] not in fehlgeschlagen]
+
+
+def sync_populate(file_path, db_path, table_name, key_columns=None, delete_missing=True, dry_run=False,
+                  progress_callback=None):
+    """
+    Inkrementeller Import einer Excel- oder CSV-Datei (siehe sync_rows). Der erste Lauf
+    ordnet vorhandene Zeilen über den Schlüssel zu, statt sie zu verdoppeln.
+    Liefert den Bericht als Dict oder None, wenn die Datei nicht lesbar ist.
+    """
+    try:
+        wb, headers, rows = read_rows(file_path)
+    except Exception as e:
+        logging.error(f"Fehler beim Laden der Datei '{file_path}': {e}")
+        return None
+
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            configure_connection(conn)
+            progress = ImportFortschritt(f"{file_path} -> {table_name}", progress_callback)
+            bericht = sync_rows(conn, table_name, headers, rows, key_columns, delete_missing, dry_run, progress)
+        finally:
+            conn.close()
+    except Exception as e:
+        logging.error(f"Fehler beim Abgleich von Tabelle '{table_name}': {e}")
+        return None
+    finally:
+        wb.close()
+    result = bericht.as_dict()
+    logging.info(f"Abgleich '{file_path}' -> '{table_name}'{' (Probelauf)' if dry_run else ''}: "
+                 f"{result['eingefuegt']} neu, {result['geaendert']} geändert, {result['geloescht']} gelöscht, "
+                 f"{result['unveraendert']} unverändert, {result['fehler']} Fehler, {result['dauer_s']} s.")
+    return result
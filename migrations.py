@@ -0,0 +1,859 @@
+﻿import sqlite3
+import logging
+from db_connection import configure_connection, DEFAULT_DB_PATH
+from normalize import normalize_datum, normalize_ausfallzeit, normalize_prioritaet
+
+# Einzige Schemadefinition der Anwendung. Änderungen am Schema werden als neue
+# Migration unten angehängt, nie durch Bearbeiten älterer Migrationen.
+# Die erreichte Version steht in PRAGMA user_version.
+
+SCHEMA_V1 = {
+    "benutzer": """
+        CREATE TABLE IF NOT EXISTS benutzer (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE,
+            password BLOB,
+            role TEXT DEFAULT 'user'
+        );
+    """,
+    "pannen": """
+        CREATE TABLE IF NOT EXISTS pannen (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            abteilung TEXT,
+            datum TEXT,
+            schicht TEXT,
+            name TEXT,
+            anlage TEXT,
+            anlagenteil TEXT,
+            baugruppe TEXT,
+            beschreibung TEXT,
+            fehlerkategorie TEXT,
+            fehlerursache TEXT,
+            ausfallzeit TEXT,
+            prioritaet TEXT,
+            massnahme TEXT,
+            melder TEXT
+        );
+    """,
+    "motoren": """
+        CREATE TABLE IF NOT EXISTS motoren (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            motornummer TEXT,
+            im_sw TEXT,
+            g TEXT,
+            bs TEXT,
+            firma TEXT,
+            neu TEXT,
+            typ TEXT,
+            seriennummer TEXT,
+            leistung TEXT,
+            spannung TEXT,
+            n1_min TEXT,
+            n2_min TEXT,
+            strom TEXT,
+            cosinus_phi TEXT,
+            lagerort TEXT,
+            bemerkung TEXT
+        );
+    """,
+    "ersatzteile": """
+        CREATE TABLE IF NOT EXISTS ersatzteile (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hersteller TEXT,
+            typ TEXT,
+            bauform TEXT,
+            spannung TEXT,
+            bestellnummer TEXT,
+            lagerplatz TEXT,
+            beschreibung TEXT,
+            zusatz1 TEXT,
+            zusatz2 TEXT,
+            zusatz3 TEXT,
+            bestand INTEGER DEFAULT 0,
+            mindestbestand INTEGER DEFAULT 0,
+            lieferant TEXT,
+            einzelpreis REAL,
+            waehrung TEXT
+        );
+    """,
+    "wartungen": """
+        CREATE TABLE IF NOT EXISTS wartungen (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            anlage_id INTEGER,
+            datum TEXT,
+            pruefnotiz TEXT,
+            wiederholung TEXT,
+            erledigt INTEGER,
+            FOREIGN KEY(anlage_id) REFERENCES anlagen(anlage_id)
+                ON DELETE CASCADE
+                ON UPDATE CASCADE
+        );
+    """,
+    "abteilungen": """
+        CREATE TABLE IF NOT EXISTS abteilungen (
+            abteilung_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE
+        );
+    """,
+    "anlagen": """
+        CREATE TABLE IF NOT EXISTS anlagen (
+            anlage_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            abteilung_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            FOREIGN KEY(abteilung_id) REFERENCES abteilungen(abteilung_id)
+                ON DELETE CASCADE
+                ON UPDATE CASCADE
+        );
+    """,
+    "anlagenteile": """
+        CREATE TABLE IF NOT EXISTS anlagenteile (
+            anlagenteil_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            anlage_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            FOREIGN KEY(anlage_id) REFERENCES anlagen(anlage_id)
+                ON DELETE CASCADE
+                ON UPDATE CASCADE
+        );
+    """
+}
+
+
+def _table_columns(conn, table_name):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")]
+
+
+def _create_schema_v1(conn):
+    for table_name, query in SCHEMA_V1.items():
+        conn.execute(query)
+
+
+def _wartungen_anlage_id(conn):
+    # Mit RUN.py angelegte Datenbanken haben 'wartungen.anlage TEXT' statt 'anlage_id'.
+    columns = _table_columns(conn, "wartungen")
+    if "anlage_id" in columns or "anlage" not in columns:
+        return
+    conn.execute("ALTER TABLE wartungen RENAME TO wartungen_alt")
+    conn.execute(SCHEMA_V1["wartungen"])
+    conn.execute("""
+        INSERT INTO wartungen (id, anlage_id, datum, pruefnotiz, wiederholung, erledigt)
+        SELECT w.id,
+               (SELECT a.anlage_id FROM anlagen a WHERE a.name = w.anlage ORDER BY a.anlage_id LIMIT 1),
+               w.datum, w.pruefnotiz, w.wiederholung, w.erledigt
+        FROM wartungen_alt w
+    """)
+    conn.execute("DROP TABLE wartungen_alt")
+
+
+# Indizes für die Filter der Fenster und Repositories
+INDEXES_V3 = [
+    "CREATE INDEX IF NOT EXISTS idx_pannen_abteilung_anlage_datum ON pannen (abteilung, anlage, datum)",
+    "CREATE INDEX IF NOT EXISTS idx_pannen_anlagenteil ON pannen (anlagenteil)",
+    "CREATE INDEX IF NOT EXISTS idx_pannen_datum ON pannen (datum)",
+    "CREATE INDEX IF NOT EXISTS idx_anlagen_abteilung_name ON anlagen (abteilung_id, name)",
+    "CREATE INDEX IF NOT EXISTS idx_anlagenteile_anlage ON anlagenteile (anlage_id)",
+    "CREATE INDEX IF NOT EXISTS idx_ersatzteile_hersteller_typ ON ersatzteile (hersteller, typ)",
+    "CREATE INDEX IF NOT EXISTS idx_wartungen_anlage_datum ON wartungen (anlage_id, datum)",
+]
+
+
+# Pannen mit typisierten Spalten: datum als ISO-Datum, ausfallzeit in Minuten,
+# prioritaet als Zahl. Nicht erkennbare Altwerte bleiben durch die
+# Spaltenaffinität als Text erhalten und lassen sich per typeof() finden.
+PANNEN_V4 = """
+    CREATE TABLE pannen_neu (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        abteilung TEXT,
+        datum TEXT,
+        schicht TEXT,
+        name TEXT,
+        anlage TEXT,
+        anlagenteil TEXT,
+        baugruppe TEXT,
+        beschreibung TEXT,
+        fehlerkategorie TEXT,
+        fehlerursache TEXT,
+        ausfallzeit INTEGER,
+        prioritaet INTEGER,
+        massnahme TEXT,
+        melder TEXT
+    );
+"""
+
+PANNEN_INDEXES_V4 = [
+    "CREATE INDEX IF NOT EXISTS idx_pannen_abteilung_anlage_datum ON pannen (abteilung, anlage, datum)",
+    "CREATE INDEX IF NOT EXISTS idx_pannen_anlagenteil ON pannen (anlagenteil)",
+    # Deckt Datumsbereiche samt SUM(ausfallzeit) ab, ohne die Tabelle zu lesen
+    "CREATE INDEX IF NOT EXISTS idx_pannen_datum_ausfallzeit ON pannen (datum, ausfallzeit)",
+]
+
+
+def _pannen_typisiert(conn):
+    conn.create_function("normalize_datum", 1, normalize_datum, deterministic=True)
+    conn.create_function("normalize_ausfallzeit", 1, normalize_ausfallzeit, deterministic=True)
+    conn.create_function("normalize_prioritaet", 1, normalize_prioritaet, deterministic=True)
+    conn.execute("DROP TABLE IF EXISTS pannen_neu")
+    conn.execute(PANNEN_V4)
+    conn.execute("""
+        INSERT INTO pannen_neu
+            (id, abteilung, datum, schicht, name, anlage, anlagenteil, baugruppe, beschreibung,
+             fehlerkategorie, fehlerursache, ausfallzeit, prioritaet, massnahme, melder)
+        SELECT id, abteilung, normalize_datum(datum), schicht, name, anlage, anlagenteil, baugruppe, beschreibung,
+               fehlerkategorie, fehlerursache, normalize_ausfallzeit(ausfallzeit), normalize_prioritaet(prioritaet),
+               massnahme, melder
+        FROM pannen
+    """)
+    conn.execute("DROP TABLE pannen")
+    conn.execute("ALTER TABLE pannen_neu RENAME TO pannen")
+    for statement in PANNEN_INDEXES_V4:
+        conn.execute(statement)
+    nicht_erkannt = conn.execute("""
+        SELECT SUM(typeof(ausfallzeit) = 'text'), SUM(typeof(prioritaet) = 'text'),
+               SUM(datum IS NOT NULL AND date(datum) IS NULL)
+        FROM pannen
+    """).fetchone()
+    if any(nicht_erkannt):
+        logging.warning(
+            "Nicht erkannte Pannenwerte bleiben als Text erhalten: "
+            f"ausfallzeit={nicht_erkannt[0]}, prioritaet={nicht_erkannt[1]}, datum={nicht_erkannt[2]}"
+        )
+
+
+# Volltextindex über die Freitextfelder der Pannen. External Content: der Text
+# liegt nur in 'pannen', die Trigger halten den Index synchron.
+# remove_diacritics 2 faltet Umlaute (ü -> u), ß behandelt die Suchanfrage.
+PANNEN_FTS_V5 = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS pannen_fts USING fts5(
+        name, beschreibung, fehlerkategorie, fehlerursache, massnahme, melder,
+        content='pannen', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS pannen_fts_ai AFTER INSERT ON pannen BEGIN
+        INSERT INTO pannen_fts (rowid, name, beschreibung, fehlerkategorie, fehlerursache, massnahme, melder)
+        VALUES (new.id, new.name, new.beschreibung, new.fehlerkategorie, new.fehlerursache, new.massnahme, new.melder);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS pannen_fts_ad AFTER DELETE ON pannen BEGIN
+        INSERT INTO pannen_fts (pannen_fts, rowid, name, beschreibung, fehlerkategorie, fehlerursache, massnahme, melder)
+        VALUES ('delete', old.id, old.name, old.beschreibung, old.fehlerkategorie, old.fehlerursache, old.massnahme, old.melder);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS pannen_fts_au AFTER UPDATE ON pannen BEGIN
+        INSERT INTO pannen_fts (pannen_fts, rowid, name, beschreibung, fehlerkategorie, fehlerursache, massnahme, melder)
+        VALUES ('delete', old.id, old.name, old.beschreibung, old.fehlerkategorie, old.fehlerursache, old.massnahme, old.melder);
+        INSERT INTO pannen_fts (rowid, name, beschreibung, fehlerkategorie, fehlerursache, massnahme, melder)
+        VALUES (new.id, new.name, new.beschreibung, new.fehlerkategorie, new.fehlerursache, new.massnahme, new.melder);
+    END
+    """,
+    "INSERT INTO pannen_fts (pannen_fts) VALUES ('rebuild')",
+]
+
+
+# Facettensuche der Ersatzteile: (hersteller, typ) ist bereits indiziert,
+# der Lagerplatz-Index deckt die übrigen Facettenkombinationen ab.
+INDEXES_V6 = [
+    "CREATE INDEX IF NOT EXISTS idx_ersatzteile_lagerplatz ON ersatzteile (lagerplatz, hersteller, typ)",
+]
+
+
+# Änderungszähler für die Referenzdaten (Abteilung -> Anlage -> Anlagenteil);
+# refcache.ReferenzCache lädt die Hierarchie neu, sobald er sich ändert.
+REFERENZ_VERSION_V7 = [
+    """
+    CREATE TABLE referenz_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+    """,
+    "INSERT INTO referenz_version (id, version) VALUES (1, 0)",
+] + [
+    f"""
+    CREATE TRIGGER {tabelle}_referenz_{kurz} AFTER {ereignis} ON {tabelle} BEGIN
+        UPDATE referenz_version SET version = version + 1 WHERE id = 1;
+    END
+    """
+    for tabelle in ("abteilungen", "anlagen", "anlagenteile")
+    for kurz, ereignis in (("ai", "INSERT"), ("ad", "DELETE"), ("au", "UPDATE"))
+]
+
+
+# Pannen auf Fremdschlüssel umstellen: Abteilung, Anlage und Anlagenteil
+# verweisen auf die Referenztabellen, Schicht, Fehlerkategorie, Fehlerursache
+# und Melder auf kleine Nachschlagetabellen. Die Sicht 'pannen' zeigt weiterhin
+# die Namen; INSTEAD OF-Trigger lösen beim Schreiben Namen in IDs auf und legen
+# unbekannte Werte an, so dass bestehende Abfragen und Importe unverändert laufen.
+OHNE_ABTEILUNG = "(ohne Abteilung)"
+OHNE_ANLAGE = "(ohne Anlage)"
+
+# Nachschlagetabelle -> Spalte der Sicht 'pannen'
+PANNEN_NACHSCHLAGETABELLEN = {
+    "schichten": "schicht",
+    "fehlerkategorien": "fehlerkategorie",
+    "fehlerursachen": "fehlerursache",
+    "melder": "melder",
+}
+
+PANNEN_DATEN_V8 = """
+    CREATE TABLE pannen_daten (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        datum TEXT,
+        schicht_id INTEGER REFERENCES schichten(id),
+        name TEXT,
+        abteilung_id INTEGER REFERENCES abteilungen(abteilung_id),
+        anlage_id INTEGER REFERENCES anlagen(anlage_id),
+        anlagenteil_id INTEGER REFERENCES anlagenteile(anlagenteil_id),
+        baugruppe TEXT,
+        beschreibung TEXT,
+        massnahme TEXT,
+        fehlerkategorie_id INTEGER REFERENCES fehlerkategorien(id),
+        fehlerursache_id INTEGER REFERENCES fehlerursachen(id),
+        ausfallzeit INTEGER,
+        prioritaet INTEGER,
+        melder_id INTEGER REFERENCES melder(id)
+    )
+"""
+
+PANNEN_VIEW_V8 = """
+    CREATE VIEW pannen AS
+    SELECT p.id, ab.name AS abteilung, p.datum, s.name AS schicht, p.name,
+           an.name AS anlage, t.name AS anlagenteil, p.baugruppe, p.beschreibung,
+           k.name AS fehlerkategorie, u.name AS fehlerursache, p.ausfallzeit, p.prioritaet,
+           p.massnahme, m.name AS melder
+    FROM pannen_daten p
+    LEFT JOIN abteilungen ab ON ab.abteilung_id = p.abteilung_id
+    LEFT JOIN anlagen an ON an.anlage_id = p.anlage_id
+    LEFT JOIN anlagenteile t ON t.anlagenteil_id = p.anlagenteil_id
+    LEFT JOIN schichten s ON s.id = p.schicht_id
+    LEFT JOIN fehlerkategorien k ON k.id = p.fehlerkategorie_id
+    LEFT JOIN fehlerursachen u ON u.id = p.fehlerursache_id
+    LEFT JOIN melder m ON m.id = p.melder_id
+"""
+
+PANNEN_INDEXES_V8 = [
+    "CREATE INDEX IF NOT EXISTS idx_pannen_daten_abteilung_anlage_datum ON pannen_daten (abteilung_id, anlage_id, datum)",
+    "CREATE INDEX IF NOT EXISTS idx_pannen_daten_anlagenteil ON pannen_daten (anlagenteil_id)",
+    "CREATE INDEX IF NOT EXISTS idx_pannen_daten_datum_ausfallzeit ON pannen_daten (datum, ausfallzeit)",
+]
+
+
+# Spalten, die unverändert aus der Sicht übernommen werden
+_PANNEN_DIREKT = ["datum", "name", "baugruppe", "beschreibung", "massnahme", "ausfallzeit", "prioritaet"]
+
+
+def _pannen_schreiben(zeile):
+    """
+    Anweisungen für die INSTEAD OF-Trigger. Trigger kennen keine Variablen, daher
+    steht die Zeile selbst (zeile: SQL-Ausdruck ihrer id) als Zwischenspeicher
+    bereit; Abteilung, Anlage und Anlagenteil werden nacheinander aufgelöst.
+    Eine Anlage ohne Abteilung wird der ersten gleichnamigen Anlage zugeordnet,
+    ist sie unbekannt, landet sie unter OHNE_ABTEILUNG; ein Anlagenteil ohne
+    Anlage entsprechend unter OHNE_ANLAGE.
+    Liefert (vorher, werte, nachher): vorher legt Nachschlagewerte an, werte
+    sind die Spaltenausdrücke für pannen_daten, nachher löst die Hierarchie auf.
+    """
+    anlage = f"COALESCE(NULLIF(new.anlage, ''), CASE WHEN NULLIF(new.anlagenteil, '') IS NOT NULL THEN '{OHNE_ANLAGE}' END)"
+    vorher = ["INSERT OR IGNORE INTO abteilungen (name) SELECT new.abteilung WHERE NULLIF(new.abteilung, '') IS NOT NULL;"]
+    werte = {"abteilung_id": "(SELECT abteilung_id FROM abteilungen WHERE name = new.abteilung)"}
+    for tabelle, spalte in PANNEN_NACHSCHLAGETABELLEN.items():
+        vorher.append(f"INSERT OR IGNORE INTO {tabelle} (name) SELECT new.{spalte} WHERE NULLIF(new.{spalte}, '') IS NOT NULL;")
+        werte[f"{spalte}_id"] = f"(SELECT id FROM {tabelle} WHERE name = new.{spalte})"
+    for spalte in _PANNEN_DIREKT:
+        werte[spalte] = f"new.{spalte}"
+    ohne_abteilung = f"id = {zeile} AND abteilung_id IS NULL AND {anlage} IS NOT NULL"
+    nachher = [
+        f"UPDATE pannen_daten SET abteilung_id = (SELECT abteilung_id FROM anlagen WHERE name = {anlage} ORDER BY anlage_id LIMIT 1) "
+        f"WHERE {ohne_abteilung};",
+        f"INSERT OR IGNORE INTO abteilungen (name) SELECT '{OHNE_ABTEILUNG}' FROM pannen_daten WHERE {ohne_abteilung};",
+        f"UPDATE pannen_daten SET abteilung_id = (SELECT abteilung_id FROM abteilungen WHERE name = '{OHNE_ABTEILUNG}') "
+        f"WHERE {ohne_abteilung};",
+        f"INSERT INTO anlagen (abteilung_id, name) SELECT p.abteilung_id, {anlage} FROM pannen_daten p "
+        f"WHERE p.id = {zeile} AND {anlage} IS NOT NULL "
+        f"AND NOT EXISTS (SELECT 1 FROM anlagen WHERE abteilung_id = p.abteilung_id AND name = {anlage});",
+        f"UPDATE pannen_daten SET anlage_id = (SELECT anlage_id FROM anlagen WHERE abteilung_id = pannen_daten.abteilung_id "
+        f"AND name = {anlage} ORDER BY anlage_id LIMIT 1) WHERE id = {zeile};",
+        f"INSERT INTO anlagenteile (anlage_id, name) SELECT p.anlage_id, new.anlagenteil FROM pannen_daten p "
+        f"WHERE p.id = {zeile} AND NULLIF(new.anlagenteil, '') IS NOT NULL "
+        f"AND NOT EXISTS (SELECT 1 FROM anlagenteile WHERE anlage_id = p.anlage_id AND name = new.anlagenteil);",
+        f"UPDATE pannen_daten SET anlagenteil_id = (SELECT anlagenteil_id FROM anlagenteile WHERE anlage_id = pannen_daten.anlage_id "
+        f"AND name = new.anlagenteil ORDER BY anlagenteil_id LIMIT 1) WHERE id = {zeile};",
+    ]
+    return vorher, werte, nachher
+
+
+def _pannen_trigger_v8():
+    # Ohne explizite id vergibt AUTOINCREMENT eine neue, größte id
+    neue_zeile = "COALESCE(new.id, (SELECT MAX(id) FROM pannen_daten))"
+    vorher, werte, nachher = _pannen_schreiben(neue_zeile)
+    zeilenumbruch = "\n        "
+    insert = f"""
+    CREATE TRIGGER pannen_insert INSTEAD OF INSERT ON pannen BEGIN
+        {zeilenumbruch.join(vorher)}
+        INSERT INTO pannen_daten (id, {", ".join(werte)}) VALUES (new.id, {", ".join(werte.values())});
+        {zeilenumbruch.join(nachher)}
+    END
+    """
+    vorher, werte, nachher = _pannen_schreiben("new.id")
+    zuweisungen = ", ".join(f"{spalte} = {wert}" for spalte, wert in werte.items())
+    update = f"""
+    CREATE TRIGGER pannen_update INSTEAD OF UPDATE ON pannen BEGIN
+        {zeilenumbruch.join(vorher)}
+        UPDATE pannen_daten SET id = new.id, {zuweisungen}, anlage_id = NULL, anlagenteil_id = NULL
+        WHERE id = old.id;
+        {zeilenumbruch.join(nachher)}
+    END
+    """
+    delete = """
+    CREATE TRIGGER pannen_delete INSTEAD OF DELETE ON pannen BEGIN
+        DELETE FROM pannen_daten WHERE id = old.id;
+    END
+    """
+    return [insert, update, delete]
+
+
+# Volltextindex: Inhalt kommt jetzt aus der Sicht 'pannen', die Trigger hängen
+# an 'pannen_daten'. Für 'delete' werden die alten Texte über die IDs geholt.
+_FTS_SPALTEN = "name, beschreibung, fehlerkategorie, fehlerursache, massnahme, melder"
+
+
+def _fts_alte_werte(alias="old"):
+    return (
+        f"{alias}.name, {alias}.beschreibung, "
+        f"(SELECT name FROM fehlerkategorien WHERE id = {alias}.fehlerkategorie_id), "
+        f"(SELECT name FROM fehlerursachen WHERE id = {alias}.fehlerursache_id), "
+        f"{alias}.massnahme, "
+        f"(SELECT name FROM melder WHERE id = {alias}.melder_id)"
+    )
+
+
+PANNEN_FTS_TRIGGER_V8 = [
+    f"""
+    CREATE TRIGGER pannen_fts_ai AFTER INSERT ON pannen_daten BEGIN
+        INSERT INTO pannen_fts (rowid, {_FTS_SPALTEN})
+        SELECT id, {_FTS_SPALTEN} FROM pannen WHERE id = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER pannen_fts_ad AFTER DELETE ON pannen_daten BEGIN
+        INSERT INTO pannen_fts (pannen_fts, rowid, {_FTS_SPALTEN})
+        VALUES ('delete', old.id, {_fts_alte_werte()});
+    END
+    """,
+    f"""
+    CREATE TRIGGER pannen_fts_au
+    AFTER UPDATE OF id, name, beschreibung, massnahme, fehlerkategorie_id, fehlerursache_id, melder_id ON pannen_daten BEGIN
+        INSERT INTO pannen_fts (pannen_fts, rowid, {_FTS_SPALTEN})
+        VALUES ('delete', old.id, {_fts_alte_werte()});
+        INSERT INTO pannen_fts (rowid, {_FTS_SPALTEN})
+        SELECT id, {_FTS_SPALTEN} FROM pannen WHERE id = new.id;
+    END
+    """,
+] + [
+    # Umbenennen eines Nachschlagewerts: betroffene Pannen neu indexieren
+    f"""
+    CREATE TRIGGER {tabelle}_fts_au AFTER UPDATE OF name ON {tabelle} BEGIN
+        INSERT INTO pannen_fts (pannen_fts, rowid, {_FTS_SPALTEN})
+        SELECT 'delete', p.id, {_fts_alte_werte("p").replace(f"(SELECT name FROM {tabelle} WHERE id = p.{spalte}_id)", "old.name")}
+        FROM pannen_daten p WHERE p.{spalte}_id = new.id;
+        INSERT INTO pannen_fts (rowid, {_FTS_SPALTEN})
+        SELECT id, {_FTS_SPALTEN} FROM pannen WHERE id IN (SELECT id FROM pannen_daten WHERE {spalte}_id = new.id);
+    END
+    """
+    for tabelle, spalte in (("fehlerkategorien", "fehlerkategorie"), ("fehlerursachen", "fehlerursache"), ("melder", "melder"))
+]
+
+
+def _pannen_normalisiert(conn):
+    for tabelle in PANNEN_NACHSCHLAGETABELLEN:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {tabelle} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE
+            )
+        """)
+    for trigger in ("pannen_fts_ai", "pannen_fts_ad", "pannen_fts_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("ALTER TABLE pannen RENAME TO pannen_alt")
+    conn.execute(PANNEN_DATEN_V8)
+    conn.execute(PANNEN_VIEW_V8)
+    for statement in _pannen_trigger_v8():
+        conn.execute(statement)
+    conn.execute("""
+        INSERT INTO pannen
+            (id, abteilung, datum, schicht, name, anlage, anlagenteil, baugruppe, beschreibung,
+             fehlerkategorie, fehlerursache, ausfallzeit, prioritaet, massnahme, melder)
+        SELECT id, abteilung, datum, schicht, name, anlage, anlagenteil, baugruppe, beschreibung,
+               fehlerkategorie, fehlerursache, ausfallzeit, prioritaet, massnahme, melder
+        FROM pannen_alt ORDER BY id
+    """)
+    # Auch gelöschte IDs nicht wiederverwenden
+    conn.execute("""
+        UPDATE sqlite_sequence
+        SET seq = MAX(seq, COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'pannen_alt'), 0))
+        WHERE name = 'pannen_daten'
+    """)
+    conn.execute("DROP TABLE pannen_alt")
+    for statement in PANNEN_INDEXES_V8 + PANNEN_FTS_TRIGGER_V8:
+        conn.execute(statement)
+    conn.execute("INSERT INTO pannen_fts (pannen_fts) VALUES ('rebuild')")
+    ohne_zuordnung = conn.execute(
+        "SELECT COUNT(*) FROM pannen WHERE abteilung = ? OR anlage = ?", (OHNE_ABTEILUNG, OHNE_ANLAGE)
+    ).fetchone()[0]
+    if ohne_zuordnung:
+        logging.warning(f"{ohne_zuordnung} Pannen ohne eindeutige Abteilung/Anlage unter '{OHNE_ABTEILUNG}'/'{OHNE_ANLAGE}' eingeordnet.")
+
+
+# Schlüssel von upsert_many (repository.py)
+INDEXES_V9 = [
+    "CREATE INDEX IF NOT EXISTS idx_ersatzteile_hersteller_bestellnummer ON ersatzteile (hersteller, bestellnummer)",
+    "CREATE INDEX IF NOT EXISTS idx_motoren_motornummer ON motoren (motornummer)",
+]
+
+
+# Inhalts-Hashes für den inkrementellen Import (massenimport.sync_rows):
+# je Tabelle und natürlichem Schlüssel die zugeordnete Zeile und der Hash der
+# zuletzt importierten Werte
+IMPORT_FINGERPRINTS_V10 = [
+    """
+    CREATE TABLE IF NOT EXISTS import_fingerprints (
+        tabelle TEXT NOT NULL,
+        schluessel TEXT NOT NULL,
+        zeilen_id INTEGER NOT NULL,
+        hash BLOB NOT NULL,
+        PRIMARY KEY (tabelle, schluessel)
+    ) WITHOUT ROWID
+    """,
+]
+
+
+# Zuletzt importierte Konfigurationsdateien (initrefdata.py): unveränderte Dateien
+# werden übersprungen, solange referenz_version noch den Stand nach dem Import hat
+REFERENZ_IMPORT_V11 = [
+    """
+    CREATE TABLE IF NOT EXISTS referenz_import (
+        datei TEXT PRIMARY KEY,
+        groesse INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        hash BLOB NOT NULL,
+        referenz_version INTEGER NOT NULL,
+        importiert_am TEXT
+    )
+    """,
+]
+
+
+# Filterkombinationen, die abfrageplaene.py als Tabellen-Scan gemeldet hat:
+# Anlage bzw. Anlagenteil ohne Abteilung (Namen ohne Index, pannen_daten nur
+# über abteilung_id erreichbar) und die Ersatzteil-Facette Typ ohne Hersteller
+INDEXES_V12 = [
+    "CREATE INDEX IF NOT EXISTS idx_anlagen_name ON anlagen (name)",
+    "CREATE INDEX IF NOT EXISTS idx_anlagenteile_name ON anlagenteile (name)",
+    "CREATE INDEX IF NOT EXISTS idx_pannen_daten_anlage_datum ON pannen_daten (anlage_id, datum)",
+    "CREATE INDEX IF NOT EXISTS idx_ersatzteile_typ ON ersatzteile (typ)",
+]
+
+
+# Trigramm-Index für die Freisuche (LIKE '%…%') der Ersatzteile und Motoren:
+# ab drei Zeichen liefert er die Kandidaten, LIKE prüft danach wie bisher
+# (siehe repository.like_search_condition). External Content wie pannen_fts.
+SUCH_FTS = {
+    "ersatzteile": ["hersteller", "typ", "beschreibung"],
+    "motoren": ["motornummer", "firma", "typ", "bemerkung"],
+}
+
+
+def _such_fts_v13(conn):
+    for tabelle, spalten in SUCH_FTS.items():
+        liste = ", ".join(spalten)
+        neu = ", ".join(f"new.{spalte}" for spalte in spalten)
+        alt = ", ".join(f"old.{spalte}" for spalte in spalten)
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {tabelle}_fts USING fts5(
+                {liste}, content='{tabelle}', content_rowid='id', tokenize='trigram'
+            )
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {tabelle}_fts_ai AFTER INSERT ON {tabelle} BEGIN
+                INSERT INTO {tabelle}_fts (rowid, {liste}) VALUES (new.id, {neu});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {tabelle}_fts_ad AFTER DELETE ON {tabelle} BEGIN
+                INSERT INTO {tabelle}_fts ({tabelle}_fts, rowid, {liste}) VALUES ('delete', old.id, {alt});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {tabelle}_fts_au AFTER UPDATE OF {liste} ON {tabelle} BEGIN
+                INSERT INTO {tabelle}_fts ({tabelle}_fts, rowid, {liste}) VALUES ('delete', old.id, {alt});
+                INSERT INTO {tabelle}_fts (rowid, {liste}) VALUES (new.id, {neu});
+            END
+        """)
+        conn.execute(f"INSERT INTO {tabelle}_fts ({tabelle}_fts) VALUES ('rebuild')")
+
+
+# Änderungsprotokoll für aenderungsfeed.py: je geschriebener Zeile ein Eintrag
+# (Tabelle, id, Art), die laufende id dient den Arbeitsplätzen als Wasserstand.
+# AUTOINCREMENT, damit ids nach dem Kürzen nie wiederverwendet werden; es
+# bleiben die letzten AENDERUNGEN_BEHALTEN Einträge.
+AENDERUNGEN_TABELLEN = ["pannen_daten", "ersatzteile", "motoren", "wartungen", "benutzer"]
+AENDERUNGEN_BEHALTEN = 10000
+
+
+def _aenderungs_trigger_v14(tabelle):
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {tabelle}_aenderung_{kurz} AFTER {ereignis} ON {tabelle} BEGIN
+            INSERT INTO aenderungen (tabelle, zeile_id, art) VALUES ('{tabelle}', {zeile}.id, '{art}');
+        END
+        """
+        for kurz, ereignis, zeile, art in (("ai", "INSERT", "new", "neu"), ("au", "UPDATE", "new", "geaendert"),
+                                           ("ad", "DELETE", "old", "geloescht"))
+    ]
+
+
+def _aenderungsprotokoll_v14(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS aenderungen (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabelle TEXT NOT NULL,
+            zeile_id INTEGER NOT NULL,
+            art TEXT NOT NULL
+        )
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS aenderungen_kuerzen AFTER INSERT ON aenderungen BEGIN
+            DELETE FROM aenderungen WHERE id <= new.id - {AENDERUNGEN_BEHALTEN};
+        END
+    """)
+    for tabelle in AENDERUNGEN_TABELLEN:
+        for statement in _aenderungs_trigger_v14(tabelle):
+            conn.execute(statement)
+
+
+# Sortierung der Listen per Klick auf die Spaltenüberschrift: Keyset-Paging über
+# (Spalte, id) braucht einen Index auf der Spalte allein, sonst wird je Seite die
+# ganze Tabelle sortiert. Datum sortiert über idx_pannen_daten_datum_ausfallzeit,
+# Typ über idx_ersatzteile_typ (repository: SORT_COLUMNS).
+INDEXES_V15 = [
+    "CREATE INDEX IF NOT EXISTS idx_pannen_daten_ausfallzeit ON pannen_daten (ausfallzeit)",
+    "CREATE INDEX IF NOT EXISTS idx_pannen_daten_prioritaet ON pannen_daten (prioritaet)",
+    "CREATE INDEX IF NOT EXISTS idx_ersatzteile_hersteller ON ersatzteile (hersteller)",
+    "CREATE INDEX IF NOT EXISTS idx_ersatzteile_bestellnummer ON ersatzteile (bestellnummer)",
+]
+
+
+# Der inkrementelle Import verwendet jetzt die Schlüssel von upsert_many
+# (Ersatzteile: Hersteller + Bestellnummer, Motoren: Motor- + Seriennummer).
+# Fingerprints unter den alten Schlüsseln würden beim nächsten Abgleich als
+# verschwunden gelöscht und neu eingefügt; ohne sie ordnet sync_rows die
+# vorhandenen Zeilen wieder über den Schlüssel zu.
+IMPORT_SCHLUESSEL_V16 = [
+    "DELETE FROM import_fingerprints WHERE tabelle IN ('ersatzteile', 'motoren')",
+]
+
+
+# Änderungsprotokoll ohne Mehrfacheinträge: die INSTEAD OF-Trigger der Sicht
+# 'pannen' lösen Abteilung, Anlage und Anlagenteil jetzt vor dem Schreiben auf,
+# statt die Zeile danach mit UPDATEs nachzubessern (das ergab je Panne drei
+# Einträge). Der UPDATE-Trigger meldet nur echte Wertänderungen, und gekürzt
+# wird nur noch bei jedem AENDERUNGEN_KUERZEN_ALLE-ten Eintrag.
+AENDERUNGEN_KUERZEN_ALLE = 1000
+
+
+def aenderungs_trigger(tabelle, spalten):
+    """
+    CREATE TRIGGER-Anweisungen, die Schreibzugriffe auf tabelle protokollieren;
+    ein UPDATE zählt nur, wenn sich eine der spalten tatsächlich ändert.
+    """
+    geaendert = " OR ".join(f"old.{spalte} IS NOT new.{spalte}" for spalte in spalten)
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {tabelle}_aenderung_{kurz} AFTER {ereignis} ON {tabelle}{bedingung} BEGIN
+            INSERT INTO aenderungen (tabelle, zeile_id, art) VALUES ('{tabelle}', {zeile}.id, '{art}');
+        END
+        """
+        for kurz, ereignis, bedingung, zeile, art in (
+            ("ai", "INSERT", "", "new", "neu"),
+            ("au", f"UPDATE OF {', '.join(spalten)}", f" WHEN {geaendert}", "new", "geaendert"),
+            ("ad", "DELETE", "", "old", "geloescht"),
+        )
+    ]
+
+
+def _pannen_werte_v17():
+    """
+    Wie _pannen_schreiben, aber ohne Nachbessern der geschriebenen Zeile: die
+    Ausdrücke für abteilung_id, anlage_id und anlagenteil_id hängen nur von new
+    ab, fehlende Anlagen und Anlagenteile legt vorher an. Die Zuordnung bleibt
+    dieselbe (Anlage ohne Abteilung: erste gleichnamige Anlage, sonst
+    OHNE_ABTEILUNG; Anlagenteil ohne Anlage: OHNE_ANLAGE).
+    Liefert (vorher, werte).
+    """
+    anlage = f"COALESCE(NULLIF(new.anlage, ''), CASE WHEN NULLIF(new.anlagenteil, '') IS NOT NULL THEN '{OHNE_ANLAGE}' END)"
+    vorher, werte, _ = _pannen_schreiben("new.id")
+    bekannt = (f"COALESCE({werte['abteilung_id']}, "
+               f"(SELECT abteilung_id FROM anlagen WHERE name = {anlage} ORDER BY anlage_id LIMIT 1))")
+    abteilung = (f"COALESCE({bekannt}, CASE WHEN {anlage} IS NOT NULL THEN "
+                 f"(SELECT abteilung_id FROM abteilungen WHERE name = '{OHNE_ABTEILUNG}') END)")
+    anlage_id = (f"(SELECT anlage_id FROM anlagen WHERE abteilung_id = {abteilung} AND name = {anlage} "
+                 f"ORDER BY anlage_id LIMIT 1)")
+    anlagenteil_id = (f"(SELECT anlagenteil_id FROM anlagenteile WHERE anlage_id = {anlage_id} "
+                      f"AND name = new.anlagenteil ORDER BY anlagenteil_id LIMIT 1)")
+    vorher += [
+        f"INSERT OR IGNORE INTO abteilungen (name) SELECT '{OHNE_ABTEILUNG}' WHERE {anlage} IS NOT NULL AND {bekannt} IS NULL;",
+        f"INSERT INTO anlagen (abteilung_id, name) SELECT {abteilung}, {anlage} WHERE {anlage} IS NOT NULL "
+        f"AND NOT EXISTS (SELECT 1 FROM anlagen WHERE abteilung_id = {abteilung} AND name = {anlage});",
+        f"INSERT INTO anlagenteile (anlage_id, name) SELECT {anlage_id}, new.anlagenteil "
+        f"WHERE NULLIF(new.anlagenteil, '') IS NOT NULL "
+        f"AND NOT EXISTS (SELECT 1 FROM anlagenteile WHERE anlage_id = {anlage_id} AND name = new.anlagenteil);",
+    ]
+    werte.update(abteilung_id=abteilung, anlage_id=anlage_id, anlagenteil_id=anlagenteil_id)
+    return vorher, werte
+
+
+def _aenderungsprotokoll_v17(conn):
+    vorher, werte = _pannen_werte_v17()
+    zeilenumbruch = "\n        "
+    zuweisungen = ", ".join(f"{spalte} = {wert}" for spalte, wert in werte.items())
+    for trigger in ("pannen_insert", "pannen_update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute(f"""
+        CREATE TRIGGER pannen_insert INSTEAD OF INSERT ON pannen BEGIN
+            {zeilenumbruch.join(vorher)}
+            INSERT INTO pannen_daten (id, {", ".join(werte)}) VALUES (new.id, {", ".join(werte.values())});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER pannen_update INSTEAD OF UPDATE ON pannen BEGIN
+            {zeilenumbruch.join(vorher)}
+            UPDATE pannen_daten SET id = new.id, {zuweisungen} WHERE id = old.id;
+        END
+    """)
+    for tabelle in AENDERUNGEN_TABELLEN:
+        conn.execute(f"DROP TRIGGER IF EXISTS {tabelle}_aenderung_au")
+        conn.execute(aenderungs_trigger(tabelle, _table_columns(conn, tabelle))[1])
+    conn.execute("DROP TRIGGER IF EXISTS aenderungen_kuerzen")
+    conn.execute(f"""
+        CREATE TRIGGER aenderungen_kuerzen AFTER INSERT ON aenderungen
+        WHEN new.id % {AENDERUNGEN_KUERZEN_ALLE} = 0 BEGIN
+            DELETE FROM aenderungen WHERE id <= new.id - {AENDERUNGEN_BEHALTEN};
+        END
+    """)
+
+
+# Sortierbare Spalten der Motoren-, Wartungs- und Benutzerlisten, die seitenweise
+# über den Index gelesen werden. Messwerte stehen als Text in der Tabelle und
+# werden nach ihrem Zahlenwert sortiert; der Ausdruck muss genau dem von
+# repository._zahl_aus_text entsprechen, sonst nutzt SQLite den Index nicht
+# (abfrageplaene.py meldet das als Sortierung über alle Zeilen). Datum der Pannen
+# und Lagerplatz der Ersatzteile stehen bisher nur vorn in zusammengesetzten
+# Indizes, die nach (spalte, id) nicht sortiert liefern; sie bekommen eigene.
+def _zahl_aus_text_v18(column):
+    return f"CAST(REPLACE(NULLIF(TRIM({column}), ''), ',', '.') AS REAL)"
+
+
+INDEXES_V18 = [
+    "CREATE INDEX IF NOT EXISTS idx_motoren_firma ON motoren (firma)",
+    "CREATE INDEX IF NOT EXISTS idx_motoren_typ ON motoren (typ)",
+    "CREATE INDEX IF NOT EXISTS idx_motoren_seriennummer ON motoren (seriennummer)",
+    f"CREATE INDEX IF NOT EXISTS idx_motoren_leistung_wert ON motoren ({_zahl_aus_text_v18('leistung')})",
+    f"CREATE INDEX IF NOT EXISTS idx_motoren_spannung_wert ON motoren ({_zahl_aus_text_v18('spannung')})",
+    "CREATE INDEX IF NOT EXISTS idx_wartungen_datum ON wartungen (datum)",
+    f"CREATE INDEX IF NOT EXISTS idx_wartungen_wiederholung_wert ON wartungen ({_zahl_aus_text_v18('wiederholung')})",
+    "CREATE INDEX IF NOT EXISTS idx_wartungen_erledigt ON wartungen (erledigt)",
+    "CREATE INDEX IF NOT EXISTS idx_benutzer_role ON benutzer (role)",
+    "CREATE INDEX IF NOT EXISTS idx_pannen_daten_datum ON pannen_daten (datum)",
+    "CREATE INDEX IF NOT EXISTS idx_ersatzteile_lagerplatz_sortierung ON ersatzteile (lagerplatz)",
+]
+
+
+# (Version, Beschreibung, Funktion oder Liste von SQL-Anweisungen)
+MIGRATIONS = [
+    (1, "Grundschema", _create_schema_v1),
+    (2, "wartungen.anlage durch anlage_id ersetzen", _wartungen_anlage_id),
+    (3, "Indizes für Filterabfragen", INDEXES_V3),
+    (4, "Pannen: typisierte Spalten für Datum, Ausfallzeit und Priorität", _pannen_typisiert),
+    (5, "Volltextindex für Pannen", PANNEN_FTS_V5),
+    (6, "Index für Ersatzteil-Facetten", INDEXES_V6),
+    (7, "Änderungszähler für Referenzdaten", REFERENZ_VERSION_V7),
+    (8, "Pannen: Fremdschlüssel und Nachschlagetabellen", _pannen_normalisiert),
+    (9, "Indizes für Upsert-Schlüssel", INDEXES_V9),
+    (10, "Inhalts-Hashes für inkrementelle Importe", IMPORT_FINGERPRINTS_V10),
+    (11, "Fingerabdruck der importierten Konfiguration", REFERENZ_IMPORT_V11),
+    (12, "Indizes für Filter nach Anlage, Anlagenteil und Typ", INDEXES_V12),
+    (13, "Trigramm-Index für die Freisuche in Ersatzteilen und Motoren", _such_fts_v13),
+    (14, "Änderungsprotokoll für die Aktualisierung offener Fenster", _aenderungsprotokoll_v14),
+    (15, "Indizes für die Sortierung der Listen", INDEXES_V15),
+    (16, "Import-Fingerprints nach Wechsel der natürlichen Schlüssel verwerfen", IMPORT_SCHLUESSEL_V16),
+    (17, "Änderungsprotokoll: ein Eintrag je Schreibzugriff", _aenderungsprotokoll_v17),
+    (18, "Indizes für die seitenweise Sortierung der Listen", INDEXES_V18),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _run_step(conn, step):
+    if callable(step):
+        step(conn)
+    else:
+        for statement in step:
+            conn.execute(statement)
+
+
+def apply_migrations(conn):
+    """
+    Wendet alle ausstehenden Migrationen in aufsteigender Reihenfolge an.
+    Jede Migration läuft in einer eigenen Transaktion zusammen mit dem Setzen
+    von user_version; startet ein zweiter Arbeitsplatz gleichzeitig, wartet er
+    auf die Sperre und überspringt die bereits erledigten Schritte.
+    """
+    if get_schema_version(conn) >= SCHEMA_VERSION:
+        return get_schema_version(conn)
+    if conn.in_transaction:
+        conn.commit()
+    # Tabellen-Umbauten benötigen ausgeschaltete Fremdschlüssel (nur außerhalb einer Transaktion änderbar)
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        for version, beschreibung, step in MIGRATIONS:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if get_schema_version(conn) >= version:
+                    conn.rollback()
+                    continue
+                _run_step(conn, step)
+                verletzungen = conn.execute("PRAGMA foreign_key_check").fetchall()
+                if verletzungen:
+                    logging.warning(f"{len(verletzungen)} Fremdschlüsselverletzungen nach Migration {version}, z.B. {verletzungen[:5]}")
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            logging.info(f"Migration {version} angewendet: {beschreibung}")
+        conn.execute("PRAGMA optimize")
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+    return get_schema_version(conn)
+
+
+def migrate(db_path=DEFAULT_DB_PATH):
+    conn = sqlite3.connect(db_path)
+    try:
+        configure_connection(conn)
+        return apply_migrations(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    version = migrate()
+    logging.info(f"Datenbankschema auf Version {version}.")
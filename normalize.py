@@ -0,0 +1,148 @@
+﻿import re
+import datetime
+
+# Normalisierung der Pannen-Eingaben auf typisierte Werte:
+#   datum       -> ISO-Datum 'YYYY-MM-DD' (sortier- und indexierbar)
+#   ausfallzeit -> ganze Minuten (INTEGER)
+#   prioritaet  -> INTEGER
+# Nicht erkennbare Eingaben werden unverändert (getrimmt) zurückgegeben, damit
+# beim Speichern nichts verloren geht; leere Eingaben werden zu None.
+
+_DATUM_FORMATE = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+    "%d.%m.%Y",
+    "%d.%m.%y",
+    "%d.%m.%Y %H:%M",
+    "%d/%m/%Y",
+    "%Y/%m/%d",
+]
+
+_STUNDEN_MINUTEN = re.compile(r"^(\d+):([0-5]\d)$")
+_ZAHL_EINHEIT = re.compile(r"^(\d+(?:[.,]\d+)?)\s*(min|minuten|m|h|std|stunden|stunde)?\.?$", re.IGNORECASE)
+
+
+def _leer(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def normalize_datum(value):
+    if _leer(value):
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    text = str(value).strip()
+    for fmt in _DATUM_FORMATE:
+        try:
+            return datetime.datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return text
+
+
+def normalize_ausfallzeit(value):
+    if _leer(value):
+        return None
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return int(round(value))
+    if isinstance(value, datetime.time):
+        return value.hour * 60 + value.minute
+    text = str(value).strip()
+    match = _STUNDEN_MINUTEN.match(text)
+    if match:
+        return int(match.group(1)) * 60 + int(match.group(2))
+    match = _ZAHL_EINHEIT.match(text)
+    if match:
+        zahl = float(match.group(1).replace(",", "."))
+        einheit = (match.group(2) or "min").lower()
+        if einheit in ("h", "std", "stunde", "stunden"):
+            zahl *= 60
+        return int(round(zahl))
+    return text
+
+
+def normalize_prioritaet(value):
+    if _leer(value):
+        return None
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip()
+    return int(text) if text.isdigit() else text
+
+
+def normalize_zahl(value):
+    """Dezimalzahl, auch in deutscher Schreibweise ('1.234,5', '12,5')."""
+    # Schnelle Pfade zuerst: Importe rufen das für jede Zelle einer Zahlenspalte auf
+    if value is None or isinstance(value, (int, float)):
+        return value
+    text = str(value).strip()
+    if not text:
+        return None
+    kompakt = text
+    if "," in text or " " in text or "\xa0" in text:
+        kompakt = text.replace(" ", "").replace("\xa0", "")
+        if kompakt.rfind(",") > kompakt.rfind("."):
+            kompakt = kompakt.replace(".", "").replace(",", ".")
+        else:
+            kompakt = kompakt.replace(",", "")
+    try:
+        return float(kompakt)
+    except ValueError:
+        return text
+
+
+def normalize_ganzzahl(value):
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            if not value.strip():
+                return None
+    zahl = normalize_zahl(value)
+    if isinstance(zahl, float) and zahl.is_integer():
+        return int(zahl)
+    return zahl
+
+
+# Normalisierer nach deklariertem Spaltentyp (SQLite-Typaffinität), z.B. für
+# CSV-Importe, in denen jeder Wert Text ist
+TYP_NORMALIZERS = {
+    "INT": normalize_ganzzahl,
+    "REAL": normalize_zahl,
+    "FLOA": normalize_zahl,
+    "DOUB": normalize_zahl,
+}
+
+
+def normalizer_for_type(declared_type):
+    declared_type = (declared_type or "").upper()
+    for marker, normalizer in TYP_NORMALIZERS.items():
+        if marker in declared_type:
+            return normalizer
+    return None
+
+
+# Normalisierer je Spalte, z.B. für Importe
+PANNEN_NORMALIZERS = {
+    "datum": normalize_datum,
+    "ausfallzeit": normalize_ausfallzeit,
+    "prioritaet": normalize_prioritaet,
+}
+
+
+def normalize_row(columns, values, normalizers=PANNEN_NORMALIZERS):
+    """Normalisiert eine Zeile (Werte in der Reihenfolge von columns)."""
+    return tuple(
+        normalizers[col](val) if col in normalizers else val
+        for col, val in zip(columns, values)
+    )
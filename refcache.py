@@ -0,0 +1,109 @@
+﻿import threading
+import logging
+
+from db_connection import get_connection, DEFAULT_DB_PATH
+
+# Prozessweiter Cache der Hierarchie Abteilung -> Anlage -> Anlagenteil.
+# Die Tabellen werden einmal komplett gelesen; Kaskaden-Dropdowns werden danach
+# aus Dictionaries bedient. Veraltet ist der Cache, wenn der Änderungszähler
+# referenz_version (Trigger, Migration 7) weitergezählt hat. Den Zähler liest
+# der Cache nur, wenn sich seit der letzten Prüfung überhaupt etwas an der
+# Datenbank geändert hat: durch andere Verbindungen (PRAGMA data_version) oder
+# durch die eigene Verbindung (total_changes).
+
+
+class ReferenzCache:
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._version = None
+        self._stamps = {}
+        self._abteilungen = []
+        self._abteilung_ids = {}
+        self._anlagen = {}
+        self._anlagen_alle = []
+        self._anlagenteile = {}
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+            self._stamps = {}
+
+    def _ensure_current(self):
+        conn = get_connection(self.db_path)
+        stamp = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+        with self._lock:
+            if self._version is not None and self._stamps.get(id(conn)) == stamp:
+                return
+            version = conn.execute("SELECT version FROM referenz_version WHERE id = 1").fetchone()[0]
+            if version != self._version:
+                self._load(conn)
+                self._version = version
+            self._stamps[id(conn)] = stamp
+
+    def _load(self, conn):
+        abteilungen = conn.execute("SELECT abteilung_id, name FROM abteilungen ORDER BY name").fetchall()
+        anlagen = conn.execute("SELECT anlage_id, abteilung_id, name FROM anlagen ORDER BY name, anlage_id").fetchall()
+        teile = conn.execute("SELECT anlage_id, name FROM anlagenteile ORDER BY anlagenteil_id").fetchall()
+
+        abteilung_namen = {abt_id: name for abt_id, name in abteilungen}
+        self._abteilungen = [name for _, name in abteilungen]
+        self._abteilung_ids = {name: abt_id for abt_id, name in abteilungen}
+        # Anlagen je Abteilung als [(anlage_id, name)], nach Name sortiert
+        self._anlagen = {name: [] for name in self._abteilungen}
+        for anlage_id, abt_id, name in anlagen:
+            abt_name = abteilung_namen.get(abt_id)
+            if abt_name is not None:
+                self._anlagen[abt_name].append((anlage_id, name))
+        self._anlagen_alle = [(anlage_id, name) for anlage_id, _, name in anlagen]
+        self._anlagenteile = {}
+        for anlage_id, name in teile:
+            self._anlagenteile.setdefault(anlage_id, []).append(name)
+        logging.debug(f"Referenzdaten geladen: {len(abteilungen)} Abteilungen, {len(anlagen)} Anlagen, {len(teile)} Anlagenteile.")
+
+    def abteilungen(self):
+        self._ensure_current()
+        return list(self._abteilungen)
+
+    def abteilung_id(self, abteilung):
+        self._ensure_current()
+        return self._abteilung_ids.get(abteilung)
+
+    def anlagen(self, abteilung=None):
+        """Anlagennamen einer Abteilung; ohne Abteilung alle (Namen doppelt möglich)."""
+        return [name for _, name in self.anlagen_mit_ids(abteilung)]
+
+    def anlagen_mit_ids(self, abteilung=None):
+        self._ensure_current()
+        if abteilung is None:
+            return list(self._anlagen_alle)
+        return list(self._anlagen.get(abteilung, []))
+
+    def anlage_ids(self, anlage, abteilung=None):
+        """IDs aller Anlagen dieses Namens, optional auf eine Abteilung beschränkt."""
+        return [anlage_id for anlage_id, name in self.anlagen_mit_ids(abteilung) if name == anlage]
+
+    def anlagenteile(self, anlage, abteilung=None):
+        """
+        Anlagenteile einer Anlage. Ohne Abteilung werden die Teile aller
+        gleichnamigen Anlagen zusammengefasst.
+        """
+        teile = []
+        for anlage_id in self.anlage_ids(anlage, abteilung):
+            for name in self._anlagenteile.get(anlage_id, []):
+                if name not in teile:
+                    teile.append(name)
+        return teile
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_referenz_cache(db_path=DEFAULT_DB_PATH):
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = ReferenzCache(db_path)
+            _caches[db_path] = cache
+        return cache
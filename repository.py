@@ -1,165 +1,916 @@
-﻿import sqlite3
-
-class DatabaseRepository:
-    def __init__(self, db_path="instandhaltung.db"):
-        self.db_path = db_path
-
-    def _connect(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("PRAGMA foreign_keys = ON;")
-        return conn
-
-class PannenRepository(DatabaseRepository):
-    def get_filtered_pannen(self, abteilung="", anlage="", start_date="", end_date=""):
-        conditions = []
-        params = []
-        if abteilung:
-            conditions.append("abteilung = ?")
-            params.append(abteilung)
-        if anlage:
-            conditions.append("anlage = ?")
-            params.append(anlage)
-        if start_date and end_date:
-            conditions.append("datum BETWEEN ? AND ?")
-            params.extend([start_date, end_date])
-        query = "SELECT id, abteilung, anlage, datum, beschreibung FROM pannen"
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, tuple(params))
-            return cursor.fetchall()
-
-    def get_pannen_counts_by_abteilung(self):
-        query = "SELECT abteilung, COUNT(*) FROM pannen GROUP BY abteilung"
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            return cursor.fetchall()
-
-    def insert_panne(self, panne_data):
-        query = """
-            INSERT INTO pannen 
-            (datum, schicht, name, abteilung, anlage, anlagenteil, baugruppe, beschreibung, massnahme, fehlerkategorie, fehlerursache, ausfallzeit, prioritaet, melder)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, panne_data)
-            conn.commit()
-
-    def get_abteilungen(self):
-        query = "SELECT name FROM abteilungen ORDER BY name"
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            return [row[0] for row in cursor.fetchall()]
-
-    def get_anlagen(self):
-        query = "SELECT name FROM anlagen ORDER BY name"
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            return [row[0] for row in cursor.fetchall()]
-
-class ErsatzteileRepository(DatabaseRepository):
-    def get_all_ersatzteile(self, search_query=""):
-        query = """
-            SELECT id, hersteller, typ, bauform, spannung, bestellnummer, lagerplatz, beschreibung, zusatz1, zusatz2, zusatz3 
-            FROM ersatzteile
-        """
-        params = ()
-        if search_query:
-            query += " WHERE hersteller LIKE ? OR typ LIKE ? OR beschreibung LIKE ?"
-            like_str = f"%{search_query}%"
-            params = (like_str, like_str, like_str)
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            return cursor.fetchall()
-
-    def insert_ersatzteil(self, data):
-        query = """
-            INSERT INTO ersatzteile 
-            (hersteller, typ, bauform, spannung, bestellnummer, lagerplatz, beschreibung, zusatz1, zusatz2, zusatz3)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, data)
-            conn.commit()
-
-    def get_all_hersteller(self):
-        query = "SELECT DISTINCT hersteller FROM ersatzteile ORDER BY hersteller"
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            results = cursor.fetchall()
-            return [row[0] for row in results if row[0]]
-
-    def get_types_by_hersteller(self, hersteller):
-        query = "SELECT DISTINCT typ FROM ersatzteile WHERE hersteller = ? ORDER BY typ"
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (hersteller,))
-            results = cursor.fetchall()
-            return [row[0] for row in results if row[0]]
-
-class MotorenRepository(DatabaseRepository):
-    def get_all_motoren(self, search_query=""):
-        query = """
-            SELECT id, motornummer, im_sw, g, bs, firma, neu, typ, seriennummer,
-                   leistung, spannung, n1_min, n2_min, strom, cosinus_phi, lagerort, bemerkung
-            FROM motoren
-        """
-        params = ()
-        if search_query:
-            query += " WHERE motornummer LIKE ? OR firma LIKE ? OR typ LIKE ? OR bemerkung LIKE ?"
-            like_str = f"%{search_query}%"
-            params = (like_str, like_str, like_str, like_str)
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            return cursor.fetchall()
-
-    def insert_motor(self, data):
-        query = """
-            INSERT INTO motoren 
-            (motornummer, im_sw, g, bs, firma, neu, typ, seriennummer,
-             leistung, spannung, n1_min, n2_min, strom, cosinus_phi, lagerort, bemerkung)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, data)
-            conn.commit()
-class BenutzerRepository(DatabaseRepository):
-    def get_all_users(self):
-        query = "SELECT id, username, role FROM benutzer ORDER BY id ASC"
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            return cursor.fetchall()
-
-    def insert_user(self, username, password, role):
-        query = "INSERT INTO benutzer (username, password, role) VALUES (?, ?, ?)"
-        import bcrypt
-        hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (username, hashed, role))
-            conn.commit()
-
-    def update_user(self, user_id, username, role):
-        query = "UPDATE benutzer SET username = ?, role = ? WHERE id = ?"
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (username, role, user_id))
-            conn.commit()
-
-    def delete_user(self, user_id):
-        query = "DELETE FROM benutzer WHERE id = ?"
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (user_id,))
-            conn.commit()
+﻿import re
+import sqlite3
+import itertools
+from db_connection import get_connection, get_manager, is_lock_error, DEFAULT_DB_PATH
+from normalize import normalize_datum, normalize_row
+from refcache import get_referenz_cache
+
+class SchreibErgebnis:
+    """
+    Ergebnis von insert_many/upsert_many: ids in Eingabereihenfolge (None bei
+    fehlerhaften Zeilen) und errors als Liste von (index, meldung).
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.errors = []
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+
+    def _add(self, outcomes):
+        for index, row_id, status, error in sorted(outcomes, key=lambda outcome: outcome[0]):
+            self.ids.append(row_id)
+            if status == "neu":
+                self.inserted += 1
+            elif status == "geaendert":
+                self.updated += 1
+            elif status == "unveraendert":
+                self.unchanged += 1
+            else:
+                self.errors.append((index, error))
+
+    def __repr__(self):
+        return (f"SchreibErgebnis(neu={self.inserted}, geaendert={self.updated}, "
+                f"unveraendert={self.unchanged}, fehler={len(self.errors)})")
+
+
+class Aenderung:
+    """
+    Ergebnis eines einzelnen Schreibzugriffs aus den Fenstern: art ist "neu",
+    "geaendert" oder "geloescht", row die Zeile im Format der jeweiligen Liste
+    (None bei "geloescht"). Die Ansichten übernehmen nur diese eine Zeile,
+    statt alles neu zu laden (gui.listenansicht.aenderung_anwenden).
+    Massenimporte protokollieren statt ihrer Zeilen einen Eintrag "neu_laden".
+    """
+
+    NEU = "neu"
+    GEAENDERT = "geaendert"
+    GELOESCHT = "geloescht"
+    NEU_LADEN = "neu_laden"
+
+    def __init__(self, art, id, row=None):
+        self.art = art
+        self.id = id
+        self.row = row
+
+    def __repr__(self):
+        return f"Aenderung({self.art}, id={self.id})"
+
+
+# Standard für cursor_value beim Keyset-Paging: den Sortierwert der Cursor-Zeile
+# selbst nachlesen (None ist ein gültiger Sortierwert, NULL)
+CURSOR_NACHLESEN = object()
+
+
+def _chunks(iterable, chunk_size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class DatabaseRepository:
+    # Spalten, nach denen die Listen sortiert werden dürfen (siehe _sort_key)
+    SORT_COLUMNS = ["id"]
+    # Sortierschlüssel als SQL-Ausdruck, wo die Spalte selbst falsch sortieren würde
+    SORT_KEYS = {}
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+
+    def _connect(self):
+        # Gemeinsame, offen gehaltene Verbindung des aktuellen Threads.
+        # 'with self._connect() as conn' schließt nur die Transaktion ab, nicht die Verbindung.
+        return get_connection(self.db_path)
+
+    def _write(self, func, *args):
+        # Schreibtransaktion mit Retry/Backoff bei gesperrter Datenbank.
+        return get_manager(self.db_path).write(func, *args)
+
+    def _execute_write(self, query, params=()):
+        return self._write(lambda conn: conn.execute(query, params).lastrowid)
+
+    def _write_row(self, write, select, art=Aenderung.NEU):
+        """
+        Führt write(conn) -> id in einer Schreibtransaktion aus und liest die
+        Zeile mit select (ein Parameter: die id) in derselben Transaktion zurück.
+        Liefert eine Aenderung.
+        """
+        def schreiben(conn):
+            row_id = write(conn)
+            return Aenderung(art, row_id, conn.execute(select, (row_id,)).fetchone())
+
+        return self._write(schreiben)
+
+    def _rows_by_ids(self, select, ids, id_column="id", conditions=(), params=(), chunk_size=500):
+        """
+        Zeilen zu einzelnen ids (z.B. aus dem Änderungsprotokoll) über den
+        Primärschlüssel; select ohne WHERE, conditions schränken weiter ein.
+        """
+        rows = []
+        with self._connect() as conn:
+            for chunk in _chunks(ids, chunk_size):
+                where = [f"{id_column} IN ({', '.join('?' for _ in chunk)})"] + list(conditions)
+                rows.extend(conn.execute(f"{select} WHERE {' AND '.join(where)}", tuple(chunk) + tuple(params)))
+        return rows
+
+    def _delete_row(self, table, row_id):
+        self._execute_write(f"DELETE FROM {table} WHERE id = ?", (row_id,))
+        return Aenderung(Aenderung.GELOESCHT, row_id)
+
+    # --- Massenschreiben -------------------------------------------------
+    # Zeilen werden in Blöcken zu chunk_size in je einer Schreibtransaktion
+    # geschrieben (executemany). Schlägt ein Block fehl, wird er zeilenweise mit
+    # Savepoints wiederholt, damit nur die fehlerhaften Zeilen verworfen werden.
+    # Sperrfehler werden nicht abgefangen, sondern lösen den Retry der ganzen
+    # Transaktion aus (siehe ConnectionManager.write).
+
+    def _bulk_write(self, rows, columns, chunk_size, write_chunk, prepare=None):
+        result = SchreibErgebnis()
+        for chunk in _chunks(enumerate(rows), chunk_size):
+            outcomes = []
+            prepared = []
+            for index, row in chunk:
+                try:
+                    values = tuple(row.get(col) for col in columns) if isinstance(row, dict) else tuple(row)
+                    if len(values) != len(columns):
+                        raise ValueError(f"{len(values)} Werte statt {len(columns)}")
+                    prepared.append((index, prepare(values) if prepare else values))
+                except (ValueError, TypeError) as e:
+                    outcomes.append((index, None, "fehler", str(e)))
+            if prepared:
+                outcomes.extend(self._write(write_chunk, prepared))
+            result._add(outcomes)
+        return result
+
+    def _insert_many(self, table, columns, rows, chunk_size=1000, prepare=None, id_table=None):
+        """
+        Fügt rows (Tupel in der Reihenfolge von columns oder Dicts) blockweise ein.
+        id_table: Tabelle, in der die ids vergeben werden (bei Sichten die Basistabelle).
+        """
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        id_table = id_table or table
+
+        def insert_row(conn, index, values):
+            conn.execute("SAVEPOINT zeile")
+            try:
+                conn.execute(query, values)
+            except sqlite3.Error as e:
+                if is_lock_error(e):
+                    raise
+                conn.execute("ROLLBACK TO zeile")
+                conn.execute("RELEASE zeile")
+                return index, None, "fehler", str(e)
+            conn.execute("RELEASE zeile")
+            return index, _max_id(conn, id_table), "neu", None
+
+        def write_chunk(conn, chunk):
+            conn.execute("SAVEPOINT block")
+            try:
+                conn.executemany(query, [values for _, values in chunk])
+            except sqlite3.Error as e:
+                if is_lock_error(e):
+                    raise
+                conn.execute("ROLLBACK TO block")
+                conn.execute("RELEASE block")
+                return [insert_row(conn, index, values) for index, values in chunk]
+            conn.execute("RELEASE block")
+            # Unter der Schreibsperre erhalten die Zeilen eines Blocks fortlaufende ids
+            first = _max_id(conn, id_table) - len(chunk) + 1
+            return [(index, first + offset, "neu", None) for offset, (index, _) in enumerate(chunk)]
+
+        return self._bulk_write(rows, columns, chunk_size, write_chunk, prepare)
+
+    def _upsert_many(self, table, columns, key_columns, rows, chunk_size=1000, prepare=None, id_table=None):
+        """
+        Wie _insert_many, aktualisiert aber vorhandene Zeilen mit gleichem
+        Schlüssel (key_columns, NULL gilt als gleich). Ohne Unterschied bleibt die
+        Zeile unangetastet. Kommt ein neuer Schlüssel im Block mehrfach vor,
+        gewinnt die letzte Zeile.
+        """
+        id_table = id_table or table
+        key_positions = [columns.index(col) for col in key_columns]
+        lookup = (f"SELECT id, {', '.join(columns)} FROM {table} "
+                  f"WHERE {' AND '.join(f'{col} IS ?' for col in key_columns)} ORDER BY id LIMIT 1")
+        insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        update = f"UPDATE {table} SET {', '.join(f'{col} = ?' for col in columns)} WHERE id = ?"
+
+        def plan(conn, chunk):
+            # -> (updates, inserts, outcomes); inserts: {schlüssel: ([indizes], values)}
+            updates, inserts, outcomes = [], {}, []
+            for index, values in chunk:
+                key = tuple(values[pos] for pos in key_positions)
+                if key in inserts:
+                    inserts[key][0].append(index)
+                    inserts[key] = (inserts[key][0], values)
+                    continue
+                existing = conn.execute(lookup, key).fetchone()
+                if existing is None:
+                    inserts[key] = ([index], values)
+                elif _same_values(existing[1:], values):
+                    outcomes.append((index, existing[0], "unveraendert", None))
+                else:
+                    updates.append(values + (existing[0],))
+                    outcomes.append((index, existing[0], "geaendert", None))
+            return updates, inserts, outcomes
+
+        def upsert_row(conn, index, values):
+            conn.execute("SAVEPOINT zeile")
+            try:
+                updates, inserts, outcomes = plan(conn, [(index, values)])
+                if updates:
+                    conn.execute(update, updates[0])
+                if inserts:
+                    conn.execute(insert, values)
+                    outcomes = [(index, _max_id(conn, id_table), "neu", None)]
+            except sqlite3.Error as e:
+                if is_lock_error(e):
+                    raise
+                conn.execute("ROLLBACK TO zeile")
+                conn.execute("RELEASE zeile")
+                return [(index, None, "fehler", str(e))]
+            conn.execute("RELEASE zeile")
+            return outcomes
+
+        def write_chunk(conn, chunk):
+            conn.execute("SAVEPOINT block")
+            try:
+                updates, inserts, outcomes = plan(conn, chunk)
+                conn.executemany(update, updates)
+                conn.executemany(insert, [values for _, values in inserts.values()])
+            except sqlite3.Error as e:
+                if is_lock_error(e):
+                    raise
+                conn.execute("ROLLBACK TO block")
+                conn.execute("RELEASE block")
+                return [outcome for index, values in chunk for outcome in upsert_row(conn, index, values)]
+            conn.execute("RELEASE block")
+            if inserts:
+                first = _max_id(conn, id_table) - len(inserts) + 1
+                for offset, (indexes, _) in enumerate(inserts.values()):
+                    outcomes.append((indexes[0], first + offset, "neu", None))
+                    outcomes.extend((index, first + offset, "geaendert", None) for index in indexes[1:])
+            return outcomes
+
+        return self._bulk_write(rows, columns, chunk_size, write_chunk, prepare)
+
+    def _keyset_page(self, table, columns, conditions=(), params=(), sort_column="id", descending=False,
+                     after_id=None, before_id=None, page_size=200, id_column="id", cursor_value=CURSOR_NACHLESEN):
+        """
+        Keyset-Paging: höchstens page_size Zeilen nach (after_id) bzw. vor (before_id)
+        der Cursor-Zeile, stabil sortiert nach (sort_column, id). Anders als OFFSET
+        kostet jede Seite gleich viel, egal wie weit hinten sie liegt, sofern
+        sort_column einen Index hat.
+        cursor_value: Sortierwert der Cursor-Zeile, wie ihn die Liste geladen hat.
+        Ohne ihn wird er nachgelesen; ist die Zeile inzwischen gelöscht, ist die
+        Seite leer (nicht wieder die erste Seite).
+        """
+        backwards = before_id is not None and after_id is None
+        cursor_id = before_id if backwards else after_id
+        ascending = descending == backwards
+        order = "ASC" if ascending else "DESC"
+        with self._connect() as conn:
+            # Bereiche nach der Cursor-Zeile in Sortierreihenfolge, je ein Indexbereich
+            bereiche = [(None, [], sort_column)]
+            if cursor_id is not None:
+                if sort_column == id_column:
+                    bereiche = [(f"{id_column} {'>' if ascending else '<'} ?", [cursor_id], id_column)]
+                else:
+                    if cursor_value is CURSOR_NACHLESEN:
+                        row = conn.execute(f"SELECT {sort_column} FROM {table} WHERE {id_column} = ?",
+                                           (cursor_id,)).fetchone()
+                        if row is None:
+                            return []
+                        cursor_value = row[0]
+                    bereiche = _keyset_conditions(sort_column, id_column, cursor_value, cursor_id, ascending)
+            rows = []
+            for condition, condition_params, sortiert_nach in bereiche:
+                where = list(conditions) + ([condition] if condition else [])
+                query = f"SELECT {', '.join(columns)} FROM {table}"
+                if where:
+                    query += " WHERE " + " AND ".join(where)
+                query += _order_clause(sortiert_nach, id_column, order) + " LIMIT ?"
+                rows.extend(conn.execute(query, tuple(params) + tuple(condition_params) + (page_size - len(rows),)))
+                if len(rows) >= page_size:
+                    break
+        if backwards:
+            rows.reverse()
+        return rows
+
+    def _sort_key(self, sort_column):
+        """SQL-Ausdruck, nach dem eine Spalte aus SORT_COLUMNS sortiert wird."""
+        if sort_column not in self.SORT_COLUMNS:
+            raise ValueError(f"Unbekannte Sortierspalte: {sort_column}")
+        return self.SORT_KEYS.get(sort_column, sort_column)
+
+    def sort_index(self, sort_column, columns):
+        """Stelle des Sortierwerts von sort_column in Zeilen aus columns (VirtuelleListe.set_sort)."""
+        return list(columns).index(self._sort_key(sort_column))
+
+    def _order_by(self, sort_column, descending, id_column="id"):
+        # Für Listen, die vollständig geladen werden; die id macht die Reihenfolge eindeutig
+        return _order_clause(self._sort_key(sort_column), id_column, "DESC" if descending else "ASC")
+
+def _same_values(stored, values):
+    # Leere Eingaben werden teils als NULL gespeichert (z.B. Nachschlagewerte der Pannen)
+    return all(a == b or (a in ("", None) and b in ("", None)) for a, b in zip(stored, values))
+
+def _order_clause(sort_column, id_column, order):
+    # Die id macht die Reihenfolge eindeutig; nach der id allein genügt sie als einziger Schlüssel
+    if sort_column == id_column:
+        return f" ORDER BY {id_column} {order}"
+    return f" ORDER BY {sort_column} {order}, {id_column} {order}"
+
+def _max_id(conn, table):
+    return conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()[0]
+
+def _keyset_conditions(sort_column, id_column, value, cursor_id, ascending):
+    # Bereiche nach der Cursor-Zeile in Sortierreihenfolge: zuerst gleiche Werte
+    # mit größerer (kleinerer) id, dann die folgenden Werte. Jeder Bereich ist
+    # eine eigene Indexsuche; ein Zeilenwert-Vergleich (spalte, id) > (?, ?) oder
+    # "OR spalte IS NULL" würde bei wenigen verschiedenen Werten ganze Gruppen lesen.
+    # Liefert (Bedingung, Parameter, Sortierschlüssel): innerhalb eines Werts genügt
+    # die id (bei Ausdrucksindizes sortiert SQLite sonst trotz Gleichheit neu).
+    # SQLite sortiert NULL vor allen Werten.
+    if value is None:
+        if ascending:
+            return [(f"{sort_column} IS NULL AND {id_column} > ?", [cursor_id], id_column),
+                    _nicht_null(sort_column)]
+        return [(f"{sort_column} IS NULL AND {id_column} < ?", [cursor_id], id_column)]
+    if ascending:
+        return [(f"{sort_column} = ? AND {id_column} > ?", [value, cursor_id], id_column),
+                (f"{sort_column} > ?", [value], sort_column)]
+    return [(f"{sort_column} = ? AND {id_column} < ?", [value, cursor_id], id_column),
+            (f"{sort_column} < ?", [value], sort_column), (f"{sort_column} IS NULL", [], id_column)]
+
+def _nicht_null(sort_column):
+    # "IS NOT NULL" liest SQLite bei Spalten als Indexbereich, bei Ausdrucksindizes
+    # aber als Scan über alle Einträge samt der NULL-Werte. Die Ausdrücke der
+    # SORT_KEYS sind Zahlen (_zahl_aus_text); alle Zahlen sind >= -unendlich
+    # (SQLite liest -9e999 als -Inf).
+    if all(teil.isidentifier() for teil in sort_column.split(".")):
+        return f"{sort_column} IS NOT NULL", [], sort_column
+    return f"{sort_column} >= -9e999", [], sort_column
+
+def _zahl_aus_text(column):
+    # Zahlen in Textspalten (z.B. "5,5" oder "400") numerisch sortieren; leere Werte wie NULL
+    return f"CAST(REPLACE(NULLIF(TRIM({column}), ''), ',', '.') AS REAL)"
+
+def _fts_term_variants(term):
+    # Schreibvarianten, die der unicode61-Tokenizer nicht selbst faltet
+    variants = {term, term.replace("ß", "ss"), term.replace("ss", "ß")}
+    for umlaut, ersatz in (("ae", "a"), ("oe", "o"), ("ue", "u")):
+        variants.add(term.replace(umlaut, ersatz))
+    return sorted(variants)
+
+def build_fts_query(search_query):
+    """
+    Baut aus einer freien Eingabe eine FTS5-Abfrage: jedes Wort als Präfix
+    ("Lager" findet auch "Lagerschaden"), alle Wörter müssen vorkommen.
+    """
+    groups = []
+    for term in re.findall(r"\w+", search_query.lower()):
+        variants = " OR ".join(f'"{v}"*' for v in _fts_term_variants(term))
+        groups.append(f"({variants})")
+    return " AND ".join(groups)
+
+# Kürzere Suchen kann der Trigramm-Index nicht beantworten
+TRIGRAMM_MIN = 3
+
+def like_search_condition(columns, search_query, fts_table=None):
+    """
+    Freisuche "spalte LIKE '%suche%'" über mehrere Spalten als (conditions, params).
+    Mit fts_table (Trigramm-Index, Migration 13) holt der Index die Kandidaten,
+    sobald die Suche mindestens TRIGRAMM_MIN Zeichen und keine LIKE-Platzhalter
+    hat; LIKE prüft sie danach, das Ergebnis bleibt also dasselbe.
+    """
+    if not search_query:
+        return [], []
+    like_str = f"%{search_query}%"
+    condition = "(" + " OR ".join(f"{col} LIKE ?" for col in columns) + ")"
+    params = [like_str] * len(columns)
+    if fts_table and len(search_query) >= TRIGRAMM_MIN and not re.search(r"[%_]", search_query):
+        phrase = '"' + search_query.replace('"', '""') + '"'
+        condition = f"id IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?) AND {condition}"
+        params = [phrase] + params
+    return [condition], params
+
+def like_search_pattern(search_query):
+    """Regex mit derselben Bedeutung wie LIKE '%suche%' (ASCII ohne Groß-/Kleinschreibung)."""
+    muster = "".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in search_query)
+    return re.compile(muster, re.ASCII | re.IGNORECASE | re.DOTALL)
+
+def _search_filter(columns, search_columns, search_query):
+    pattern = like_search_pattern(search_query)
+    indizes = [1 + columns.index(col) for col in search_columns]
+    return lambda row: any(row[i] is not None and pattern.search(str(row[i])) for i in indizes)
+
+class PannenRepository(DatabaseRepository):
+    # Spaltenreihenfolge von insert_panne
+    COLUMNS = [
+        "datum", "schicht", "name", "abteilung", "anlage", "anlagenteil", "baugruppe", "beschreibung",
+        "massnahme", "fehlerkategorie", "fehlerursache", "ausfallzeit", "prioritaet", "melder"
+    ]
+
+    # Nur Spalten mit Index auf pannen_daten (datum: Migration 8, übrige: Migration 15),
+    # damit auch 1 Mio. Pannen seitenweise über den Index sortiert gelesen werden.
+    # Die aufgelösten Namen (Abteilung, Anlage, ...) ließen sich nur über alle Zeilen sortieren.
+    SORT_COLUMNS = ["id", "datum", "ausfallzeit", "prioritaet"]
+
+    # Natürlicher Schlüssel für upsert_many: gleicher Tag, Ort und Beschreibung
+    UPSERT_KEY = ("datum", "abteilung", "anlage", "anlagenteil", "beschreibung")
+
+    def _filter_conditions(self, abteilung="", anlage="", start_date="", end_date="", anlagenteil=""):
+        conditions = []
+        params = []
+        if abteilung:
+            conditions.append("abteilung = ?")
+            params.append(abteilung)
+        if anlage:
+            conditions.append("anlage = ?")
+            params.append(anlage)
+        if anlagenteil:
+            conditions.append("anlagenteil = ?")
+            params.append(anlagenteil)
+        if start_date and end_date:
+            conditions.append("datum BETWEEN ? AND ?")
+            params.extend([normalize_datum(start_date), normalize_datum(end_date)])
+        return conditions, params
+
+    def get_filtered_pannen(self, abteilung="", anlage="", start_date="", end_date=""):
+        conditions, params = self._filter_conditions(abteilung, anlage, start_date, end_date)
+        query = "SELECT id, abteilung, anlage, datum, beschreibung FROM pannen"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, tuple(params))
+            return cursor.fetchall()
+
+    def iter_filtered_pannen(self, abteilung="", anlage="", start_date="", end_date="", columns=None, batch_size=1000,
+                             sort_column="id", descending=False):
+        """Wie get_filtered_pannen, liefert die Zeilen aber stückweise (z.B. für Exporte)."""
+        columns = columns or ["id", "abteilung", "anlage", "datum", "beschreibung"]
+        conditions, params = self._filter_conditions(abteilung, anlage, start_date, end_date)
+        query = f"SELECT {', '.join(columns)} FROM pannen"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += self._order_by(sort_column, descending)
+        cursor = self._connect().execute(query, tuple(params))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+
+    def get_pannen_page(self, abteilung="", anlage="", start_date="", end_date="", anlagenteil="",
+                        after_id=None, before_id=None, page_size=200, sort_column="id", descending=True,
+                        columns=None, cursor_value=CURSOR_NACHLESEN):
+        """
+        Eine Seite gefilterter Pannen per Keyset-Paging (neueste zuerst, sonst
+        nach sort_column aus SORT_COLUMNS). Standardspalten: id gefolgt von COLUMNS.
+        cursor_value: Sortierwert der Zeile after_id/before_id (siehe _keyset_page).
+        """
+        sort_column = self._sort_key(sort_column)
+        columns = columns or ["id"] + self.COLUMNS
+        conditions, params = self._filter_conditions(abteilung, anlage, start_date, end_date, anlagenteil)
+        return self._keyset_page("pannen", columns, conditions, params, sort_column, descending,
+                                 after_id, before_id, page_size, cursor_value=cursor_value)
+
+    def get_pannen_by_ids(self, ids, abteilung="", anlage="", start_date="", end_date="", anlagenteil="",
+                          columns=None):
+        """Wie get_pannen_page, aber nur die Zeilen zu ids, die zu den Filtern passen."""
+        columns = columns or ["id"] + self.COLUMNS
+        conditions, params = self._filter_conditions(abteilung, anlage, start_date, end_date, anlagenteil)
+        return self._rows_by_ids(f"SELECT {', '.join(columns)} FROM pannen", ids,
+                                 conditions=conditions, params=params)
+
+    def search_pannen(self, search_query, limit=200, markers=("[", "]"), sort_column=None, descending=False,
+                      ids=None):
+        """
+        Volltextsuche über Name, Beschreibung, Fehlerkategorie, Fehlerursache,
+        Maßnahme und Melder, nach Relevanz (bm25) sortiert; mit sort_column
+        werden die besten limit Treffer danach umsortiert.
+        Liefert Zeilen (id, <COLUMNS>, ausschnitt) mit markierten Fundstellen.
+        ids: nur diese Zeilen prüfen (geänderte Zeilen einer angezeigten Suche).
+        """
+        fts_query = build_fts_query(search_query)
+        if not fts_query or ids is not None and not ids:
+            return []
+        nur_ids = f"AND pannen_fts.rowid IN ({', '.join('?' for _ in ids)})" if ids is not None else ""
+        query = f"""
+            SELECT p.id, {", ".join("p." + col for col in self.COLUMNS)},
+                   snippet(pannen_fts, -1, ?, ?, '…', 12)
+            FROM pannen_fts
+            JOIN pannen p ON p.id = pannen_fts.rowid
+            WHERE pannen_fts MATCH ? {nur_ids}
+            ORDER BY pannen_fts.rank
+            LIMIT ?
+        """
+        if sort_column is not None:
+            query = f"SELECT * FROM ({query})" + self._order_by(sort_column, descending)
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (markers[0], markers[1], fts_query) + tuple(ids or ()) + (limit,))
+            return cursor.fetchall()
+
+    # 'pannen' ist eine Sicht mit aufgelösten Namen; Auswertungen gruppieren
+    # direkt auf den Fremdschlüsseln in 'pannen_daten' und holen die Namen danach.
+    def get_pannen_counts_by_abteilung(self):
+        query = """
+            SELECT ab.name, c.anzahl
+            FROM (SELECT abteilung_id, COUNT(*) AS anzahl FROM pannen_daten GROUP BY abteilung_id) c
+            LEFT JOIN abteilungen ab ON ab.abteilung_id = c.abteilung_id
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query)
+            return cursor.fetchall()
+
+    def get_ausfallzeit_by_abteilung(self, start_date, end_date):
+        # Summe der Ausfallminuten je Abteilung; nicht erkannte Altwerte (Text) zählen nicht mit
+        query = """
+            SELECT ab.name, s.summe
+            FROM (
+                SELECT abteilung_id, SUM(ausfallzeit) AS summe
+                FROM pannen_daten
+                WHERE datum BETWEEN ? AND ? AND typeof(ausfallzeit) = 'integer'
+                GROUP BY abteilung_id
+            ) s
+            LEFT JOIN abteilungen ab ON ab.abteilung_id = s.abteilung_id
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (normalize_datum(start_date), normalize_datum(end_date)))
+            return cursor.fetchall()
+
+    def get_ausfallzeit_summe(self, start_date, end_date):
+        query = """
+            SELECT COALESCE(SUM(ausfallzeit), 0)
+            FROM pannen_daten
+            WHERE datum BETWEEN ? AND ? AND typeof(ausfallzeit) = 'integer'
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (normalize_datum(start_date), normalize_datum(end_date)))
+            return cursor.fetchone()[0]
+
+    def insert_panne(self, panne_data):
+        query = """
+            INSERT INTO pannen 
+            (datum, schicht, name, abteilung, anlage, anlagenteil, baugruppe, beschreibung, massnahme, fehlerkategorie, fehlerursache, ausfallzeit, prioritaet, melder)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+
+        def insert(conn):
+            conn.execute(query, normalize_row(self.COLUMNS, panne_data))
+            # lastrowid ist bei Sichten nicht gesetzt; die neue Zeile hat die größte id
+            return conn.execute("SELECT MAX(id) FROM pannen_daten").fetchone()[0]
+
+        # Zeile im Format von get_pannen_page (id + COLUMNS)
+        return self._write_row(insert, f"SELECT id, {', '.join(self.COLUMNS)} FROM pannen WHERE id = ?")
+
+    def row_matches(self, row, abteilung="", anlage="", start_date="", end_date="", anlagenteil=""):
+        """Prüft eine Zeile (id + COLUMNS) in Python wie die Filter von get_pannen_page."""
+        werte = dict(zip(["id"] + self.COLUMNS, row))
+        for col, value in (("abteilung", abteilung), ("anlage", anlage), ("anlagenteil", anlagenteil)):
+            if value and werte[col] != value:
+                return False
+        if start_date and end_date:
+            return werte["datum"] is not None and normalize_datum(start_date) <= werte["datum"] <= normalize_datum(end_date)
+        return True
+
+    def insert_many(self, rows, chunk_size=1000):
+        """Fügt viele Pannen ein (Tupel wie bei insert_panne oder Dicts); liefert ein SchreibErgebnis."""
+        return self._insert_many("pannen", self.COLUMNS, rows, chunk_size,
+                                 prepare=self._normalize, id_table="pannen_daten")
+
+    def upsert_many(self, rows, key_columns=UPSERT_KEY, chunk_size=1000):
+        return self._upsert_many("pannen", self.COLUMNS, list(key_columns), rows, chunk_size,
+                                 prepare=self._normalize, id_table="pannen_daten")
+
+    def _normalize(self, values):
+        return normalize_row(self.COLUMNS, values)
+
+    def get_abteilungen(self):
+        return get_referenz_cache(self.db_path).abteilungen()
+
+    def get_anlagen(self, abteilung=None):
+        return get_referenz_cache(self.db_path).anlagen(abteilung)
+
+class ErsatzteileRepository(DatabaseRepository):
+    COLUMNS = ["hersteller", "typ", "bauform", "spannung", "bestellnummer", "lagerplatz",
+               "beschreibung", "zusatz1", "zusatz2", "zusatz3"]
+    # Spalten mit eigenem Index (typ: Migration 12, hersteller und bestellnummer: Migration 15);
+    # lagerplatz sortiert über den Facettenindex (lagerplatz, hersteller, typ)
+    SORT_COLUMNS = ["id", "hersteller", "typ", "bestellnummer", "lagerplatz"]
+    FACETS = ["hersteller", "typ", "lagerplatz"]
+    SEARCH_COLUMNS = ["hersteller", "typ", "beschreibung"]
+    # Natürlicher Schlüssel für upsert_many und den inkrementellen Import
+    # (massenimport.IMPORT_KEYS): Bestellnummern gelten je Hersteller
+    UPSERT_KEY = ("hersteller", "bestellnummer")
+
+    def _facet_conditions(self, filters, exclude=None):
+        conditions = []
+        params = []
+        for facet in self.FACETS:
+            if facet != exclude and filters.get(facet):
+                conditions.append(f"{facet} = ?")
+                params.append(filters[facet])
+        return conditions, params
+
+    def _search_condition(self, search_query):
+        return like_search_condition(self.SEARCH_COLUMNS, search_query, "ersatzteile_fts")
+
+    def search_ersatzteile(self, search_query="", hersteller="", typ="", lagerplatz="",
+                           after_id=None, before_id=None, page_size=200, sort_column="id", descending=False,
+                           with_facets=True, cursor_value=CURSOR_NACHLESEN):
+        """
+        Facettensuche: eine Seite der Treffer (Keyset-Paging, Spalten id + COLUMNS)
+        und die Trefferzahlen je Hersteller, Typ und Lagerplatz.
+        Liefert (rows, facets); siehe get_facet_counts(). Beim Nachladen weiterer
+        Seiten kann with_facets=False gesetzt werden, facets ist dann None.
+        cursor_value: Sortierwert der Zeile after_id/before_id (siehe _keyset_page).
+        """
+        sort_column = self._sort_key(sort_column)
+        filters = {"hersteller": hersteller, "typ": typ, "lagerplatz": lagerplatz}
+        conditions, params = self._search_condition(search_query)
+        facet_conditions, facet_params = self._facet_conditions(filters)
+        rows = self._keyset_page("ersatzteile", ["id"] + self.COLUMNS, conditions + facet_conditions,
+                                 params + facet_params, sort_column, descending, after_id, before_id, page_size,
+                                 cursor_value=cursor_value)
+        if not with_facets:
+            return rows, None
+        return rows, self.get_facet_counts(search_query, **filters)
+
+    def get_facet_counts(self, search_query="", hersteller="", typ="", lagerplatz=""):
+        """
+        Trefferzahlen je Facettenwert in einer Abfrage. Jede Facette berücksichtigt
+        die Freisuche und die übrigen Filter, nicht aber ihren eigenen, damit die
+        Auswahl jederzeit gewechselt werden kann.
+        Liefert {"hersteller": [(wert, anzahl), ...], "typ": [...], "lagerplatz": [...], "gesamt": n}.
+        """
+        filters = {"hersteller": hersteller, "typ": typ, "lagerplatz": lagerplatz}
+        search_conditions, search_params = self._search_condition(search_query)
+        if search_conditions:
+            # Die Freisuche (LIKE) nur einmal über die Tabelle laufen lassen
+            prefix = f"WITH treffer AS MATERIALIZED (SELECT hersteller, typ, lagerplatz FROM ersatzteile WHERE {search_conditions[0]}) "
+            source = "treffer"
+            params = list(search_params)
+        else:
+            prefix = ""
+            source = "ersatzteile"
+            params = []
+        parts = []
+        for facet in self.FACETS + [None]:
+            conditions, condition_params = self._facet_conditions(filters, exclude=facet)
+            where = " WHERE " + " AND ".join(conditions) if conditions else ""
+            if facet is None:
+                parts.append(f"SELECT 'gesamt', NULL, COUNT(*) FROM {source}{where}")
+            else:
+                parts.append(f"SELECT '{facet}', {facet}, COUNT(*) FROM {source}{where} GROUP BY {facet}")
+            params.extend(condition_params)
+        query = prefix + " UNION ALL ".join(parts)
+        facets = {facet: [] for facet in self.FACETS}
+        facets["gesamt"] = 0
+        with self._connect() as conn:
+            for facet, value, count in conn.execute(query, tuple(params)):
+                if facet == "gesamt":
+                    facets["gesamt"] = count
+                elif value:
+                    facets[facet].append((value, count))
+        for facet in self.FACETS:
+            facets[facet].sort(key=lambda item: item[0])
+        return facets
+
+    def facet_counts_of(self, rows):
+        """
+        Trefferzahlen wie get_facet_counts() ohne Facettenfilter, aber aus
+        bereits geladenen Zeilen (id + COLUMNS), z.B. einem verfeinerten Suchergebnis.
+        """
+        facets = {}
+        for facet in self.FACETS:
+            index = 1 + self.COLUMNS.index(facet)
+            counts = {}
+            for row in rows:
+                if row[index]:
+                    counts[row[index]] = counts.get(row[index], 0) + 1
+            facets[facet] = sorted(counts.items())
+        facets["gesamt"] = len(rows)
+        return facets
+
+    def search_filter(self, search_query):
+        """Prüft Zeilen (id + COLUMNS) in Python wie die Freisuche in SQL."""
+        return _search_filter(self.COLUMNS, self.SEARCH_COLUMNS, search_query)
+
+    def row_matches(self, row, search_query="", hersteller="", typ="", lagerplatz=""):
+        """Prüft eine Zeile (id + COLUMNS) in Python wie search_ersatzteile."""
+        filters = {"hersteller": hersteller, "typ": typ, "lagerplatz": lagerplatz}
+        for facet, value in filters.items():
+            if value and row[1 + self.COLUMNS.index(facet)] != value:
+                return False
+        return not search_query or self.search_filter(search_query)(row)
+
+    def get_ersatzteile_by_ids(self, ids):
+        """Zeilen (id + COLUMNS) zu einzelnen ids."""
+        return self._rows_by_ids(f"SELECT id, {', '.join(self.COLUMNS)} FROM ersatzteile", ids)
+
+    def get_all_ersatzteile(self, search_query=""):
+        query = """
+            SELECT id, hersteller, typ, bauform, spannung, bestellnummer, lagerplatz, beschreibung, zusatz1, zusatz2, zusatz3 
+            FROM ersatzteile
+        """
+        conditions, params = self._search_condition(search_query)
+        if conditions:
+            query += " WHERE " + conditions[0]
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+    def insert_ersatzteil(self, data):
+        query = """
+            INSERT INTO ersatzteile 
+            (hersteller, typ, bauform, spannung, bestellnummer, lagerplatz, beschreibung, zusatz1, zusatz2, zusatz3)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        return self._write_row(lambda conn: conn.execute(query, data).lastrowid,
+                               f"SELECT id, {', '.join(self.COLUMNS)} FROM ersatzteile WHERE id = ?")
+
+    def insert_many(self, rows, chunk_size=1000):
+        """Fügt viele Ersatzteile ein (Tupel wie bei insert_ersatzteil oder Dicts)."""
+        return self._insert_many("ersatzteile", self.COLUMNS, rows, chunk_size)
+
+    def upsert_many(self, rows, key_columns=UPSERT_KEY, chunk_size=1000):
+        """Aktualisiert Ersatzteile mit gleichem Hersteller und gleicher Bestellnummer, fügt die übrigen ein."""
+        return self._upsert_many("ersatzteile", self.COLUMNS, list(key_columns), rows, chunk_size)
+
+    def get_all_hersteller(self):
+        query = "SELECT DISTINCT hersteller FROM ersatzteile ORDER BY hersteller"
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query)
+            results = cursor.fetchall()
+            return [row[0] for row in results if row[0]]
+
+    def get_types_by_hersteller(self, hersteller):
+        query = "SELECT DISTINCT typ FROM ersatzteile WHERE hersteller = ? ORDER BY typ"
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (hersteller,))
+            results = cursor.fetchall()
+            return [row[0] for row in results if row[0]]
+
+class MotorenRepository(DatabaseRepository):
+    COLUMNS = ["motornummer", "im_sw", "g", "bs", "firma", "neu", "typ", "seriennummer",
+               "leistung", "spannung", "n1_min", "n2_min", "strom", "cosinus_phi", "lagerort", "bemerkung"]
+    SEARCH_COLUMNS = ["motornummer", "firma", "typ", "bemerkung"]
+    # Natürlicher Schlüssel für upsert_many und den inkrementellen Import (massenimport.IMPORT_KEYS)
+    UPSERT_KEY = ("motornummer", "seriennummer")
+    # Nur Spalten mit Index (Migration 18), damit jede Seite über den Index sortiert gelesen wird
+    SORT_COLUMNS = ["id", "motornummer", "firma", "typ", "seriennummer", "leistung", "spannung"]
+    # Messwerte stehen als Text in der Tabelle ("5,5", "400"); sortiert wird nach dem
+    # Zahlenwert, über einen Ausdrucksindex
+    SORT_KEYS = {col: _zahl_aus_text(col) for col in ["leistung", "spannung"]}
+    # Zeilen der Liste: id, COLUMNS und dahinter die Zahlenwerte, damit die Liste neue
+    # Zeilen danach einordnen und ab dem geladenen Wert weiterblättern kann
+    ROW_COLUMNS = ["id"] + COLUMNS + list(SORT_KEYS.values())
+
+    def get_motoren_page(self, search_query="", sort_column="id", descending=False, after_id=None, before_id=None,
+                         page_size=200, cursor_value=CURSOR_NACHLESEN):
+        """Eine Seite Motoren (ROW_COLUMNS) per Keyset-Paging, optional mit Freisuche."""
+        conditions, params = like_search_condition(self.SEARCH_COLUMNS, search_query, "motoren_fts")
+        return self._keyset_page("motoren", self.ROW_COLUMNS, conditions, params, self._sort_key(sort_column),
+                                 descending, after_id, before_id, page_size, cursor_value=cursor_value)
+
+    def iter_motoren(self, search_query="", sort_column="id", descending=False, batch_size=1000):
+        """Alle Motoren zur Freisuche (ROW_COLUMNS), stückweise (z.B. für Exporte)."""
+        query = f"SELECT {', '.join(self.ROW_COLUMNS)} FROM motoren"
+        conditions, params = like_search_condition(self.SEARCH_COLUMNS, search_query, "motoren_fts")
+        if conditions:
+            query += " WHERE " + conditions[0]
+        query += self._order_by(sort_column, descending)
+        cursor = self._connect().execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+
+    def get_all_motoren(self, search_query="", sort_column="id", descending=False):
+        return list(self.iter_motoren(search_query, sort_column, descending))
+
+    def get_motoren_by_ids(self, ids):
+        """Zeilen wie get_motoren_page() zu einzelnen ids."""
+        return self._rows_by_ids(f"SELECT {', '.join(self.ROW_COLUMNS)} FROM motoren", ids)
+
+    def search_filter(self, search_query):
+        """Prüft Zeilen von get_motoren_page() in Python wie die Freisuche in SQL."""
+        return _search_filter(self.COLUMNS, self.SEARCH_COLUMNS, search_query)
+
+    def insert_motor(self, data):
+        query = """
+            INSERT INTO motoren 
+            (motornummer, im_sw, g, bs, firma, neu, typ, seriennummer,
+             leistung, spannung, n1_min, n2_min, strom, cosinus_phi, lagerort, bemerkung)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        # Zeile im Format von get_motoren_page
+        return self._write_row(lambda conn: conn.execute(query, data).lastrowid,
+                               f"SELECT {', '.join(self.ROW_COLUMNS)} FROM motoren WHERE id = ?")
+
+    def insert_many(self, rows, chunk_size=1000):
+        """Fügt viele Motoren ein (Tupel wie bei insert_motor oder Dicts)."""
+        return self._insert_many("motoren", self.COLUMNS, rows, chunk_size)
+
+    def upsert_many(self, rows, key_columns=UPSERT_KEY, chunk_size=1000):
+        """Aktualisiert Motoren mit gleicher Motor- und Seriennummer, fügt die übrigen ein."""
+        return self._upsert_many("motoren", self.COLUMNS, list(key_columns), rows, chunk_size)
+
+class BenutzerRepository(DatabaseRepository):
+    COLUMNS = ["username", "password", "role"]
+    UPSERT_KEY = ("username",)
+    # username ist eindeutig (Index), role hat einen Index aus Migration 18
+    SORT_COLUMNS = ["id", "username", "role"]
+    ROW_COLUMNS = ["id", "username", "role"]
+
+    def get_login(self, username):
+        """(id, password, role) des Benutzers oder None."""
+        query = "SELECT id, password, role FROM benutzer WHERE username = ? LIMIT 1"
+        with self._connect() as conn:
+            return conn.execute(query, (username,)).fetchone()
+
+    def get_users_page(self, sort_column="id", descending=False, after_id=None, before_id=None, page_size=200,
+                       cursor_value=CURSOR_NACHLESEN):
+        """Eine Seite Benutzer (id, username, role) per Keyset-Paging."""
+        return self._keyset_page("benutzer", self.ROW_COLUMNS, (), (), self._sort_key(sort_column), descending,
+                                 after_id, before_id, page_size, cursor_value=cursor_value)
+
+    # Zeile im Format von get_users_page
+    ROW_SELECT = "SELECT id, username, role FROM benutzer WHERE id = ?"
+
+    def get_users_by_ids(self, ids):
+        return self._rows_by_ids("SELECT id, username, role FROM benutzer", ids)
+
+    def insert_user(self, username, password, role):
+        query = "INSERT INTO benutzer (username, password, role) VALUES (?, ?, ?)"
+        import bcrypt
+        hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+        return self._write_row(lambda conn: conn.execute(query, (username, hashed, role)).lastrowid, self.ROW_SELECT)
+
+    def insert_many(self, rows, chunk_size=1000):
+        """Legt viele Benutzer an: (username, password, role) oder Dicts; Passwörter werden gehasht."""
+        return self._insert_many("benutzer", self.COLUMNS, rows, chunk_size, prepare=self._hash_password)
+
+    def upsert_many(self, rows, key_columns=UPSERT_KEY, chunk_size=1000):
+        return self._upsert_many("benutzer", self.COLUMNS, list(key_columns), rows, chunk_size,
+                                 prepare=self._hash_password)
+
+    def _hash_password(self, values):
+        import bcrypt
+        username, password, role = values
+        return username, bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()), role
+
+    def update_user(self, user_id, username, role):
+        query = "UPDATE benutzer SET username = ?, role = ? WHERE id = ?"
+
+        def update(conn):
+            conn.execute(query, (username, role, user_id))
+            return user_id
+
+        return self._write_row(update, self.ROW_SELECT, Aenderung.GEAENDERT)
+
+    def delete_user(self, user_id):
+        return self._delete_row("benutzer", user_id)
+
+class WartungenRepository(DatabaseRepository):
+    # Nur Spalten mit Index (Migration 18); der Anlagenname käme erst aus dem Join
+    SORT_COLUMNS = ["id", "datum", "wiederholung", "erledigt"]
+    SORT_KEYS = {"id": "w.id", "datum": "w.datum", "wiederholung": _zahl_aus_text("w.wiederholung"),
+                 "erledigt": "w.erledigt"}
+    # Zeilen der Liste; dahinter der Zahlenwert der Wiederholung für die Sortierung
+    ROW_COLUMNS = ["w.id", "IFNULL(a.name, '') AS anlage_name", "w.datum", "w.pruefnotiz", "w.wiederholung",
+                   "w.erledigt", SORT_KEYS["wiederholung"]]
+    FROM = "wartungen w LEFT JOIN anlagen a ON w.anlage_id = a.anlage_id"
+    SELECT = f"SELECT {', '.join(ROW_COLUMNS)} FROM {FROM}"
+
+    def get_wartungen_page(self, sort_column="id", descending=False, after_id=None, before_id=None, page_size=200,
+                           cursor_value=CURSOR_NACHLESEN):
+        """Eine Seite Wartungen (ROW_COLUMNS) per Keyset-Paging."""
+        return self._keyset_page(self.FROM, self.ROW_COLUMNS, (), (), self._sort_key(sort_column), descending,
+                                 after_id, before_id, page_size, id_column="w.id", cursor_value=cursor_value)
+
+    def get_wartungen_by_ids(self, ids):
+        return self._rows_by_ids(self.SELECT, ids, id_column="w.id")
+
+    def insert_wartung(self, anlage_id, datum, pruefnotiz, wiederholung, erledigt):
+        query = """
+            INSERT INTO wartungen (anlage_id, datum, pruefnotiz, wiederholung, erledigt)
+            VALUES (?, ?, ?, ?, ?)
+        """
+        return self._write_row(
+            lambda conn: conn.execute(query, (anlage_id, datum, pruefnotiz, wiederholung, erledigt)).lastrowid,
+            self.SELECT + " WHERE w.id = ?")
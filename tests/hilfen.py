@@ -0,0 +1,19 @@
+﻿import os
+import shutil
+import tempfile
+import unittest
+from db_connection import get_manager
+from migrations import migrate
+
+
+class DatenbankTest(unittest.TestCase):
+    """Jeder Test bekommt eine eigene, frisch migrierte Datenbankdatei."""
+
+    def setUp(self):
+        self.verzeichnis = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.verzeichnis, "test.db")
+        migrate(self.db_path)
+
+    def tearDown(self):
+        get_manager(self.db_path).close_all()
+        shutil.rmtree(self.verzeichnis, ignore_errors=True)
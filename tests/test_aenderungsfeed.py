@@ -0,0 +1,50 @@
+﻿import unittest
+from aenderungsfeed import Aenderungsfeed
+from db_connection import get_connection
+from repository import Aenderung, MotorenRepository
+from tests.hilfen import DatenbankTest
+
+
+class AenderungsfeedTest(DatenbankTest):
+    def setUp(self):
+        super().setUp()
+        self.repo = MotorenRepository(self.db_path)
+        self.feed = Aenderungsfeed(self.db_path, max_ereignisse=5)
+        self.erhalten = []
+        self.feed.subscribe("motoren", self.erhalten.append)
+
+    def test_nur_neue_eintraege_ab_dem_wasserstand(self):
+        self.repo.insert_many([{"motornummer": "M1"}])
+        self.assertEqual(self.feed.poll(), 1)
+        alt = self.feed._stand
+        neu = self.repo.insert_motor(("M2",) + ("",) * 15)
+        self.assertEqual(self.feed.poll(), 1)
+        self.assertEqual([(e.art, e.id) for e in self.erhalten[-1]], [(Aenderung.NEU, neu.id)])
+        self.assertEqual(self.feed._stand, alt + 1)
+        # Ohne weitere Schreibzugriffe liest der Feed nichts
+        self.assertEqual(self.feed.poll(), 0)
+
+    def test_andere_tabellen_melden_nichts(self):
+        conn = get_connection(self.db_path)
+        conn.execute("INSERT INTO benutzer (username, password, role) VALUES ('x', 'x', 'user')")
+        conn.commit()
+        self.assertEqual(self.feed.poll(), 1)
+        self.assertEqual(self.erhalten, [])
+
+    def test_viele_eintraege_laden_neu(self):
+        self.repo.insert_many([{"motornummer": f"M{i}"} for i in range(10)])
+        self.feed.poll()
+        self.assertEqual(self.erhalten, [None])
+
+    def test_gekuerztes_protokoll_laedt_neu(self):
+        self.repo.insert_many([{"motornummer": f"M{i}"} for i in range(3)])
+        # Einträge hinter dem Wasserstand sind weggekürzt (Trigger aenderungen_kuerzen)
+        conn = get_connection(self.db_path)
+        conn.execute("DELETE FROM aenderungen WHERE id = (SELECT MIN(id) FROM aenderungen)")
+        conn.commit()
+        self.feed.poll()
+        self.assertEqual(self.erhalten, [None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+﻿import unittest
+from db_connection import get_connection
+from repository import MotorenRepository, WartungenRepository, PannenRepository
+from tests.hilfen import DatenbankTest
+
+# Wenige verschiedene Werte mit Leerwerten: jede Seite endet mitten in einer
+# Gruppe gleicher Werte, die Bereiche nach der Cursor-Zeile werden geteilt
+LEISTUNGEN = ["", None, "5,5", "5.5", "400", "11", "0,75", " 3 "]
+FIRMEN = ["A", "B", None, "C"]
+SEITE = 7
+
+
+class KeysetPagingTest(DatenbankTest):
+    def setUp(self):
+        super().setUp()
+        self.repo = MotorenRepository(self.db_path)
+        self.repo.insert_many([{"motornummer": f"M{i}", "firma": FIRMEN[i % len(FIRMEN)],
+                                "leistung": LEISTUNGEN[i % len(LEISTUNGEN)],
+                                "spannung": LEISTUNGEN[(i * 3) % len(LEISTUNGEN)]} for i in range(60)])
+
+    def vorwaerts(self, page, sort_index, **sortierung):
+        zeilen = []
+        seite = page(page_size=SEITE, **sortierung)
+        while seite:
+            zeilen += seite
+            seite = page(page_size=SEITE, after_id=seite[-1][0], cursor_value=seite[-1][sort_index], **sortierung)
+        return zeilen
+
+    def test_seiten_ergeben_die_sortierung(self):
+        for sort_column in self.repo.SORT_COLUMNS:
+            for descending in (False, True):
+                with self.subTest(sort_column=sort_column, descending=descending):
+                    sort_index = self.repo.sort_index(sort_column, self.repo.ROW_COLUMNS)
+                    zeilen = self.vorwaerts(self.repo.get_motoren_page, sort_index, sort_column=sort_column,
+                                            descending=descending)
+                    self.assertEqual(zeilen, self.repo.get_all_motoren(sort_column=sort_column,
+                                                                       descending=descending))
+
+    def test_rueckwaerts_blaettern(self):
+        sort_index = self.repo.sort_index("leistung", self.repo.ROW_COLUMNS)
+        for descending in (False, True):
+            with self.subTest(descending=descending):
+                alle = self.repo.get_all_motoren(sort_column="leistung", descending=descending)
+                zeilen = seite = alle[-SEITE:]
+                while True:
+                    seite = self.repo.get_motoren_page(sort_column="leistung", descending=descending,
+                                                       before_id=seite[0][0], cursor_value=seite[0][sort_index],
+                                                       page_size=SEITE)
+                    if not seite:
+                        break
+                    zeilen = seite + zeilen
+                self.assertEqual(zeilen, alle)
+
+    def test_cursor_zeile_geloescht(self):
+        sort_index = self.repo.sort_index("firma", self.repo.ROW_COLUMNS)
+        alle = self.repo.get_all_motoren(sort_column="firma")
+        cursor = alle[SEITE - 1]
+        self.repo._delete_row("motoren", cursor[0])
+        # Mit dem geladenen Sortierwert geht es hinter der gelöschten Zeile weiter ...
+        seite = self.repo.get_motoren_page(sort_column="firma", after_id=cursor[0],
+                                           cursor_value=cursor[sort_index], page_size=SEITE)
+        self.assertEqual(seite, alle[SEITE:2 * SEITE])
+        # ... ohne ihn ist die Seite leer statt wieder die erste
+        self.assertEqual(self.repo.get_motoren_page(sort_column="firma", after_id=cursor[0], page_size=SEITE), [])
+
+    def test_sortierung_nach_id_mit_einem_schluessel(self):
+        conn = get_connection(self.db_path)
+        mitschnitt = []
+        conn.set_trace_callback(mitschnitt.append)
+        try:
+            self.repo.get_motoren_page(after_id=10, page_size=SEITE)
+        finally:
+            conn.set_trace_callback(None)
+        abfragen = [sql for sql in mitschnitt if sql.startswith("SELECT")]
+        self.assertEqual(len(abfragen), 1)
+        self.assertIn("ORDER BY id ASC LIMIT", abfragen[0])
+
+    def test_wartungen_mit_alias(self):
+        conn = get_connection(self.db_path)
+        conn.execute("INSERT INTO abteilungen (name) VALUES ('Abt')")
+        conn.execute("INSERT INTO anlagen (abteilung_id, name) VALUES (1, 'Anlage')")
+        conn.executemany("INSERT INTO wartungen (anlage_id, datum, wiederholung, erledigt) VALUES (?, ?, ?, ?)",
+                         [(1 if i % 2 else None, f"2024-0{i % 3 + 1}-01", LEISTUNGEN[i % len(LEISTUNGEN)], i % 2)
+                          for i in range(40)])
+        conn.commit()
+        repo = WartungenRepository(self.db_path)
+        for sort_column in repo.SORT_COLUMNS:
+            for descending in (False, True):
+                with self.subTest(sort_column=sort_column, descending=descending):
+                    sort_index = repo.sort_index(sort_column, repo.ROW_COLUMNS)
+                    zeilen = self.vorwaerts(repo.get_wartungen_page, sort_index, sort_column=sort_column,
+                                            descending=descending)
+                    erwartet = conn.execute(repo.SELECT + repo._order_by(sort_column, descending, "w.id")).fetchall()
+                    self.assertEqual(zeilen, erwartet)
+
+
+class PannenSeitenTest(DatenbankTest):
+    def test_sortiert_nach_datum_mit_gleichen_werten(self):
+        repo = PannenRepository(self.db_path)
+        repo.insert_many([{"datum": f"2024-01-0{i % 4 + 1}", "name": f"N{i}", "abteilung": "Abt", "anlage": "Anl",
+                           "ausfallzeit": i % 5} for i in range(30)])
+        sort_index = 1 + repo.COLUMNS.index("datum")
+        for descending in (False, True):
+            with self.subTest(descending=descending):
+                zeilen = []
+                seite = repo.get_pannen_page(sort_column="datum", descending=descending, page_size=SEITE)
+                while seite:
+                    zeilen += seite
+                    seite = repo.get_pannen_page(sort_column="datum", descending=descending, page_size=SEITE,
+                                                 after_id=seite[-1][0], cursor_value=seite[-1][sort_index])
+                schluessel = [(row[sort_index], row[0]) for row in zeilen]
+                self.assertEqual(schluessel, sorted(schluessel, reverse=descending))
+                self.assertEqual(len(zeilen), 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
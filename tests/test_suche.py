@@ -0,0 +1,38 @@
+﻿import unittest
+from repository import PannenRepository, build_fts_query
+from tests.hilfen import DatenbankTest
+
+
+class FtsAbfrageTest(unittest.TestCase):
+    def test_schreibvarianten(self):
+        self.assertEqual(build_fts_query("Straße"), '("strasse"* OR "straße"*)')
+        self.assertEqual(build_fts_query("Strasse"), '("strasse"* OR "straße"*)')
+        self.assertIn('"mutter"*', build_fts_query("Mutter"))
+
+    def test_mehrere_woerter(self):
+        self.assertEqual(build_fts_query("Lager  defekt!"), '("lager"*) AND ("defekt"*)')
+        self.assertEqual(build_fts_query(" ,; "), "")
+
+
+class PannenSucheTest(DatenbankTest):
+    def setUp(self):
+        super().setUp()
+        self.repo = PannenRepository(self.db_path)
+        self.repo.insert_many([
+            {"datum": "2024-01-01", "name": "Straßenbahn", "abteilung": "Abt", "anlage": "Anl",
+             "beschreibung": "Lagerschaden"},
+            {"datum": "2024-01-02", "name": "Pumpe", "abteilung": "Abt", "anlage": "Anl",
+             "beschreibung": "Dichtung undicht"},
+        ])
+
+    def test_ss_findet_eszett(self):
+        self.assertEqual([row[0] for row in self.repo.search_pannen("strassen")], [1])
+        self.assertEqual([row[0] for row in self.repo.search_pannen("Lager")], [1])
+
+    def test_nur_angegebene_ids(self):
+        self.assertEqual(self.repo.search_pannen("Lager", ids=[2]), [])
+        self.assertEqual(self.repo.search_pannen("Lager", ids=[]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
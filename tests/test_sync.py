@@ -0,0 +1,72 @@
+﻿import sqlite3
+import unittest
+from massenimport import sync_rows
+from tests.hilfen import DatenbankTest
+
+PANNEN_KOPF = ["datum", "name", "abteilung", "anlage", "beschreibung", "ausfallzeit"]
+MOTOREN_KOPF = ["motornummer", "seriennummer", "firma", "leistung"]
+
+
+class SyncTest(DatenbankTest):
+    def setUp(self):
+        super().setUp()
+        self.conn = sqlite3.connect(self.db_path)
+
+    def tearDown(self):
+        self.conn.close()
+        super().tearDown()
+
+    def fingerprints(self, tabelle):
+        return dict(self.conn.execute("SELECT schluessel, zeilen_id FROM import_fingerprints WHERE tabelle = ?",
+                                      (tabelle,)))
+
+    def pannen(self):
+        return [[f"2024-01-0{i}", f"N{i}", f"Abt {i}", "Anl", f"B{i}", "10"] for i in range(1, 4)]
+
+    def test_pannen_sicht_merkt_die_echten_ids(self):
+        # Die Sicht setzt kein lastrowid; die Fingerprints müssen trotzdem auf die Zeilen zeigen
+        bericht = sync_rows(self.conn, "pannen", PANNEN_KOPF, self.pannen(), key_columns=["datum", "name"])
+        self.assertEqual(len(bericht.inserted), 3)
+        ids = dict(self.conn.execute("SELECT name, id FROM pannen"))
+        self.assertEqual(sorted(self.fingerprints("pannen").values()), sorted(ids.values()))
+        self.assertEqual(sorted(ids.values()), [1, 2, 3])
+
+    def test_zweiter_lauf_unveraendert_und_aenderung(self):
+        zeilen = self.pannen()
+        sync_rows(self.conn, "pannen", PANNEN_KOPF, zeilen, key_columns=["datum", "name"])
+        bericht = sync_rows(self.conn, "pannen", PANNEN_KOPF, zeilen, key_columns=["datum", "name"])
+        self.assertEqual((len(bericht.inserted), len(bericht.updated), bericht.unchanged), (0, 0, 3))
+
+        zeilen[1][4] = "geändert"
+        bericht = sync_rows(self.conn, "pannen", PANNEN_KOPF, zeilen, key_columns=["datum", "name"])
+        self.assertEqual([zeilen_id for _, zeilen_id in bericht.updated], [2])
+        self.assertEqual(bericht.unchanged, 2)
+        self.assertEqual(self.conn.execute("SELECT beschreibung FROM pannen WHERE id = 2").fetchone()[0], "geändert")
+
+    def test_fehlende_zeilen_werden_geloescht(self):
+        zeilen = self.pannen()
+        sync_rows(self.conn, "pannen", PANNEN_KOPF, zeilen, key_columns=["datum", "name"])
+        bericht = sync_rows(self.conn, "pannen", PANNEN_KOPF, zeilen[:2], key_columns=["datum", "name"])
+        self.assertEqual(len(bericht.deleted), 1)
+        self.assertEqual([row[0] for row in self.conn.execute("SELECT id FROM pannen ORDER BY id")], [1, 2])
+        self.assertEqual(len(self.fingerprints("pannen")), 2)
+
+    def test_probelauf_schreibt_nichts(self):
+        bericht = sync_rows(self.conn, "pannen", PANNEN_KOPF, self.pannen(), key_columns=["datum", "name"],
+                            dry_run=True)
+        self.assertEqual(len(bericht.inserted), 3)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM pannen").fetchone()[0], 0)
+        self.assertEqual(self.fingerprints("pannen"), {})
+
+    def test_vorhandene_zeilen_werden_zugeordnet(self):
+        # Erster Abgleich nach einem Vollimport: gleiche Schlüssel verdoppeln nichts
+        self.conn.execute("INSERT INTO motoren (motornummer, seriennummer, firma, leistung) VALUES ('M1', 'S1', 'A', '5,5')")
+        self.conn.commit()
+        bericht = sync_rows(self.conn, "motoren", MOTOREN_KOPF, [["M1", "S1", "A", "5,5"], ["M2", "S2", "B", "11"]])
+        self.assertEqual((len(bericht.inserted), bericht.unchanged), (1, 1))
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM motoren").fetchone()[0], 2)
+        self.assertEqual(sorted(self.fingerprints("motoren").values()), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,242 @@
+﻿import os
+import csv
+import sqlite3
+import logging
+import itertools
+from collections import Counter
+import numpy as np
+import pandas as pd
+from db_connection import configure_connection
+from normalize import normalize_zahl
+from massenimport import (BATCH_SIZE, IMPORT_KEYS, ImportFortschritt, ZeilenUmwandler,
+                          read_rows, table_columns, write_rows)
+
+# Prüfregeln je Zieltabelle. Geprüft wird nach der Umwandlung (ZeilenUmwandler),
+# Datumswerte liegen dann als ISO-Text vor. Leere Werte sind nur in
+# Pflichtspalten ein Fehler; "eindeutig" ist standardmäßig der Importschlüssel.
+PRUEFREGELN = {
+    "pannen": {
+        "pflicht": ["datum", "abteilung", "anlage"],
+        "datum": ["datum"],
+        "zahlen": {"ausfallzeit": (0, 60 * 24 * 366), "prioritaet": (1, 5)},
+        "eindeutig": ["datum", "abteilung", "anlage", "anlagenteil", "beschreibung"],
+    },
+    "motoren": {
+        "pflicht": ["motornummer"],
+        "zahlen": {
+            "leistung": (0, 100000),
+            "spannung": (0, 100000),
+            "strom": (0, 100000),
+            "n1_min": (0, 100000),
+            "n2_min": (0, 100000),
+            "cosinus_phi": (0, 1),
+        },
+    },
+    "ersatzteile": {
+        "pflicht": ["bestellnummer"],
+        "zahlen": {"bestand": (0, None), "mindestbestand": (0, None), "einzelpreis": (0, None)},
+    },
+}
+
+DATUM_VON = np.datetime64("1990-01-01")
+DATUM_BIS = np.datetime64("2100-01-01")
+PRUEF_BLOCK = 50000
+
+
+def _leer(werte):
+    """werte: Objekt-Array; leer sind None, NaN und ''."""
+    return pd.isna(werte) | (werte == "")
+
+
+def _zahlen(werte, leer):
+    # Dezimalkomma in einem Schritt ersetzen ('12,5' -> '12.5'), dann wandelt
+    # pandas in C um; nur der Rest (z.B. '1.234,5') geht einzeln durch normalize_zahl
+    text = np.char.replace(np.where(leer, "nan", werte).astype(str), ",", ".")
+    try:
+        zahlen = text.astype(float)
+    except ValueError:
+        zahlen = np.array(pd.to_numeric(text, errors="coerce"), dtype=float)
+    offen = np.flatnonzero(np.isnan(zahlen) & ~leer)
+    if len(offen):
+        nachgeholt = [normalize_zahl(werte[i]) for i in offen]
+        zahlen[offen] = pd.to_numeric(pd.Series(nachgeholt, dtype=object), errors="coerce").to_numpy(
+            dtype=float, na_value=np.nan)
+    return zahlen
+
+
+def _schluessel(spalten):
+    """Schlüsseltext je Zeile wie massenimport._text, Spalten durch \\x1f getrennt."""
+    teile = [np.char.strip(pd.Series(werte, dtype=object).fillna("").to_numpy().astype(str)) for werte in spalten]
+    schluessel = teile[0]
+    for teil in teile[1:]:
+        schluessel = np.char.add(np.char.add(schluessel, "\x1f"), teil)
+    return schluessel.astype(object)
+
+
+class ImportPruefung:
+    """
+    Prüft umgewandelte Importzeilen blockweise mit pandas: Pflichtfelder,
+    Datumswerte, Zahlenbereiche und doppelte Schlüssel (auch über Blockgrenzen).
+    Abgelehnte Zeilen werden mit Zeilennummer und Gründen in rejects_path
+    (CSV, ';') geschrieben; gültige Zeilen werden unverändert weitergegeben.
+    """
+
+    def __init__(self, table_name, columns, rejects_path=None, regeln=None):
+        regeln = PRUEFREGELN.get(table_name, {}) if regeln is None else regeln
+        self.columns = list(columns)
+        self.pflicht = list(regeln.get("pflicht", ()))
+        self.datum = [col for col in regeln.get("datum", ()) if col in self.columns]
+        self.zahlen = {col: grenzen for col, grenzen in regeln.get("zahlen", {}).items() if col in self.columns}
+        eindeutig = regeln.get("eindeutig", IMPORT_KEYS.get(table_name, ()))
+        self.eindeutig = [col for col in eindeutig if col in self.columns]
+        fehlend = [col for col in self.pflicht if col not in self.columns]
+        if fehlend:
+            logging.error(f"Pflichtspalten {fehlend} fehlen im Import nach '{table_name}', alle Zeilen werden abgelehnt.")
+        self.rejects_path = rejects_path
+        self._file = None
+        self._writer = None
+        self._seen = set()
+        self.geprueft = 0
+        self.abgelehnt = 0
+        self.gruende = Counter()
+
+    def check(self, numbered):
+        """numbered: [(zeilennummer, werte)]; liefert die gültigen Werte."""
+        if not numbered:
+            return []
+        nummern = [nummer for nummer, _ in numbered]
+        werte = [values for _, values in numbered]
+        df = pd.DataFrame(werte, columns=self.columns, dtype=object)
+        anzahl = len(werte)
+        checks = []
+        leere = {}
+
+        def leer(col):
+            if col not in leere:
+                leere[col] = _leer(df[col].to_numpy())
+            return leere[col]
+
+        for col in self.pflicht:
+            fehlt = leer(col) if col in self.columns else np.ones(anzahl, dtype=bool)
+            checks.append((fehlt, f"{col} fehlt"))
+        for col in self.datum:
+            datum = pd.to_datetime(df[col], format="%Y-%m-%d", errors="coerce").to_numpy(dtype="datetime64[ns]")
+            ungueltig = np.isnat(datum) | (datum < DATUM_VON) | (datum >= DATUM_BIS)
+            checks.append((ungueltig & ~leer(col), f"{col} ist kein gültiges Datum"))
+        for col, (minimum, maximum) in self.zahlen.items():
+            zahlen = _zahlen(df[col].to_numpy(), leer(col))
+            checks.append((np.isnan(zahlen) & ~leer(col), f"{col} ist keine Zahl"))
+            with np.errstate(invalid="ignore"):
+                if minimum is not None:
+                    checks.append((zahlen < minimum, f"{col} kleiner als {minimum}"))
+                if maximum is not None:
+                    checks.append((zahlen > maximum, f"{col} größer als {maximum}"))
+
+        abgelehnt = np.zeros(anzahl, dtype=bool)
+        for mask, _ in checks:
+            abgelehnt |= mask
+        if self.eindeutig:
+            # Nur unter sonst gültigen Zeilen: die erste gültige Zeile eines Schlüssels gewinnt
+            schluessel = _schluessel([df[col].to_numpy() for col in self.eindeutig])
+            kandidaten = ~abgelehnt
+            seen = self._seen
+            bekannt = np.fromiter((key in seen for key in schluessel), dtype=bool, count=anzahl)
+            im_block = pd.Series(schluessel).where(kandidaten).duplicated().to_numpy(dtype=bool)
+            doppelt = kandidaten & (bekannt | im_block)
+            seen.update(schluessel[kandidaten & ~doppelt])
+            checks.append((doppelt, "doppelter Schlüssel " + "/".join(self.eindeutig)))
+            abgelehnt |= doppelt
+
+        self.geprueft += anzahl
+        indizes = np.flatnonzero(abgelehnt)
+        if len(indizes):
+            self.abgelehnt += len(indizes)
+            for mask, grund in checks:
+                treffer = int(mask.sum())
+                if treffer:
+                    self.gruende[grund] += treffer
+            self._write_rejects(
+                (nummern[i], "; ".join(grund for mask, grund in checks if mask[i]), werte[i]) for i in indizes
+            )
+        return list(itertools.compress(werte, ~abgelehnt))
+
+    def valid_rows(self, numbered_rows, chunk_size=PRUEF_BLOCK):
+        """Prüft (zeilennummer, werte)-Paare blockweise und liefert die gültigen Werte."""
+        while True:
+            chunk = list(itertools.islice(numbered_rows, chunk_size))
+            if not chunk:
+                return
+            yield from self.check(chunk)
+
+    def _write_rejects(self, entries):
+        if self.rejects_path is None:
+            return
+        if self._writer is None:
+            self._file = open(self.rejects_path, "w", encoding="utf-8-sig", newline="")
+            self._writer = csv.writer(self._file, delimiter=";")
+            self._writer.writerow(["zeile", "gruende"] + self.columns)
+        self._writer.writerows([nummer, gruende] + list(values) for nummer, gruende, values in entries)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def summary(self):
+        return {
+            "geprueft": self.geprueft,
+            "abgelehnt": self.abgelehnt,
+            "gruende": dict(self.gruende.most_common()),
+            "abgelehnt_datei": self.rejects_path if self.abgelehnt else None,
+        }
+
+
+def rejects_path_for(file_path):
+    return os.path.splitext(file_path)[0] + "_abgelehnt.csv"
+
+
+def validated_populate(file_path, db_path, table_name, rejects_path=None, batch_size=BATCH_SIZE,
+                       chunk_size=PRUEF_BLOCK, progress_callback=None):
+    """
+    Wie dynamic_populate, aber mit Prüfstufe (ImportPruefung): abgelehnte Zeilen
+    landen mit Begründung in rejects_path (Standard: <datei>_abgelehnt.csv),
+    nur gültige Zeilen werden geschrieben. Liefert ein Dict mit eingefügten,
+    geprüften und abgelehnten Zeilen oder None, wenn die Datei nicht lesbar ist.
+    """
+    try:
+        wb, headers, rows = read_rows(file_path)
+    except Exception as e:
+        logging.error(f"Fehler beim Laden der Datei '{file_path}': {e}")
+        return None
+
+    pruefung = None
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            configure_connection(conn)
+            conn.execute("PRAGMA cache_size = -65536")
+            umwandler = ZeilenUmwandler(headers, table_columns(conn, table_name), table_name)
+            if not umwandler.columns:
+                logging.warning(f"Keine gemeinsamen Spalten zwischen Import und Tabelle '{table_name}' gefunden.")
+                return None
+            pruefung = ImportPruefung(table_name, umwandler.columns, rejects_path or rejects_path_for(file_path))
+            progress = ImportFortschritt(f"{file_path} -> {table_name}", progress_callback)
+            gueltig = pruefung.valid_rows(umwandler.convert_numbered(rows), chunk_size)
+            inserted, errors = write_rows(conn, table_name, umwandler.columns, gueltig, batch_size, progress)
+        finally:
+            conn.close()
+    except Exception as e:
+        logging.error(f"Fehler beim Import in Tabelle '{table_name}': {e}")
+        return None
+    finally:
+        if pruefung is not None:
+            pruefung.close()
+        wb.close()
+
+    result = dict(pruefung.summary(), eingefuegt=inserted, fehler=errors)
+    logging.info(f"Daten aus '{file_path}' in Tabelle '{table_name}' importiert: {inserted} Zeilen, "
+                 f"{result['abgelehnt']} von {result['geprueft']} abgelehnt, {errors} Schreibfehler.")
+    if result["abgelehnt"]:
+        logging.warning(f"Abgelehnte Zeilen in '{result['abgelehnt_datei']}', Gründe: {result['gruende']}")
+    return result